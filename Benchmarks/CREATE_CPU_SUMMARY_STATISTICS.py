@@ -1,294 +1,82 @@
+import os
+import sys
+
+# The shared parsers live with the preprocessing scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data", "Preprocessing_Scripts"))
+
 import pandas as pd
-import re
 
+from cpu_reductions import reduce_cpu_columns
+from diagnostic_parsers import capture_timezone, cpu_temp_capture, cpu_util_capture
+from parse_cache import cached_parse
+from stream_alignment import align_streams
 
-def clean_cpu_util_data(filename):
+
+def compute_core_util_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
     """
-    Function to clean the CPU utilization data from a text file and convert it into a DataFrame.
+    Function to reduce the per-thread utilization to one value per core, e.g. 'CPU_1_Core_0_Avg_Util'.
 
     Parameters:
-    filename (str): The name of the file containing CPU utilization data
+    df (pd.DataFrame): DataFrame from clean_cpu_util_data
+    stats (tuple): Reductions over the threads of each core: 'mean', 'max', 'p95' and/or 'spread'
 
     Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU utilization data
+    pd.DataFrame: One column per reduction and core in socket, core order, followed by 'timestamp'
     """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Define the pattern for CPU utilization
-    cpu_util_pattern = r"(\d{1,3}\.\d{1,2}) us"
-
-    # initialize the variables used to parse the data correctly
-    thread_counter = 0
-    outer_index = 0
-    core_name = 0
-    core_counter = 0
-    cpu_num = 1
-    has_data = False
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all CPU utilizations
-        for reading in re.findall(cpu_util_pattern, line):
-            has_data = True  # Flag to indicate that data is found
-
-            # Add the utilization to the DataFrame
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}_Thread_{thread_counter}'] = reading
-
-            # Since there are only 2 threads, increment the thread counter
-            thread_counter += 1
-
-        # We reset the thread count after finding both readings
-        thread_counter = 0
-
-        if has_data:
-            # Update core name if data has been processed
-            core_name += 1
-
-            # Determine which CPU, Core, and timestamp the reading belongs to
-            if core_counter < 9:
-                cpu_num = 1
-
-            elif core_counter == 9:
-                # Reset core name and update CPU number
-                core_name = 0
-                cpu_num = 2
-
-            # Increment core counter
-            core_counter += 1
-
-            # Reset counters if all cores and threads have been processed
-            if core_counter == 20:
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1  # Increment index to move to the next row
-
-        # Reset the flag for the next iteration
-        has_data = False
-
-    return df
-
-
-def compute_core_util_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Convert all data to floats to avoid type errors
-    df = df.astype(float)
-
-    # Assuming df is your DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Remove thread information from column names
-    group_names = [re.sub("_Thread_[0-9]$", "", col) for col in col_names]
-
-    # Dictionary to store results
-    results = {}
-
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group + "_Avg_Util"] = df[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
-
-    return df_result
-
-
-def compute_cpu_util_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Convert all data to floats to avoid type errors
-    df = df.astype(float)
-
-    # Assuming df is your DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
+    return reduce_cpu_columns(df, "core", "Util", stats)
 
-    # Remove core and thread information from column names
-    group_names = [re.sub("_Core_[0-9]_Thread_[0-9]$", "", col) for col in col_names]
 
-    # Dictionary to store results
-    results = {}
-
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group + "_Avg_Util"] = df[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
-
-    return df_result
-
-
-def clean_cpu_temp_data(filename):
+def compute_cpu_util_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
     """
-    Function to clean the CPU temperature data from a text file and convert it into a DataFrame.
+    Function to reduce the per-thread utilization to one value per socket, e.g. 'CPU_1_Avg_Util'.
 
     Parameters:
-    filename (str): The name of the file containing CPU temperature data
+    df (pd.DataFrame): DataFrame from clean_cpu_util_data
+    stats (tuple): Reductions over the threads of each socket: 'mean', 'max', 'p95' and/or 'spread'
 
     Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU temperature data
+    pd.DataFrame: One column per reduction and socket in socket order, followed by 'timestamp'
     """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['timestamp', 'CPU_1_Core_0', 'CPU_1_Core_1', 'CPU_1_Core_2', 'CPU_1_Core_3', 'CPU_1_Core_4',
-                 'CPU_1_Core_5', 'CPU_1_Core_6', 'CPU_1_Core_7', 'CPU_1_Core_8', 'CPU_1_Core_9', 'CPU_2_Core_0',
-                 'CPU_2_Core_1', 'CPU_2_Core_2', 'CPU_2_Core_3', 'CPU_2_Core_4', 'CPU_2_Core_5', 'CPU_2_Core_6',
-                 'CPU_2_Core_7', 'CPU_2_Core_8', 'CPU_2_Core_9']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Remove all occurrences of "Â°" from the text file
-    text_file = re.sub("Â°", "", text_file)
-
-    # Define the pattern for date and timezone
-    date_pattern = r"\D\D\D \D\D\D \d\d \d\d\:\d\d\:\d\d \D\D \D\D\D \d\d\d\d"
-    timezone = "PDT "
-
-    # Extract and parse timestamp data
-    for idx, temp_reading in enumerate(re.findall(date_pattern, text_file)):
-        # Remove timezone and convert the remaining string to datetime
-        temp_reading = re.sub(timezone, "", temp_reading)
-        dt = pd.to_datetime(temp_reading)
-        # Add the datetime to the DataFrame
-        df.at[idx, 'timestamp'] = dt
-
-    # Define the pattern for temperature readings
-    core_temps_separate_cpu_pattern = r"\D{4} \d{1,2}:\s{7,8}\+\d{2}.\d"
-    temp_pattern = r"(\d{2}.\d)"
-
-    # Initialize counting variables necessary for parsing the data to the correct location
-    core_counter = 0
-    outer_index = 0
-    core_name = 0
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all temperature readings
-        for temp_reading in re.findall(core_temps_separate_cpu_pattern, line):
-            # Determine which CPU the reading belongs to
-            if core_counter < 10:
-                cpu_num = 1
-            elif core_counter == 10:
-                # When moving to CPU 2, reset core_name
-                cpu_num = 2
-                core_name = 0
-            elif core_counter == 20:
-                # Reset counters when moving to a new set of readings
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1
-
-            # Extract just the temperature from the reading
-            temp = re.search(temp_pattern, temp_reading).group(1)
-
-           # Add the temperature to the DataFrame, constructing the column name based on cpu_num and core_name
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}'] = temp
+    return reduce_cpu_columns(df, "socket", "Util", stats)
 
-            # Increment the core_counter and core_name for the next iteration
-            core_counter += 1
-            core_name += 1
 
-    return df
-
-
-def compute_cpu_temp_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Save timestamp column to add it back later
-    timestamp = df['timestamp']
-
-    # Remove the 'timestamp' column for the conversion
-    df_temp = df.drop('timestamp', axis=1)
-
-    # Convert all data to floats to avoid type errors
-    df_temp = df_temp.astype(float)
-
-    col_names = ['CPU_1_Core_0', 'CPU_1_Core_1', 'CPU_1_Core_2', 'CPU_1_Core_3', 'CPU_1_Core_4', 'CPU_1_Core_5',
-                 'CPU_1_Core_6', 'CPU_1_Core_7', 'CPU_1_Core_8', 'CPU_1_Core_9', 'CPU_2_Core_0', 'CPU_2_Core_1',
-                 'CPU_2_Core_2', 'CPU_2_Core_3', 'CPU_2_Core_4', 'CPU_2_Core_5', 'CPU_2_Core_6', 'CPU_2_Core_7',
-                 'CPU_2_Core_8', 'CPU_2_Core_9']
-
-    # Remove core information from column names
-    group_names = [re.sub("_Core_[0-9]$", "", col) for col in col_names]
-
-    # Dictionary to store results
-    results = {}
-
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group+"_Avg_Temp"] = df_temp[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
+def compute_cpu_temp_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
+    """
+    Function to reduce the per-core temperatures to one value per socket, e.g. 'CPU_1_Avg_Temp'.
 
-    # Add back the timestamp
-    df_result['timestamp'] = timestamp
+    Parameters:
+    df (pd.DataFrame): DataFrame from clean_cpu_temp_data
+    stats (tuple): Reductions over the cores of each socket: 'mean', 'max' (hotspot), 'p95' and/or 'spread'
 
-    return df_result
+    Returns:
+    pd.DataFrame: One column per reduction and socket in socket order, followed by 'timestamp'
+    """
+    return reduce_cpu_columns(df, "socket", "Temp", stats)
 
 
 def main():
-    df_thread_util = clean_cpu_util_data("cpu_util.txt")
-    df_core_avg_util = compute_core_util_averages(df_thread_util)
+    # Timezone recorded with the temperatures, used for the output timestamps
+    cpu_temp_file, cpu_temp_parser = cpu_temp_capture()
+    tz = capture_timezone(cpu_temp_file)
+
+    cpu_util_file, cpu_util_parser = cpu_util_capture()
+    df_thread_util = cached_parse(cpu_util_parser, cpu_util_file, tz=tz, workers=os.cpu_count())
     df_cpu_avg_util = compute_cpu_util_averages(df_thread_util)
-    df_cpu_core_temp = clean_cpu_temp_data("cpu_temp.txt")
+    df_cpu_core_temp = cached_parse(cpu_temp_parser, cpu_temp_file, tz=tz, workers=os.cpu_count())
     df_cpu_avg_temp = compute_cpu_temp_averages(df_cpu_core_temp)
 
-    combined_df = df_cpu_avg_temp.join(df_cpu_avg_util)
+    # Align temperature and utilization by timestamp instead of by row position
+    combined_df, report = align_streams({"cpu_temp": df_cpu_avg_temp, "cpu_util": df_cpu_avg_util})
+    print(report.to_string())
 
-    # ensure timestamp column is the first column
-    combined_df = combined_df[['timestamp'] + [col for col in combined_df.columns if col != 'timestamp']]
+    # ensure timestamp column is the first column, in the capture's own timezone
+    combined_df.index = combined_df.index.tz_convert(tz) if tz is not None else combined_df.index
+    combined_df = combined_df.reset_index()
 
     file_prefix = input("Please provide a prefix name for the CPU average statistics file: ")
     combined_df.to_csv(f"{file_prefix}_CPU_Avg_Statistics.csv", index=False)
 
 
-main()
+if __name__ == "__main__":
+    main()
 
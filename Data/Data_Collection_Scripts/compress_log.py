@@ -0,0 +1,81 @@
+import argparse
+import codecs
+import os
+import select
+import sys
+import time
+
+from sampling import COMPRESSED_SUFFIXES, open_output, stop_on_sigterm
+
+
+def compress_stream(source, output, flush_interval=1.0):
+    """
+    Function to copy text lines into a compressed output, flushing a complete block every 'flush_interval' seconds.
+
+    The source is polled with select, so the lines received are flushed on time even while the writer is quiet.
+    Bytes that are not UTF-8 (e.g. a degree sign from another locale) are replaced, as the parsers would anyway.
+
+    Parameters:
+    source (file): Stream to read until it ends, e.g. the standard output of cpu_util.sh
+    output (CompressedOutput): Output opened with open_output
+    flush_interval (float): Seconds between flushes; a crash loses at most the lines since the last one
+
+    Returns:
+    int: Number of lines copied
+    """
+    fd = source.fileno()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    lines = 0
+    partial = b""
+    unflushed = False
+    deadline = time.monotonic() + flush_interval
+    while True:
+        ready, _, _ = select.select([fd], [], [], max(deadline - time.monotonic(), 0))
+        if ready:
+            data = os.read(fd, 1 << 16)
+            if not data:
+                break
+            # Only whole lines are written, so every flushed block ends on a line boundary
+            complete, newline, rest = (partial + data).rpartition(b"\n")
+            partial = rest
+            if newline:
+                output.write(decoder.decode(complete + newline))
+                lines += complete.count(b"\n") + 1
+                unflushed = True
+        if time.monotonic() >= deadline:
+            if unflushed:
+                output.flush()
+                unflushed = False
+            deadline = time.monotonic() + flush_interval
+
+    # A last line without a newline is kept
+    if partial:
+        output.write(decoder.decode(partial, final=True))
+        lines += 1
+    output.flush()
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress a text capture as it is written, e.g. "
+                                                 "./cpu_util.sh | python3 compress_log.py cpu_util.txt.gz")
+    parser.add_argument("output", help="file to append to, compressed by its suffix (.gz, .xz or .zst)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between flushes")
+    parser.add_argument("--level", type=int, default=None, help="compression level; the format's default if omitted")
+    args = parser.parse_args()
+
+    if not args.output.endswith(tuple(COMPRESSED_SUFFIXES)):
+        parser.error(f"output must end in one of {', '.join(COMPRESSED_SUFFIXES)}")
+
+    stop_on_sigterm()
+    output = open_output(args.output, args.level)
+    try:
+        compress_stream(sys.stdin, output, args.flush_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
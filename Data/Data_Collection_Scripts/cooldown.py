@@ -0,0 +1,137 @@
+import json
+import math
+import re
+import time
+
+# hwmon columns averaged into the CPU temperature, like CPU_Avg_Temp in the processed datasets; package sensors
+# are used only when a host reports no per-core temperatures
+CORE_COLUMN_PATTERN = re.compile(r"CPU_\d+_Core_\d+$")
+PACKAGE_COLUMN_PATTERN = re.compile(r"CPU_\d+_Package$")
+
+
+def _mean(values):
+    """
+    Function to average the readings that are not NaN, or return None when there are none.
+    """
+    values = [value for value in values if value is not None and not math.isnan(value)]
+    return sum(values) / len(values) if values else None
+
+
+class TemperatureFollower:
+    """
+    Reader of the CPU and GPU temperatures in the telemetry.jsonl a running collector is appending to.
+
+    Only the lines written since the previous call are read, and a line the collector is still writing is kept
+    until it is complete. The collector flushes about once a second, so readings are at most that old.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.partial = b""
+        self.cpu_positions = None
+        self.gpu_position = None
+
+    def _read_header(self, header):
+        sources = header.get("sources", {})
+        columns = sources.get("hwmon", {}).get("columns", [])
+        self.cpu_positions = ([position for position, name in enumerate(columns) if CORE_COLUMN_PATTERN.match(name)]
+                              or [position for position, name in enumerate(columns)
+                                  if PACKAGE_COLUMN_PATTERN.match(name)])
+        if "gpu_temp" in sources.get("nvidia_smi", {}).get("columns", []):
+            self.gpu_position = sources["nvidia_smi"]["columns"].index("gpu_temp")
+
+    @property
+    def has_temperatures(self):
+        return bool(self.cpu_positions) or self.gpu_position is not None
+
+    def read(self):
+        """
+        Function to read the temperatures recorded since the previous call.
+
+        Returns:
+        list: (monotonic time, mean CPU core temperature, hottest GPU temperature) per record, with None for a
+        temperature the record does not have
+        """
+        lines = (self.partial + self.file.read()).split(b"\n")
+        self.partial = lines.pop()
+
+        readings = []
+        for line in lines:
+            record = json.loads(line)
+            if self.cpu_positions is None:
+                self._read_header(record)
+                continue
+            sources = record.get("sources", {})
+            cpu = gpu = None
+            if sources.get("hwmon") is not None:
+                cpu = _mean(sources["hwmon"][position] for position in self.cpu_positions)
+            if self.gpu_position is not None and sources.get("nvidia_smi") is not None:
+                gpus = [device[self.gpu_position] for device in sources["nvidia_smi"]
+                        if not math.isnan(device[self.gpu_position])]
+                gpu = max(gpus) if gpus else None
+            readings.append((record["monotonic"], cpu, gpu))
+        return readings
+
+    def close(self):
+        self.file.close()
+
+
+def baseline_temperatures(readings):
+    """
+    Function to average idle readings into the temperatures a cooldown waits to return to.
+
+    Parameters:
+    readings (list): (monotonic time, CPU temperature, GPU temperature) from TemperatureFollower.read
+
+    Returns:
+    Tuple[float, float]: Mean CPU and GPU temperatures, None for one that was not recorded
+    """
+    return _mean(cpu for _, cpu, _ in readings), _mean(gpu for _, _, gpu in readings)
+
+
+def reading_span(readings):
+    """
+    Function to return the seconds between the first and last readings that have a temperature, or -1 when none do.
+    """
+    times = [monotonic for monotonic, cpu, gpu in readings if cpu is not None or gpu is not None]
+    return times[-1] - times[0] if times else -1
+
+
+def wait_for_cooldown(follower, baseline, tolerance=2.0, settle=10.0, max_wait=600.0, poll_interval=1.0):
+    """
+    Function to wait until the CPU and GPU are back within 'tolerance' degrees of their baseline, or 'max_wait'.
+
+    The temperatures must stay within the tolerance for 'settle' seconds, so a single low reading does not end the
+    cooldown early. A record missing a temperature that has a baseline restarts the settle time, so a sensor that
+    drops out cannot end the cooldown; if it stays out, the cooldown lasts 'max_wait'. Without a baseline or
+    temperature readings this is a fixed wait of 'max_wait'.
+
+    Parameters:
+    follower (TemperatureFollower): Reader of the running collector's output
+    baseline (tuple): CPU and GPU temperatures from baseline_temperatures
+    tolerance (float): Degrees Celsius above the baseline that count as cooled down
+    settle (float): Seconds the temperatures must stay within the tolerance
+    max_wait (float): Longest cooldown in seconds
+    poll_interval (float): Seconds between checks of the collector's output
+
+    Returns:
+    Tuple[float, bool]: Seconds waited, and whether the baseline was reached before 'max_wait'
+    """
+    started = time.monotonic()
+    deadline = started + max_wait
+    if not follower.has_temperatures or baseline == (None, None):
+        time.sleep(max_wait)
+        return max_wait, False
+
+    cool_since = None
+    while time.monotonic() < deadline:
+        time.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
+        for monotonic, *temperatures in follower.read():
+            if monotonic < started:
+                continue
+            cool = all(reference is None or (temperature is not None and temperature <= reference + tolerance)
+                       for temperature, reference in zip(temperatures, baseline))
+            cool_since = (cool_since or monotonic) if cool else None
+            if cool_since is not None and monotonic - cool_since >= settle:
+                return time.monotonic() - started, True
+    return time.monotonic() - started, False
@@ -0,0 +1,109 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from proc_stat_sampler import cpu_column_names
+from sampling import (BackgroundWriter, SysfsFiles, TickStats, collector_header, open_output, periodic_ticks,
+                      stop_on_sigterm, write_record)
+
+# Values recorded for every logical CPU, in record order
+CPUFREQ_FIELDS = ("freq_MHz", "core_throttles", "package_throttles")
+
+# Files read for each field, relative to /sys/devices/system/cpu/cpu<N>
+CPUFREQ_FILES = ("cpufreq/scaling_cur_freq", "thermal_throttle/core_throttle_count",
+                 "thermal_throttle/package_throttle_count")
+
+
+class CpuFreqSampler:
+    """
+    Sampler of the current frequency and the thermal throttling events of every logical CPU.
+
+    The cpufreq and thermal_throttle files are opened once and re-read with pread. Files a CPU does not export
+    (no cpufreq driver in most VMs, no thermal_throttle outside Intel) are reported as NaN.
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.cpu_root = os.path.join(sysfs_root, "devices", "system", "cpu")
+        self.cpus = sorted(int(re.search(r"(\d+)$", path).group(1))
+                           for path in glob.glob(os.path.join(self.cpu_root, "cpu[0-9]*")))
+        paths = [os.path.join(self.cpu_root, f"cpu{cpu}", name) for cpu in self.cpus for name in CPUFREQ_FILES]
+        self.present = [position for position, path in enumerate(paths) if os.path.exists(path)]
+        if not self.present:
+            raise OSError(f"No cpufreq or thermal_throttle files under {self.cpu_root}")
+        self.files = SysfsFiles(paths[position] for position in self.present)
+        self.previous = None
+
+    def columns(self):
+        return cpu_column_names(self.cpus, self.cpu_root)
+
+    def sample(self):
+        """
+        Function to read every CPU's frequency and the throttling events since the previous call.
+
+        Returns:
+        np.ndarray: float64 array of shape (cpus, len(CPUFREQ_FIELDS)) holding MHz and the number of new core and
+        package throttling events, or None on the first call, which only records the starting counters
+        """
+        current = np.full(len(self.cpus) * len(CPUFREQ_FILES), np.nan)
+        current[self.present] = self.files.read()
+        current = current.reshape(len(self.cpus), len(CPUFREQ_FILES))
+
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return None
+        # scaling_cur_freq is in kHz; the throttle files are running counts
+        return np.column_stack([current[:, 0] / 1000, current[:, 1:] - previous[:, 1:]])
+
+    def close(self):
+        self.files.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample per-CPU frequency and throttling events as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    args = parser.parse_args()
+
+    try:
+        sampler = CpuFreqSampler(args.sysfs_root)
+    except OSError as error:
+        sys.exit(str(error))
+
+    stop_on_sigterm()
+    output = open_output(args.output)
+
+    # One header describing the CPUs and fields, then one record per tick
+    write_record(output, collector_header("cpufreq", args.interval, fields=list(CPUFREQ_FIELDS),
+                                          columns=sampler.columns()))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            values = sampler.sample()
+            if values is None:
+                continue
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6),
+                          "values": np.round(values, 1).tolist()})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
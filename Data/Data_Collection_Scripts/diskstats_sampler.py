@@ -0,0 +1,126 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from sampling import (BackgroundWriter, TickStats, collector_header, open_output, periodic_ticks, stop_on_sigterm,
+                      write_record)
+
+# Rates derived for every disk, in record order
+DISK_FIELDS = ("read_MBps", "write_MBps", "read_iops", "write_iops", "util")
+
+# Block devices that are not drives
+VIRTUAL_DEVICE_PATTERN = re.compile(r"(loop|ram|zram|nbd|sr|fd)\d")
+
+# Counters of a /proc/diskstats line used below, numbered from the one after the device name: reads completed,
+# sectors read, writes completed, sectors written and milliseconds spent doing I/O
+READS, SECTORS_READ, WRITES, SECTORS_WRITTEN, IO_MS = 0, 2, 4, 6, 9
+
+# /proc/diskstats counts sectors of 512 bytes whatever the drive's own sector size
+SECTOR_BYTES = 512
+
+
+def whole_disks(names, sysfs_root="/sys"):
+    """
+    Function to keep the whole drives of a list of block devices, leaving out partitions and virtual devices.
+
+    Parameters:
+    names (list): Device names from /proc/diskstats
+    sysfs_root (str): Root of the sysfs tree; whole disks have an entry under block/
+
+    Returns:
+    list: The names of whole physical or RAID/LVM disks, in the order given
+    """
+    return [name for name in names
+            if os.path.exists(os.path.join(sysfs_root, "block", name)) and not VIRTUAL_DEVICE_PATTERN.match(name)]
+
+
+class DiskStatsSampler:
+    """
+    Sampler turning successive /proc/diskstats readings into per-disk throughput, IOPS and utilization.
+
+    The file is kept open and re-read with pread, like /proc/stat in proc_stat_sampler.py.
+    """
+
+    def __init__(self, path="/proc/diskstats", sysfs_root="/sys"):
+        self.fd = os.open(path, os.O_RDONLY)
+        self.devices = whole_disks(list(self._read()), sysfs_root)
+        self.previous = None
+
+    def _read(self):
+        counters = {}
+        for line in os.pread(self.fd, 1 << 20, 0).decode().splitlines():
+            fields = line.split()
+            counters[fields[2]] = fields[3:]
+        return counters
+
+    def sample(self):
+        """
+        Function to read the counters and return each disk's activity since the previous call.
+
+        Returns:
+        np.ndarray: float64 array of shape (devices, len(DISK_FIELDS)) in MB/s, operations/s and percent busy, or
+        None on the first call, which only records the starting counters
+        """
+        now = time.monotonic()
+        counters = self._read()
+        current = np.array([[int(counters[device][column]) if device in counters else 0
+                             for column in (READS, SECTORS_READ, WRITES, SECTORS_WRITTEN, IO_MS)]
+                            for device in self.devices], dtype=np.int64).reshape(len(self.devices), 5)
+
+        previous, self.previous = self.previous, (now, current)
+        if previous is None or now <= previous[0]:
+            return None
+        elapsed = now - previous[0]
+        reads, sectors_read, writes, sectors_written, io_ms = (current - previous[1]).T / elapsed
+
+        return np.stack([sectors_read * SECTOR_BYTES / 1e6, sectors_written * SECTOR_BYTES / 1e6, reads, writes,
+                         np.minimum(io_ms / 10, 100.0)], axis=1)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample per-disk throughput, IOPS and utilization as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    args = parser.parse_args()
+
+    stop_on_sigterm()
+    sampler = DiskStatsSampler(sysfs_root=args.sysfs_root)
+    output = open_output(args.output)
+
+    # One header describing the disks and rates, then one record per tick
+    write_record(output, collector_header("diskstats", args.interval, fields=list(DISK_FIELDS),
+                                          columns=sampler.devices))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            rates = sampler.sample()
+            if rates is None:
+                continue
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6),
+                          "values": np.round(rates, 3).tolist()})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from rapl_sampler import RaplCounters
+
+
+def measure(command, sysfs_root="/sys", poll_interval=1.0, pid_file=None):
+    """
+    Function to run a command to completion and total the RAPL energy used while it ran.
+
+    The counters are polled every 'poll_interval' seconds while waiting, so wraparounds during long runs are counted.
+    On hosts without readable RAPL counters the command still runs and no energy is reported.
+
+    Parameters:
+    command (list): Program and arguments to run
+    sysfs_root (str): Root of the sysfs tree
+    poll_interval (float): Seconds between counter reads while the command runs
+    pid_file (str): File to write the command's PID to, for the process source of the collectors
+
+    Returns:
+    dict: Start and end times (epoch seconds), the monotonic start time the collectors stamp their records with,
+    duration, return code, and joules and average watts per RAPL zone
+    """
+    try:
+        counters = RaplCounters(sysfs_root)
+    except OSError as error:
+        print(f"Energy not measured: {error}", file=sys.stderr)
+        counters = None
+
+    start, started = time.time(), time.monotonic()
+    process = subprocess.Popen(command)
+    if pid_file is not None:
+        with open(pid_file, "w") as f:
+            f.write(f"{process.pid}\n")
+
+    joules = []
+    try:
+        while True:
+            try:
+                returncode = process.wait(timeout=poll_interval)
+                break
+            except subprocess.TimeoutExpired:
+                if counters is not None:
+                    counters.read()
+    except BaseException:
+        # Interrupted (Ctrl-C or SIGTERM): stop the benchmark rather than leave it running unobserved
+        process.terminate()
+        process.wait()
+        raise
+    finally:
+        if counters is not None:
+            joules = counters.read()
+            counters.close()
+
+    seconds = time.monotonic() - started
+    names = counters.names if counters is not None else []
+    return {"start": round(start, 6), "end": round(start + seconds, 6), "monotonic": round(started, 6),
+            "seconds": round(seconds, 3), "returncode": returncode,
+            "joules": {name: round(value, 3) for name, value in zip(names, joules)},
+            "average_watts": {name: round(value / seconds, 3) for name, value in zip(names, joules)}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a benchmark and report the RAPL energy it used.")
+    parser.add_argument("--report", default=None, help="file to append the run's JSON summary to")
+    parser.add_argument("--label", default=None, help="name of the run in the summary, e.g. 'Iteration 3'")
+    parser.add_argument("--pid-file", default=None, help="file to write the benchmark's PID to")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between counter reads")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="benchmark command, after '--'")
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("no benchmark command given")
+
+    summary = measure(command, args.sysfs_root, args.poll_interval, args.pid_file)
+    if args.label is not None:
+        summary = {"label": args.label, **summary}
+    if args.report is not None:
+        with open(args.report, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+    total = ", ".join(f"{name} {value:.1f} J" for name, value in summary["joules"].items())
+    print(f"{args.label or 'Run'}: {summary['seconds']:.1f} s, {total or 'no RAPL counters'}", file=sys.stderr)
+    sys.exit(summary["returncode"])
+
+
+if __name__ == "__main__":
+    main()
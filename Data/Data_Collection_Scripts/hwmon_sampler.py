@@ -0,0 +1,133 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from sampling import (BackgroundWriter, SysfsFiles, TickStats, collector_header, open_output, periodic_ticks,
+                      stop_on_sigterm, write_record)
+
+# Labels the coretemp driver gives its inputs, e.g. 'Package id 1' and 'Core 12'
+PACKAGE_LABEL_PATTERN = re.compile(r"Package id (\d+)")
+CORE_LABEL_PATTERN = re.compile(r"Core (\d+)")
+
+
+def _read_text(path, default=""):
+    """
+    Function to read a small sysfs attribute as stripped text, or 'default' when it does not exist.
+    """
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _input_number(path):
+    """
+    Function to extract N from a '.../tempN_input' path, for ordering inputs the way `sensors` lists them.
+    """
+    return int(re.search(r"temp(\d+)_input$", path).group(1))
+
+
+def discover_temperature_files(sysfs_root="/sys"):
+    """
+    Function to find every temperature the kernel exports and name it for the processed datasets.
+
+    coretemp inputs are named like the columns parsed from `sensors`: 'CPU_{socket}_Core_{core}', with sockets
+    numbered from 1 in package id order and cores numbered by their position within the socket, plus
+    'CPU_{socket}_Package'. Other hwmon chips (NVMe drives, ACPI) are named '{chip}_{label}' and thermal zones
+    'thermal_{type}'.
+
+    Parameters:
+    sysfs_root (str): Root of the sysfs tree; point at a copy to test without the hardware
+
+    Returns:
+    list: (column name, file path) pairs, CPU cores first in socket and core order
+    """
+    cpu_chips = []
+    other = []
+    for chip in sorted(glob.glob(os.path.join(sysfs_root, "class", "hwmon", "hwmon*"))):
+        name = _read_text(os.path.join(chip, "name"), os.path.basename(chip))
+        inputs = sorted(glob.glob(os.path.join(chip, "temp*_input")), key=_input_number)
+        labels = [_read_text(path[:-len("input")] + "label", f"temp{_input_number(path)}") for path in inputs]
+
+        if name == "coretemp":
+            package = next((int(match.group(1)) for match in map(PACKAGE_LABEL_PATTERN.match, labels) if match),
+                           len(cpu_chips))
+            cpu_chips.append((package, list(zip(labels, inputs))))
+        else:
+            other.extend((f"{name}_{label.replace(' ', '_')}", path) for label, path in zip(labels, inputs))
+
+    cores = []
+    packages = []
+    for socket, (_, sensors) in enumerate(sorted(cpu_chips, key=lambda chip: chip[0]), start=1):
+        core_inputs = []
+        for label, path in sensors:
+            match = CORE_LABEL_PATTERN.match(label)
+            if match:
+                core_inputs.append((int(match.group(1)), path))
+            elif PACKAGE_LABEL_PATTERN.match(label):
+                packages.append((f"CPU_{socket}_Package", path))
+
+        core_inputs.sort()
+        cores.extend((f"CPU_{socket}_Core_{position}", path) for position, (_, path) in enumerate(core_inputs))
+
+    for zone in sorted(glob.glob(os.path.join(sysfs_root, "class", "thermal", "thermal_zone*")),
+                       key=lambda zone: int(re.search(r"(\d+)$", zone).group(1))):
+        if os.path.exists(os.path.join(zone, "temp")):
+            other.append((f"thermal_{_read_text(os.path.join(zone, 'type'), os.path.basename(zone))}",
+                          os.path.join(zone, "temp")))
+
+    # Keep names unique when several chips of a kind report the same label
+    named = []
+    seen = {}
+    for column, path in cores + packages + other:
+        seen[column] = seen.get(column, 0) + 1
+        named.append((column if seen[column] == 1 else f"{column}_{seen[column] - 1}", path))
+    return named
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample hwmon and thermal zone temperatures as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    args = parser.parse_args()
+
+    sensors = discover_temperature_files(args.sysfs_root)
+    if not sensors:
+        sys.exit(f"No temperature inputs found under {args.sysfs_root}")
+
+    stop_on_sigterm()
+    files = SysfsFiles(path for _, path in sensors)
+    output = open_output(args.output)
+
+    # One header describing the columns, then one record of degrees Celsius per tick
+    write_record(output, collector_header("hwmon", args.interval, units="celsius",
+                                          columns=[column for column, _ in sensors]))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            # The kernel reports millidegrees
+            values = [round(value / 1000, 3) for value in files.read()]
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6), "values": values})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        files.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
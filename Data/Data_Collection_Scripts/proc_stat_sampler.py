@@ -0,0 +1,156 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from sampling import (BackgroundWriter, TickStats, collector_header, open_output, periodic_ticks, stop_on_sigterm,
+                      write_record)
+
+# Per-CPU time counters of /proc/stat, in file order. guest and guest_nice are left out: the kernel already
+# counts them inside user and nice.
+PROC_STAT_FIELDS = ("user", "nice", "system", "idle", "iowait", "irq", "softirq", "steal")
+
+
+def cpu_column_names(cpus, sysfs_root="/sys/devices/system/cpu"):
+    """
+    Function to name every logical CPU the way the parsers name hardware threads, from the kernel's topology.
+
+    Parameters:
+    cpus (list): Logical CPU numbers
+    sysfs_root (str): Root of the per-CPU sysfs tree
+
+    Returns:
+    list: 'CPU_{socket}_Core_{core}_Thread_{thread}' per logical CPU, with sockets numbered from 1 and cores and
+    threads numbered by their position within the socket and core
+    """
+    ids = []
+    for cpu in cpus:
+        topology = os.path.join(sysfs_root, f"cpu{cpu}", "topology")
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as f:
+                package = int(f.read())
+            with open(os.path.join(topology, "core_id")) as f:
+                core = int(f.read())
+        except (OSError, ValueError):
+            # No topology exported (e.g. some containers): treat every logical CPU as its own core
+            package, core = 0, cpu
+        ids.append((package, core, cpu))
+
+    packages = sorted({package for package, _, _ in ids})
+    cores = {(package, core) for package, core, _ in ids}
+    core_rank = {key: sorted(c for p, c in cores if p == key[0]).index(key[1]) for key in cores}
+    thread_rank = {cpu: sorted(c for p, k, c in ids if (p, k) == (package, core)).index(cpu)
+                   for package, core, cpu in ids}
+
+    return [f"CPU_{packages.index(package) + 1}_Core_{core_rank[(package, core)]}_Thread_{thread_rank[cpu]}"
+            for package, core, cpu in ids]
+
+
+class ProcStatReader:
+    """
+    Reader of the per-CPU counters in /proc/stat that keeps the file open and re-reads it with pread.
+    """
+
+    def __init__(self, path="/proc/stat"):
+        self.fd = os.open(path, os.O_RDONLY)
+
+        # Read only as far as the per-CPU lines; the interrupt lines after them can be far longer
+        text = self._read(1 << 20)
+        cpu_section = text[:text.index("\nintr")] if "\nintr" in text else text
+        self.read_size = len(cpu_section.encode()) * 2 + 4096
+        self.cpus = [int(line.split()[0][3:]) for line in cpu_section.splitlines() if line[3:4].isdigit()]
+
+    def _read(self, size):
+        return os.pread(self.fd, size, 0).decode()
+
+    def read(self):
+        """
+        Function to read the current counters.
+
+        Returns:
+        np.ndarray: int64 array of shape (cpus, len(PROC_STAT_FIELDS)) in clock ticks
+        """
+        lines = [line for line in self._read(self.read_size).splitlines()
+                 if line[:3] == "cpu" and line[3:4].isdigit()]
+        return np.array([line.split()[1:len(PROC_STAT_FIELDS) + 1] for line in lines], dtype=np.int64)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProcStatSampler:
+    """
+    Sampler turning successive /proc/stat readings into per-CPU percentages of time spent in each state.
+    """
+
+    def __init__(self, path="/proc/stat"):
+        self.reader = ProcStatReader(path)
+        self.previous = None
+
+    @property
+    def cpus(self):
+        return self.reader.cpus
+
+    def sample(self):
+        """
+        Function to read the counters and return how each CPU's time was split since the previous call.
+
+        Returns:
+        np.ndarray: float64 array of shape (cpus, len(PROC_STAT_FIELDS)) of percentages summing to 100 per CPU,
+        NaN for a CPU whose counters did not advance, or None on the first call, which only records the starting
+        counters
+        """
+        current = self.reader.read()
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return None
+        delta = current - previous
+
+        total = delta.sum(axis=1, keepdims=True)
+        return np.divide(delta * 100.0, total, out=np.full(delta.shape, np.nan), where=total > 0)
+
+    def close(self):
+        self.reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample per-CPU utilization from /proc/stat as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    args = parser.parse_args()
+
+    stop_on_sigterm()
+    sampler = ProcStatSampler()
+    output = open_output(args.output)
+
+    # One header describing the columns, then one record per tick
+    write_record(output, collector_header("proc_stat", args.interval, fields=list(PROC_STAT_FIELDS),
+                                          columns=cpu_column_names(sampler.cpus)))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            percentages = sampler.sample()
+            if percentages is None:
+                continue
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6),
+                          "values": np.round(percentages, 2).tolist()})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import os
+import sys
+import time
+
+from sampling import (BackgroundWriter, TickStats, collector_header, open_output, periodic_ticks, stop_on_sigterm,
+                      write_record)
+
+# Totals over the benchmark's process tree, in record order
+PROCESS_COLUMNS = ("proc_cpu", "proc_rss_MB", "proc_read_MBps", "proc_write_MBps", "proc_count", "proc_threads")
+
+# Fields of /proc/<pid>/stat, numbered from the state that follows the command name (field 3 in proc(5))
+PPID, UTIME, STIME, NUM_THREADS, STARTTIME, RSS = 1, 11, 12, 17, 19, 21
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_BYTES = os.sysconf("SC_PAGE_SIZE")
+
+
+def _stat_fields(text):
+    """
+    Function to split a /proc/<pid>/stat line after the command name, which may itself hold spaces and parentheses.
+    """
+    return text[text.rindex(")") + 2:].split()
+
+
+class TrackedProcess:
+    """
+    One process of the tree, with its stat and io files kept open for pread.
+    """
+
+    def __init__(self, proc_dir, stat_fd, starttime, previous=None):
+        self.stat_fd = stat_fd
+        self.starttime = starttime
+        try:
+            self.io_fd = os.open(os.path.join(proc_dir, "io"), os.O_RDONLY)
+        except OSError:
+            # /proc/<pid>/io is only readable for our own processes (or as root)
+            self.io_fd = None
+        self.previous = previous
+
+    def read(self):
+        """
+        Function to read the process's counters.
+
+        Returns:
+        Tuple: (CPU clock ticks, RSS bytes, threads, bytes read, bytes written); the I/O counters are None when
+        unreadable. Raises OSError once the process has exited
+        """
+        fields = _stat_fields(os.pread(self.stat_fd, 4096, 0).decode())
+        if not fields or int(fields[STARTTIME]) != self.starttime:
+            raise ProcessLookupError("process exited")
+        read_bytes = write_bytes = None
+        if self.io_fd is not None:
+            try:
+                io = dict(line.split(": ") for line in os.pread(self.io_fd, 4096, 0).decode().splitlines())
+                read_bytes, write_bytes = int(io["read_bytes"]), int(io["write_bytes"])
+            except (OSError, KeyError, ValueError):
+                read_bytes = write_bytes = None
+        return (int(fields[UTIME]) + int(fields[STIME]), int(fields[RSS]) * PAGE_BYTES, int(fields[NUM_THREADS]),
+                read_bytes, write_bytes)
+
+    def close(self):
+        os.close(self.stat_fd)
+        if self.io_fd is not None:
+            os.close(self.io_fd)
+
+
+class ProcessTreeSampler:
+    """
+    Sampler of the CPU time, memory and I/O of one process and all of its descendants.
+
+    Each tick lists /proc once and reads the stat line of PIDs it has not seen before to learn their parent, so the
+    cost grows with the number of new processes rather than with every process on the host. Processes already in
+    the tree are re-read through open files with pread. A process is identified by its PID and start time, so a
+    reused PID is never mistaken for an earlier process.
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self.root = None
+        self.members = {}
+        self.outsiders = set()
+        self.previous_time = None
+        self.previous_boot_time = None
+
+    def track(self, pid):
+        """
+        Function to start following the tree rooted at 'pid', dropping the previous tree.
+        """
+        self.close()
+        self.root = pid
+        self.outsiders = set()
+        self._adopt(pid, None)
+
+    def _adopt(self, pid, fields):
+        """
+        Function to open the files of a new member of the tree; False when it has already exited.
+        """
+        proc_dir = os.path.join(self.proc_root, str(pid))
+        try:
+            stat_fd = os.open(os.path.join(proc_dir, "stat"), os.O_RDONLY)
+            fields = fields or _stat_fields(os.pread(stat_fd, 4096, 0).decode())
+        except OSError:
+            return False
+        # A process born since the last tick counts from zero; one that was already running only from now on
+        starttime = int(fields[STARTTIME])
+        born_since = self.previous_boot_time is not None and starttime / CLOCK_TICKS >= self.previous_boot_time
+        self.members[pid] = TrackedProcess(proc_dir, stat_fd, starttime, (0, 0, 0, 0, 0) if born_since else None)
+        return True
+
+    def _discover(self):
+        """
+        Function to add processes started since the last tick whose parent is in the tree.
+        """
+        pids = [int(entry.name) for entry in os.scandir(self.proc_root) if entry.name.isdigit()]
+        candidates = {}
+        for pid in pids:
+            if pid in self.members or pid in self.outsiders:
+                continue
+            try:
+                with open(os.path.join(self.proc_root, str(pid), "stat"), "rb") as f:
+                    candidates[pid] = _stat_fields(f.read().decode())
+            except OSError:
+                continue
+
+        # Adopt parents before children so a whole new subtree joins in one tick
+        added = True
+        while added:
+            added = False
+            for pid, fields in list(candidates.items()):
+                if int(fields[PPID]) in self.members:
+                    del candidates[pid]
+                    added |= self._adopt(pid, fields)
+        self.outsiders.update(candidates)
+
+        # Forget outsiders that have exited so their PIDs are looked at again when reused
+        if len(self.outsiders) > 2 * len(pids):
+            self.outsiders &= set(pids)
+
+    def sample(self):
+        """
+        Function to read the tree and return its activity since the previous call.
+
+        Returns:
+        list: One value per PROCESS_COLUMNS: CPU use in percent of one CPU, resident memory in MB, read and write
+        rates in MB/s, and the number of processes and threads; None on the first call, which only records the
+        starting counters
+        """
+        now = time.monotonic()
+        elapsed = now - self.previous_time if self.previous_time is not None else None
+        self.previous_time = now
+        if self.root is None:
+            self.previous_boot_time = time.clock_gettime(time.CLOCK_BOOTTIME)
+            return [0.0, 0.0, 0.0, 0.0, 0, 0] if elapsed else None
+
+        self._discover()
+        self.previous_boot_time = time.clock_gettime(time.CLOCK_BOOTTIME)
+        cpu_ticks = rss = threads = 0
+        read_bytes = write_bytes = 0
+        for pid, process in list(self.members.items()):
+            try:
+                current = process.read()
+            except OSError:
+                process.close()
+                del self.members[pid]
+                continue
+
+            previous, process.previous = process.previous, current
+            rss += current[1]
+            threads += current[2]
+            if previous is None:
+                continue
+            cpu_ticks += current[0] - previous[0]
+            if current[3] is not None and previous[3] is not None:
+                read_bytes += current[3] - previous[3]
+                write_bytes += current[4] - previous[4]
+
+        if not elapsed:
+            return None
+        return [round(cpu_ticks / CLOCK_TICKS / elapsed * 100, 2), round(rss / 1e6, 3),
+                round(read_bytes / 1e6 / elapsed, 3), round(write_bytes / 1e6 / elapsed, 3), len(self.members),
+                threads]
+
+    def close(self):
+        for process in self.members.values():
+            process.close()
+        self.members = {}
+
+
+class PidFileWatcher:
+    """
+    Follower of the PID file energy_meter.py rewrites for every benchmark run, re-rooting the sampler on each new PID.
+    """
+
+    def __init__(self, path, sampler):
+        self.path = path
+        self.sampler = sampler
+        self.pid = None
+
+    def check(self):
+        try:
+            with open(self.path) as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return
+        if pid and pid != self.pid:
+            self.pid = pid
+            self.sampler.track(pid)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample the CPU, memory and I/O of a process tree as JSON lines.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--pid", type=int, help="root process of the tree to follow")
+    target.add_argument("--pid-file", help="file holding the root PID, re-read every tick")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    args = parser.parse_args()
+
+    stop_on_sigterm()
+    sampler = ProcessTreeSampler()
+    watcher = PidFileWatcher(args.pid_file, sampler) if args.pid_file else None
+    if args.pid is not None:
+        sampler.track(args.pid)
+    output = open_output(args.output)
+
+    # One header naming the columns, then one record per tick
+    write_record(output, collector_header("process", args.interval, columns=list(PROCESS_COLUMNS)))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            if watcher is not None:
+                watcher.check()
+            values = sampler.sample()
+            if values is None:
+                continue
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6), "values": values})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
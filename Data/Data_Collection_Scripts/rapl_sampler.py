@@ -0,0 +1,177 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from sampling import (BackgroundWriter, SysfsFiles, TickStats, collector_header, open_output, periodic_ticks,
+                      stop_on_sigterm, write_record)
+
+
+def _read_text(path):
+    """
+    Function to read a small sysfs attribute as stripped text.
+    """
+    with open(path) as f:
+        return f.read().strip()
+
+
+def discover_rapl_zones(sysfs_root="/sys"):
+    """
+    Function to find the RAPL energy counters the powercap framework exports, skipping those that cannot be read.
+
+    Zones are named from their powercap names: 'package_0' for a socket and 'package_0_dram' or 'package_0_core'
+    for its subzones; platform zones keep their own name (e.g. 'psys'). Since Linux 5.10 energy_uj is readable
+    by root only, so unprivileged runs find no zones.
+
+    Parameters:
+    sysfs_root (str): Root of the sysfs tree; point at a copy to test without the hardware
+
+    Returns:
+    list: (zone name, energy_uj path, counter range in microjoules) per readable zone, packages first
+    """
+    zone_dirs = glob.glob(os.path.join(sysfs_root, "class", "powercap", "intel-rapl:*"))
+    names = {}
+    for zone_dir in zone_dirs:
+        try:
+            names[os.path.basename(zone_dir)] = re.sub(r"\W", "_", _read_text(os.path.join(zone_dir, "name")))
+        except OSError:
+            continue
+
+    # Order zones numerically, each package followed by its subzones
+    zone_dirs.sort(key=lambda zone: [int(part) for part in re.findall(r"\d+", os.path.basename(zone))])
+
+    zones = []
+    for zone_dir in zone_dirs:
+        zone_id = os.path.basename(zone_dir)
+        parent_id = zone_id.rsplit(":", 1)[0]
+        if zone_id not in names:
+            continue
+        name = f"{names[parent_id]}_{names[zone_id]}" if parent_id in names else names[zone_id]
+        energy = os.path.join(zone_dir, "energy_uj")
+        try:
+            _read_text(energy)
+            counter_range = int(_read_text(os.path.join(zone_dir, "max_energy_range_uj")))
+        except (OSError, ValueError):
+            continue
+        zones.append((name, energy, counter_range))
+    return zones
+
+
+class RaplCounters:
+    """
+    Energy counters of every readable RAPL zone, unwrapped into joules consumed since the counters were opened.
+
+    The hardware counters count from 0 up to max_energy_range_uj inclusive and then wrap (roughly every 10 to 60
+    minutes under load), so read() must be called more often than that; each call adds the wrapped difference since
+    the previous one.
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        zones = discover_rapl_zones(sysfs_root)
+        if not zones:
+            raise OSError(f"No readable RAPL energy counters under {sysfs_root}/class/powercap")
+        self.names = [name for name, _, _ in zones]
+        # A counter holds max_energy_range_uj + 1 values, so a wrap loses that much
+        self.ranges = [counter_range + 1 for _, _, counter_range in zones]
+        self.files = SysfsFiles(path for _, path, _ in zones)
+        self.previous = self.files.read()
+        self.joules = [0.0] * len(zones)
+
+    def read(self):
+        """
+        Function to read the counters and return the energy each zone has used since they were opened.
+
+        Returns:
+        list: Joules per zone, in the order of 'names'
+        """
+        current = self.files.read()
+        for position, (now, before, counter_range) in enumerate(zip(current, self.previous, self.ranges)):
+            if now != now or before != before:
+                # A failed read (NaN) contributes nothing and the next good read starts a new baseline
+                continue
+            delta = now - before
+            if delta < 0:
+                delta += counter_range
+            self.joules[position] += delta / 1e6
+        self.previous = [now if now == now else before for now, before in zip(current, self.previous)]
+        return list(self.joules)
+
+    def close(self):
+        self.files.close()
+
+
+class RaplSampler:
+    """
+    Sampler turning successive RAPL counter readings into the average power of every zone since the previous call.
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.counters = RaplCounters(sysfs_root)
+        self.previous = None
+
+    @property
+    def names(self):
+        return self.counters.names
+
+    def sample(self):
+        """
+        Function to read the counters and return each zone's power since the previous call.
+
+        Returns:
+        list: Watts per zone, in the order of 'names'; None on the first call, which only records the starting
+        counters
+        """
+        now, joules = time.monotonic(), self.counters.read()
+        previous, self.previous = self.previous, (now, joules)
+        if previous is None or now <= previous[0]:
+            return None
+        return [round((after - before) / (now - previous[0]), 3) for after, before in zip(joules, previous[1])]
+
+    def close(self):
+        self.counters.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample RAPL package and DRAM power as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    args = parser.parse_args()
+
+    try:
+        sampler = RaplSampler(args.sysfs_root)
+    except OSError as error:
+        sys.exit(str(error))
+
+    stop_on_sigterm()
+    output = open_output(args.output)
+
+    # One header naming the zones, then one record of watts per tick
+    write_record(output, collector_header("rapl", args.interval, units="watts", columns=sampler.names))
+
+    writer = BackgroundWriter(output, args.interval, args.flush_interval)
+    stats = TickStats()
+    try:
+        for scheduled, wall_time in periodic_ticks(args.interval, args.duration, stats):
+            started = time.monotonic()
+            watts = sampler.sample()
+            if watts is None:
+                continue
+            writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6), "values": watts})
+            stats.record(time.monotonic() - started, started - scheduled)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        writer.close()
+        print(stats.summary(), file=sys.stderr)
+        print(writer.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
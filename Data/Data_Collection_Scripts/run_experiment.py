@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from cooldown import TemperatureFollower, baseline_temperatures, reading_span, wait_for_cooldown
+from energy_meter import measure
+from sampling import stop_on_sigterm
+from telemetry_collector import SOURCE_NAMES
+
+# Folder every experiment is written into, one sub-folder per experiment
+DIAGNOSTIC_ROOT = "diagnostic_data"
+
+# Seconds to wait for the collector to write its header, and to flush and exit once told to stop
+COLLECTOR_START_TIMEOUT = 30
+COLLECTOR_STOP_TIMEOUT = 30
+
+# Seconds of idle temperatures averaged into the cooldown baseline at least, however short --baseline is, so one
+# noisy reading does not set it
+BASELINE_WINDOW = 5
+
+# Longest extra wait for those readings when the collector records temperatures late or not at all
+BASELINE_TIMEOUT = 5
+
+
+class EventLog:
+    """
+    Append-only log of phase changes (events.jsonl), stamped with the monotonic clock the collectors use for
+    their records and with the wall-clock time.
+
+    Each line starts a phase that lasts until the next line: 'idle' before the first run, 'warmup' and 'steady'
+    while a benchmark runs, 'cooldown' after it and 'end' when collection stops.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+
+    def mark(self, phase, benchmark=None, iteration=None, monotonic=None, wall_time=None):
+        """
+        Function to record the start of a phase, now unless another (monotonic, wall_time) moment is given.
+        """
+        if monotonic is None:
+            monotonic, wall_time = time.monotonic(), time.time()
+        self.file.write(json.dumps({"time": round(wall_time, 6), "monotonic": round(monotonic, 6), "phase": phase,
+                                    "benchmark": benchmark, "iteration": iteration}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def benchmark_command(benchmark):
+    """
+    Function to build the command running a benchmark: Python scripts with this interpreter, anything else as an
+    executable.
+    """
+    if benchmark.endswith(".py"):
+        return [sys.executable, benchmark]
+    return [os.path.abspath(benchmark)]
+
+
+def start_collector(directory, interval, sources, pid_file, sysfs_root="/sys"):
+    """
+    Function to start telemetry_collector.py writing into an experiment folder and wait until it is sampling.
+
+    Returns:
+    Tuple[subprocess.Popen, file]: The collector and its open log of stderr (summaries and skipped sources)
+    """
+    log = open(os.path.join(directory, "collector.log"), "a")
+    output = os.path.join(directory, "telemetry.jsonl")
+    collector = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "telemetry_collector.py"),
+                                  "--interval", str(interval), "--output", output, "--pid-file", pid_file,
+                                  "--sysfs-root", sysfs_root, "--sources", *sources], stderr=log)
+
+    # The header is written once every source has started; runs begin only after that
+    deadline = time.monotonic() + COLLECTOR_START_TIMEOUT
+    while not (os.path.exists(output) and os.path.getsize(output) > 0):
+        if collector.poll() is not None or time.monotonic() > deadline:
+            stop_collector(collector, log)
+            sys.exit(f"telemetry_collector.py did not start, see {log.name}")
+        time.sleep(0.05)
+    return collector, log
+
+
+def stop_collector(collector, log):
+    """
+    Function to stop the collector with SIGTERM so it flushes its buffered records, killing it only if it hangs.
+    """
+    if collector.poll() is None:
+        collector.send_signal(signal.SIGTERM)
+        try:
+            collector.wait(timeout=COLLECTOR_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            collector.kill()
+            collector.wait()
+    log.close()
+
+
+def run_experiment(folder_name, benchmark, iterations=1, cooldown=0.0, warmup=30.0, baseline=0.0, interval=1.0,
+                   sources=SOURCE_NAMES, tolerance=2.0, settle=10.0, adaptive=True, sysfs_root="/sys"):
+    """
+    Function to collect telemetry while a benchmark runs one or more times, recording every phase change.
+
+    With 'adaptive' cooldowns the next run starts as soon as the CPU and GPU temperatures the collector records are
+    back within 'tolerance' of those recorded before the first run (see wait_for_cooldown), and 'cooldown' only
+    caps the wait. The last run is always followed by the full cooldown, so its cooling curve is recorded whole.
+
+    Parameters:
+    folder_name (str): Experiment name; files are written to diagnostic_data/<folder_name>/
+    benchmark (str): Benchmark script or executable
+    iterations (int): Number of runs
+    cooldown (float): Seconds to keep collecting after each run; the longest wait with adaptive cooldowns
+    warmup (float): Seconds at the start of each run labelled 'warmup' rather than 'steady'
+    baseline (float): Seconds of idle collection before the first run
+    interval (float): Seconds between collector ticks
+    sources (list): Collector sources to poll
+    tolerance (float): Degrees Celsius above the baseline that count as cooled down
+    settle (float): Seconds the temperatures must stay within the tolerance
+    adaptive (bool): Whether to end cooldowns early once temperatures are back to the baseline
+    sysfs_root (str): Root of the sysfs tree the collector and the energy meter read
+
+    Returns:
+    list: The energy_meter summary of every run
+    """
+    directory = os.path.join(DIAGNOSTIC_ROOT, folder_name)
+    os.makedirs(directory, exist_ok=True)
+    pid_file = os.path.join(directory, "benchmark.pid")
+    name = os.path.splitext(os.path.basename(benchmark))[0]
+
+    collector, log = start_collector(directory, interval, sources, pid_file, sysfs_root)
+    follower = TemperatureFollower(os.path.join(directory, "telemetry.jsonl"))
+    events = EventLog(os.path.join(directory, "events.jsonl"))
+    runs = []
+    try:
+        events.mark("idle")
+        time.sleep(baseline)
+        idle = follower.read()
+        deadline = time.monotonic() + BASELINE_WINDOW + BASELINE_TIMEOUT
+        while adaptive and reading_span(idle) < BASELINE_WINDOW and time.monotonic() < deadline:
+            time.sleep(interval)
+            idle += follower.read()
+        reference = baseline_temperatures(idle)
+
+        for iteration in range(iterations):
+            events.mark("warmup", name, iteration)
+
+            # Mark the steady phase when it starts, so followers of events.jsonl never see a phase change appear in
+            # the past; runs shorter than the warm-up have none
+            steady = threading.Timer(warmup, events.mark, ("steady", name, iteration))
+            steady.start()
+            try:
+                summary = measure(benchmark_command(benchmark), sysfs_root, poll_interval=1.0, pid_file=pid_file)
+            finally:
+                steady.cancel()
+                steady.join()
+            summary = {"label": f"Iteration {iteration}", **summary}
+            runs.append(summary)
+            with open(os.path.join(directory, "energy.jsonl"), "a") as f:
+                f.write(json.dumps(summary) + "\n")
+
+            events.mark("cooldown", name, iteration)
+            print(f"Iteration {iteration}: {summary['seconds']:.1f} s, exit code {summary['returncode']}",
+                  file=sys.stderr)
+
+            follower.read()
+            if adaptive and iteration < iterations - 1:
+                waited, cooled = wait_for_cooldown(follower, reference, tolerance, settle, cooldown)
+                print(f"Cooldown: {waited:.0f} s, " + ("back to baseline" if cooled else "stopped at the limit"),
+                      file=sys.stderr)
+            else:
+                time.sleep(cooldown)
+    finally:
+        events.mark("end")
+        events.close()
+        follower.close()
+        stop_collector(collector, log)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a benchmark under the telemetry collector, labelling phases.")
+    parser.add_argument("folder_name", help="experiment name, written to diagnostic_data/<folder_name>/")
+    parser.add_argument("benchmark", help="benchmark script or executable")
+    parser.add_argument("--iterations", type=int, default=1, help="number of runs")
+    parser.add_argument("--cooldown", type=float, default=0.0,
+                        help="minutes to keep collecting after each run; the longest wait unless --fixed-cooldown")
+    parser.add_argument("--fixed-cooldown", action="store_true", help="always wait the full --cooldown")
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="degrees above the idle baseline that end a cooldown")
+    parser.add_argument("--settle", type=float, default=10.0,
+                        help="seconds temperatures must stay within the tolerance")
+    parser.add_argument("--warmup", type=float, default=30.0, help="seconds at the start of each run labelled warmup")
+    parser.add_argument("--baseline", type=float, default=0.0, help="seconds of idle collection before the first run")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between collector ticks")
+    parser.add_argument("--sources", nargs="+", default=SOURCE_NAMES, choices=SOURCE_NAMES,
+                        help="metric sources to poll")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    args = parser.parse_args()
+
+    stop_on_sigterm()
+    try:
+        run_experiment(args.folder_name, args.benchmark, args.iterations, args.cooldown * 60, args.warmup,
+                       args.baseline, args.interval, args.sources, args.tolerance, args.settle,
+                       not args.fixed_cooldown, args.sysfs_root)
+    except KeyboardInterrupt:
+        sys.exit("Stopped; the collector was shut down and the phases so far are in events.jsonl")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+import asyncio
+import json
+import lzma
+import os
+import signal
+import sys
+import threading
+import time
+import zlib
+
+
+class TickStats:
+    """
+    Running cost and timing figures of a sampling loop, reported when the collector stops.
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.missed = 0
+        self.busy = 0.0
+        self.worst = 0.0
+        self.worst_lateness = 0.0
+        self.started = time.monotonic()
+
+    def record(self, cost, lateness):
+        """
+        Function to account for one sample.
+
+        Parameters:
+        cost (float): Seconds spent taking and writing the sample
+        lateness (float): Seconds the sample started after its scheduled tick
+        """
+        self.samples += 1
+        self.busy += cost
+        self.worst = max(self.worst, cost)
+        self.worst_lateness = max(self.worst_lateness, lateness)
+
+    def summary(self):
+        """
+        Function to describe the achieved rate and the per-sample cost in one line.
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        mean_cost = self.busy / self.samples if self.samples else 0.0
+        return (f"{self.samples} samples in {elapsed:.1f} s ({self.samples / elapsed:.2f} Hz), {self.missed} ticks missed, "
+                f"cost per sample {mean_cost * 1e6:.0f} us mean / {self.worst * 1e6:.0f} us max "
+                f"({self.busy / elapsed * 100:.3f}% of one CPU), worst lateness {self.worst_lateness * 1e3:.1f} ms")
+
+
+def _next_tick(start, tick, interval, stats):
+    """
+    Function to return the next tick that is still in the future, counting the ones skipped in stats.missed.
+    """
+    behind = int((time.monotonic() - start) / interval) + 1
+    if stats is not None:
+        stats.missed += max(behind - tick - 1, 0)
+    return max(tick + 1, behind)
+
+
+def periodic_ticks(interval, duration=None, stats=None):
+    """
+    Generator yielding on a fixed monotonic schedule, so sampling never drifts by the time a sample takes.
+
+    Ticks are scheduled at start + n * interval. When a sample overruns, the ticks it overlapped are skipped
+    (and counted in stats.missed) instead of being fired back to back.
+
+    Parameters:
+    interval (float): Seconds between ticks
+    duration (float): Stop after this many seconds; run until interrupted when omitted
+    stats (TickStats): Receives the count of skipped ticks
+
+    Yields:
+    Tuple[float, float]: Monotonic time the tick was scheduled for, and the wall-clock time it fired at (epoch s)
+    """
+    if interval <= 0:
+        raise ValueError(f"interval must be positive, got {interval}")
+
+    start = time.monotonic()
+    tick = 0
+    while duration is None or tick * interval < duration:
+        scheduled = start + tick * interval
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        yield scheduled, time.time()
+        tick = _next_tick(start, tick, interval, stats)
+
+
+async def async_periodic_ticks(interval, duration=None, stats=None):
+    """
+    Asynchronous version of periodic_ticks, for collectors that wait on several sources at once with asyncio.
+    """
+    if interval <= 0:
+        raise ValueError(f"interval must be positive, got {interval}")
+
+    start = time.monotonic()
+    tick = 0
+    while duration is None or tick * interval < duration:
+        scheduled = start + tick * interval
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield scheduled, time.time()
+        tick = _next_tick(start, tick, interval, stats)
+
+
+class SysfsFiles:
+    """
+    Set of small numeric sysfs or procfs files that are opened once and re-read with pread on every sample, so a
+    reading costs one system call per file instead of a process or an open().
+    """
+
+    def __init__(self, paths, read_size=64):
+        self.paths = list(paths)
+        self.read_size = read_size
+        self.fds = [os.open(path, os.O_RDONLY) for path in self.paths]
+
+    def read(self):
+        """
+        Function to read every file as a number.
+
+        Returns:
+        list: One float per file in the order given, NaN where the read failed (e.g. a sensor reporting EIO)
+        """
+        values = []
+        for fd in self.fds:
+            try:
+                values.append(float(os.pread(fd, self.read_size, 0)))
+            except (OSError, ValueError):
+                values.append(float("nan"))
+        return values
+
+    def close(self):
+        for fd in self.fds:
+            os.close(fd)
+
+
+def collector_header(source, interval, **fields):
+    """
+    Function to build the header record that opens the output of a collector.
+
+    The local timezone is recorded so timestamps from collectors without one (nvidia-smi) can be localized.
+
+    Parameters:
+    source (str): Name of the collector
+    interval (float): Seconds between samples
+    **fields: Description of the values in each record, e.g. 'columns'
+
+    Returns:
+    dict: The header record
+    """
+    local = time.localtime()
+    return {"source": source, "interval": interval, "zone": local.tm_zone, "utc_offset": local.tm_gmtoff // 60,
+            **fields}
+
+
+def write_record(stream, record):
+    """
+    Function to write one record as a line of compact JSON and flush it, so a killed collector loses at most one line.
+    """
+    stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+    stream.flush()
+
+
+class RingBuffer:
+    """
+    Preallocated ring of records handed from a sampling loop to a BackgroundWriter.
+
+    put() never blocks and never allocates beyond the record itself: when the writer falls a whole ring behind, the
+    newest record is dropped and counted instead of the sampler waiting on the disk.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.slots = [None] * capacity
+        self.start = 0
+        self.count = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.condition = threading.Condition()
+
+    def put(self, record):
+        """
+        Function to append one record, returning False when the ring is full and the record was dropped.
+        """
+        with self.condition:
+            if self.count == len(self.slots):
+                self.dropped += 1
+                return False
+            self.slots[(self.start + self.count) % len(self.slots)] = record
+            self.count += 1
+            self.high_water = max(self.high_water, self.count)
+            self.condition.notify()
+            return True
+
+    def drain(self):
+        """
+        Function to take every buffered record, oldest first, freeing their slots.
+        """
+        with self.condition:
+            end = self.start + self.count
+            records = self.slots[self.start:min(end, len(self.slots))] + self.slots[:max(end - len(self.slots), 0)]
+            for position in range(self.start, end):
+                self.slots[position % len(self.slots)] = None
+            self.start = end % len(self.slots)
+            self.count = 0
+            return records
+
+
+class BackgroundWriter:
+    """
+    Writer of a collector's records that buffers them in a RingBuffer and writes them from a separate thread in
+    batches, one write() and flush per batch, so sampling at 10-100 Hz never waits on the disk.
+
+    A batch is written when 'batch_size' records are waiting or 'flush_interval' seconds have passed, whichever is
+    first; a collector killed without warning loses at most that much data. The ring holds ten flush intervals of
+    samples.
+    """
+
+    def __init__(self, stream, interval, flush_interval=1.0, batch_size=1024):
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.ring = RingBuffer(max(int(10 * flush_interval / interval), 4 * batch_size))
+        self.batches = 0
+        self.records = 0
+        self.write_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.stopping = False
+        self.thread = threading.Thread(target=self._run, name="record-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        self.ring.put(record)
+
+    def _run(self):
+        started = time.thread_time()
+        while True:
+            with self.ring.condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not self.stopping and self.ring.count < self.batch_size and time.monotonic() < deadline:
+                    self.ring.condition.wait(max(deadline - time.monotonic(), 0))
+                stopping = self.stopping
+            self._write_batch(self.ring.drain())
+            self.cpu_seconds = time.thread_time() - started
+            if stopping:
+                break
+
+    def _write_batch(self, records):
+        if not records:
+            return
+        began = time.monotonic()
+        self.stream.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+        self.stream.flush()
+        self.write_seconds += time.monotonic() - began
+        self.batches += 1
+        self.records += len(records)
+
+    def close(self):
+        """
+        Function to write everything still buffered and stop the writer thread, ending a compressed output.
+        """
+        with self.ring.condition:
+            self.stopping = True
+            self.ring.condition.notify()
+        self.thread.join()
+        if isinstance(self.stream, CompressedOutput):
+            self.stream.close()
+
+    def summary(self):
+        """
+        Function to describe the batches written and the writer's own cost in one line.
+        """
+        per_record = self.cpu_seconds / self.records if self.records else 0.0
+        return (f"{self.records} records in {self.batches} batches, writer CPU {per_record * 1e6:.0f} us per record, "
+                f"{self.write_seconds * 1e3:.0f} ms in write(), ring peak {self.ring.high_water}/"
+                f"{len(self.ring.slots)}, {self.ring.dropped} dropped")
+
+
+def stop_on_sigterm():
+    """
+    Function to turn SIGTERM (sent by `kill` when an experiment ends) into KeyboardInterrupt so collectors shut down
+    cleanly and print their statistics.
+    """
+    def handler(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, handler)
+
+
+def _zstandard():
+    """
+    Function to import zstandard, which .zst outputs need, returning None when it is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+class CompressedOutput:
+    """
+    Text output compressed as a stream while it is written, chosen by the suffix of its path (COMPRESSED_SUFFIXES).
+
+    Every flush() writes out a complete block that can be decompressed on its own, so a collector killed without
+    warning loses at most the records since its last flush, like an uncompressed output. gzip and zstd keep one
+    member open across flushes; xz has no such flush, so each flush ends an xz stream and the next write starts
+    another. Reopening a file appends a new member; the preprocessing scripts read them all in turn.
+    """
+
+    def __init__(self, path, compression, level=None):
+        self.compression = compression
+        self.level = level
+        if compression == "zstd" and _zstandard() is None:
+            raise ImportError(f"Writing {path} needs zstandard")
+        self.file = open(path, "ab")
+        self.compressor = self._new_compressor()
+
+    def _new_compressor(self):
+        if self.compression == "gzip":
+            return zlib.compressobj(6 if self.level is None else self.level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        if self.compression == "xz":
+            return lzma.LZMACompressor(preset=6 if self.level is None else self.level)
+        return _zstandard().ZstdCompressor(level=3 if self.level is None else self.level).compressobj()
+
+    def write(self, text):
+        self.file.write(self.compressor.compress(text.encode()))
+
+    def flush(self):
+        if self.compression == "gzip":
+            self.file.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        elif self.compression == "zstd":
+            self.file.write(self.compressor.flush(_zstandard().COMPRESSOBJ_FLUSH_BLOCK))
+        else:
+            self.file.write(self.compressor.flush())
+            self.compressor = self._new_compressor()
+        self.file.flush()
+
+    def close(self):
+        """
+        Function to end the compressed stream and close the file.
+        """
+        if self.file.closed:
+            return
+        self.file.write(self.compressor.flush())
+        self.file.close()
+
+
+# Output suffixes that are written compressed, and the format each stands for
+COMPRESSED_SUFFIXES = {".gz": "gzip", ".xz": "xz", ".zst": "zstd"}
+
+
+def open_output(path, level=None):
+    """
+    Function to open the output of a collector: a file path, or standard output for '-' or None.
+
+    Paths ending in one of COMPRESSED_SUFFIXES are compressed as they are written (see CompressedOutput), at the
+    format's default level unless 'level' is given.
+    """
+    if path in (None, "-"):
+        return sys.stdout
+    compression = COMPRESSED_SUFFIXES.get(os.path.splitext(path)[1])
+    if compression is not None:
+        return CompressedOutput(path, compression, level)
+    return open(path, "a", buffering=1 << 16)
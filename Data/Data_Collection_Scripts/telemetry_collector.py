@@ -0,0 +1,399 @@
+import argparse
+import asyncio
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from cpufreq_sampler import CPUFREQ_FIELDS, CpuFreqSampler
+from diskstats_sampler import DISK_FIELDS, DiskStatsSampler
+from hwmon_sampler import discover_temperature_files
+from process_sampler import PROCESS_COLUMNS, PidFileWatcher, ProcessTreeSampler
+from proc_stat_sampler import PROC_STAT_FIELDS, ProcStatSampler, cpu_column_names
+from rapl_sampler import RaplSampler
+from sampling import (BackgroundWriter, SysfsFiles, TickStats, async_periodic_ticks, collector_header, open_output,
+                      stop_on_sigterm, write_record)
+
+# Share of the interval a source may take before its reading is left out of the tick's record
+SOURCE_BUDGET = 0.8
+
+# Sources polled unless --sources narrows them
+SOURCE_NAMES = ["proc_stat", "cpufreq", "hwmon", "diskstats", "process", "rapl", "nvidia_smi"]
+
+# nvidia-smi query fields in the order of the gpu_status.txt columns parsed by the preprocessing scripts
+NVIDIA_SMI_QUERY = (("fan.speed", "gpu_fan"), ("temperature.gpu", "gpu_temp"), ("power.draw", "gpu_power"),
+                    ("power.limit", "gpu_power_cap"), ("memory.used", "gpu_GRAM"), ("memory.total", "gpu_GRAM_total"),
+                    ("utilization.gpu", "gpu_util"))
+
+
+class Source:
+    """
+    A metric source polled by the telemetry collector.
+
+    Subclasses set 'name', describe their values for the header and return one JSON-serializable reading from
+    read(). Readings that block (file or device reads) belong in read_blocking, which runs in a worker thread so a
+    slow device never holds up the other sources.
+    """
+
+    name = None
+
+    async def start(self):
+        pass
+
+    def describe(self):
+        return {}
+
+    async def read(self):
+        return await asyncio.to_thread(self.read_blocking)
+
+    def read_blocking(self):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class ProcStatSource(Source):
+    """
+    Per-CPU time split from /proc/stat, as recorded by proc_stat_sampler.py.
+    """
+
+    name = "proc_stat"
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sampler = ProcStatSampler()
+        self.sysfs_root = sysfs_root
+
+    async def start(self):
+        # Prime the counters so the first record covers a whole interval
+        self.sampler.sample()
+
+    def describe(self):
+        return {"fields": list(PROC_STAT_FIELDS),
+                "columns": cpu_column_names(self.sampler.cpus, f"{self.sysfs_root}/devices/system/cpu")}
+
+    def read_blocking(self):
+        return np.round(self.sampler.sample(), 2).tolist()
+
+    async def close(self):
+        self.sampler.close()
+
+
+class CpuFreqSource(Source):
+    """
+    Per-CPU frequency and thermal throttling events, as recorded by cpufreq_sampler.py.
+    """
+
+    name = "cpufreq"
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sampler = CpuFreqSampler(sysfs_root)
+
+    async def start(self):
+        self.sampler.sample()
+
+    def describe(self):
+        return {"fields": list(CPUFREQ_FIELDS), "columns": self.sampler.columns()}
+
+    def read_blocking(self):
+        return np.round(self.sampler.sample(), 1).tolist()
+
+    async def close(self):
+        self.sampler.close()
+
+
+class HwmonSource(Source):
+    """
+    hwmon and thermal zone temperatures in degrees Celsius, as recorded by hwmon_sampler.py.
+    """
+
+    name = "hwmon"
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sensors = discover_temperature_files(sysfs_root)
+        if not self.sensors:
+            raise OSError(f"No temperature inputs found under {sysfs_root}")
+        self.files = SysfsFiles(path for _, path in self.sensors)
+
+    def describe(self):
+        return {"units": "celsius", "columns": [column for column, _ in self.sensors]}
+
+    def read_blocking(self):
+        return [round(value / 1000, 3) for value in self.files.read()]
+
+    async def close(self):
+        self.files.close()
+
+
+class DiskStatsSource(Source):
+    """
+    Per-disk throughput, IOPS and utilization from /proc/diskstats, as recorded by diskstats_sampler.py.
+    """
+
+    name = "diskstats"
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sampler = DiskStatsSampler(sysfs_root=sysfs_root)
+        if not self.sampler.devices:
+            self.sampler.close()
+            raise OSError("No disks found in /proc/diskstats")
+
+    async def start(self):
+        self.sampler.sample()
+
+    def describe(self):
+        return {"fields": list(DISK_FIELDS), "columns": self.sampler.devices}
+
+    def read_blocking(self):
+        return np.round(self.sampler.sample(), 3).tolist()
+
+    async def close(self):
+        self.sampler.close()
+
+
+class ProcessSource(Source):
+    """
+    CPU time, memory and I/O of the benchmark's process tree, as recorded by process_sampler.py.
+
+    The root PID is read from the PID file energy_meter.py writes for every run, so each iteration is followed in turn.
+    """
+
+    name = "process"
+
+    def __init__(self, pid_file):
+        if pid_file is None:
+            raise OSError("no --pid-file given")
+        self.sampler = ProcessTreeSampler()
+        self.watcher = PidFileWatcher(pid_file, self.sampler)
+
+    async def start(self):
+        self.sampler.sample()
+
+    def describe(self):
+        return {"columns": list(PROCESS_COLUMNS)}
+
+    def read_blocking(self):
+        self.watcher.check()
+        return self.sampler.sample()
+
+    async def close(self):
+        self.sampler.close()
+
+
+class RaplSource(Source):
+    """
+    CPU package and DRAM power from the RAPL energy counters, as recorded by rapl_sampler.py.
+    """
+
+    name = "rapl"
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sampler = RaplSampler(sysfs_root)
+
+    async def start(self):
+        self.sampler.sample()
+
+    def describe(self):
+        return {"units": "watts", "columns": self.sampler.names}
+
+    def read_blocking(self):
+        return self.sampler.sample()
+
+    async def close(self):
+        self.sampler.close()
+
+
+class NvidiaSmiSource(Source):
+    """
+    GPU status streamed by one long-running `nvidia-smi --query-gpu` process.
+
+    nvidia-smi takes tens of milliseconds per call, so instead of being run every tick it reports on its own loop
+    and each tick takes the latest line per GPU. A GPU without a reading in the last two intervals is reported as
+    NaN, so a hung driver shows up as gaps rather than repeated values.
+    """
+
+    name = "nvidia_smi"
+
+    def __init__(self, interval):
+        if shutil.which("nvidia-smi") is None:
+            raise OSError("nvidia-smi is not installed")
+        listing = subprocess.run(["nvidia-smi", "--query-gpu=index", "--format=csv,noheader"], capture_output=True,
+                                 text=True, timeout=30)
+        self.devices = [int(line) for line in listing.stdout.split() if line.isdigit()]
+        if listing.returncode != 0 or not self.devices:
+            raise OSError("nvidia-smi lists no GPU")
+        self.interval = interval
+        self.latest = {}
+        self.process = None
+        self.reader = None
+
+    async def start(self):
+        query = ",".join(["index"] + [field for field, _ in NVIDIA_SMI_QUERY])
+        self.process = await asyncio.create_subprocess_exec(
+            "nvidia-smi", f"--query-gpu={query}", "--format=csv,noheader,nounits",
+            f"-lms={max(int(self.interval * 1000), 1)}", stdout=asyncio.subprocess.PIPE)
+        self.reader = asyncio.create_task(self._follow())
+
+    async def _follow(self):
+        async for line in self.process.stdout:
+            fields = [field.strip() for field in line.decode().split(",")]
+            if len(fields) == len(NVIDIA_SMI_QUERY) + 1 and fields[0].isdigit():
+                self.latest[int(fields[0])] = (time.monotonic(), [_nvidia_smi_number(field) for field in fields[1:]])
+
+    def describe(self):
+        return {"devices": self.devices, "columns": [column for _, column in NVIDIA_SMI_QUERY]}
+
+    async def read(self):
+        fresh = time.monotonic() - 2 * self.interval
+        missing = [float("nan")] * len(NVIDIA_SMI_QUERY)
+        readings = [self.latest.get(device, (fresh, missing)) for device in self.devices]
+        if all(seen < fresh for seen, _ in readings):
+            return None
+        return [values if seen >= fresh else missing for seen, values in readings]
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            await self.process.wait()
+
+
+def _nvidia_smi_number(field):
+    """
+    Function to convert one nvidia-smi CSV field to a float, NaN for '[N/A]' and similar placeholders.
+    """
+    try:
+        return float(field)
+    except ValueError:
+        return float("nan")
+
+
+def _build_sources(names, interval, sysfs_root, pid_file=None):
+    """
+    Function to create the requested sources, leaving out (with a warning) those the host cannot provide.
+    """
+    factories = {"proc_stat": lambda: ProcStatSource(sysfs_root), "cpufreq": lambda: CpuFreqSource(sysfs_root),
+                 "hwmon": lambda: HwmonSource(sysfs_root), "diskstats": lambda: DiskStatsSource(sysfs_root),
+                 "process": lambda: ProcessSource(pid_file), "rapl": lambda: RaplSource(sysfs_root),
+                 "nvidia_smi": lambda: NvidiaSmiSource(interval)}
+    sources = []
+    for name in names:
+        try:
+            sources.append(factories[name]())
+        except OSError as error:
+            print(f"Skipping {name}: {error}", file=sys.stderr)
+    return sources
+
+
+async def collect(sources, interval, writer, duration=None, stats=None):
+    """
+    Function to poll every source on one shared tick and write one record per tick.
+
+    Every reading of a tick is stamped with the tick's scheduled monotonic time and wall-clock time, so the streams
+    need no alignment afterwards. A source still busy when SOURCE_BUDGET of the interval has passed is recorded as
+    null for that tick; it is not polled again until its outstanding read finishes, and that late reading is
+    discarded instead of being stamped with the wrong tick. The sources prime their counters in start(), so the
+    first tick, which fires at once, is skipped: its rates would cover a few microseconds instead of an interval.
+
+    Parameters:
+    sources (list): Started Source objects
+    interval (float): Seconds between ticks
+    writer (BackgroundWriter): Receives one record per tick
+    duration (float): Stop after this many seconds; run until interrupted when omitted
+    stats (TickStats): Receives the per-tick cost and lateness
+
+    Returns:
+    dict: Number of ticks each source missed, by source name
+    """
+    pending = {}
+    missed = {source.name: 0 for source in sources}
+    first = True
+    async for scheduled, wall_time in async_periodic_ticks(interval, duration, stats):
+        if first:
+            first = False
+            continue
+        started = time.monotonic()
+        fresh = {}
+        for source in sources:
+            # A read that finished after its own tick belongs to that tick and is dropped
+            task = pending.get(source.name)
+            if task is None or task.done():
+                if task is not None and not task.cancelled():
+                    task.exception()
+                fresh[source.name] = pending[source.name] = asyncio.create_task(source.read())
+
+        await asyncio.wait(fresh.values(), timeout=max(scheduled + interval * SOURCE_BUDGET - time.monotonic(), 0))
+
+        readings = {}
+        for source in sources:
+            task = fresh.get(source.name)
+            if task is not None and task.done():
+                del pending[source.name]
+                readings[source.name] = task.result() if task.exception() is None else None
+            else:
+                readings[source.name] = None
+            missed[source.name] += readings[source.name] is None
+
+        writer.write({"time": round(wall_time, 6), "monotonic": round(scheduled, 6), "sources": readings})
+        if stats is not None:
+            stats.record(time.monotonic() - started, started - scheduled)
+
+    return missed
+
+
+async def run(source_names, interval, duration, output_path, sysfs_root, flush_interval=1.0, pid_file=None):
+    """
+    Function to start the sources, write the header and collect until the duration ends or the collector is stopped.
+    """
+    sources = _build_sources(source_names, interval, sysfs_root, pid_file)
+    if not sources:
+        sys.exit("No telemetry source is available on this host")
+
+    stats = TickStats()
+    missed = {}
+    output = open_output(output_path)
+    writer = None
+    try:
+        for source in sources:
+            await source.start()
+        write_record(output, collector_header("telemetry", interval,
+                                              sources={source.name: source.describe() for source in sources}))
+        writer = BackgroundWriter(output, interval, flush_interval)
+        missed = await collect(sources, interval, writer, duration, stats)
+    finally:
+        for source in sources:
+            await source.close()
+        if writer is not None:
+            writer.close()
+            print(writer.summary(), file=sys.stderr)
+        print(stats.summary(), file=sys.stderr)
+        if missed:
+            print("Ticks without a reading: " + ", ".join(f"{name} {count}" for name, count in missed.items()),
+                  file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect every metric source on one shared clock as JSON lines.")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between ticks")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--output", default="-",
+                        help="file to append records to ('-' for standard output, .gz/.xz/.zst to compress)")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds between batched writes")
+    parser.add_argument("--sources", nargs="+", default=SOURCE_NAMES, choices=SOURCE_NAMES, help="metric sources to poll")
+    parser.add_argument("--sysfs-root", default="/sys", help="root of the sysfs tree")
+    parser.add_argument("--pid-file", default=None, help="file holding the PID of the benchmark to attribute usage to")
+    args = parser.parse_args()
+
+    stop_on_sigterm()
+    try:
+        asyncio.run(run(args.sources, args.interval, args.duration, args.output, args.sysfs_root, args.flush_interval,
+                        args.pid_file))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
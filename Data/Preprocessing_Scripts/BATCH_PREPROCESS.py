@@ -0,0 +1,150 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PREPROCESS_SCRIPT import build_dataset
+from cpu_reductions import STAT_LABELS
+from dataset_io import DATASET_FORMATS, dataset_metadata, write_dataset
+from diagnostic_parsers import cpu_temp_capture, cpu_util_capture, gpu_status_capture
+from telemetry_store import TelemetryStore
+
+# Files run_experiment.py writes into every diagnostic_data/<folder_name>/ that the dataset is built from. Each entry
+# lists alternatives in order of preference: the shared-clock telemetry, the single-source collectors, then the text
+# of older runs; compressed copies (.gz, .xz, .zst) are found in place of any of them, and a collector's output only
+# counts when it recorded the stream (see cpu_util_capture, cpu_temp_capture and gpu_status_capture)
+REQUIRED_FILES = (("telemetry.jsonl", "cpu_util.jsonl", "cpu_util.txt"),
+                  ("telemetry.jsonl", "cpu_temp.jsonl", "cpu_temp.txt"),
+                  ("telemetry.jsonl", "gpu_status.txt"))
+
+
+def _capture_files(folder):
+    """
+    Function to return the file used for each entry of REQUIRED_FILES, or None for the entries with none present.
+    """
+    return [path if os.path.isfile(path) else None
+            for path, _ in (cpu_util_capture(folder), cpu_temp_capture(folder), gpu_status_capture(folder))]
+
+
+def find_experiment_folders(root):
+    """
+    Function to find every experiment folder under the diagnostic data root.
+
+    Parameters:
+    root (str): Folder metric.sh writes experiments into, normally 'diagnostic_data'
+
+    Returns:
+    list: Sorted paths of the sub-folders that contain one file of every entry of REQUIRED_FILES
+    """
+    folders = []
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if not entry.is_dir():
+            continue
+        try:
+            captures = _capture_files(entry.path)
+        except ValueError as error:
+            print(f"{entry.name:<30} skipped, unreadable collector header: {error}")
+            continue
+        if None not in captures:
+            folders.append(entry.path)
+    return folders
+
+
+def process_experiment(folder, output_dir, freq, tolerance, cpu_stats=("mean",), formats=("csv",), store_root=None,
+                       tz=None, top_fields=False):
+    """
+    Function to build and save the dataset of one experiment; runs inside a worker process.
+
+    Parameters:
+    folder (str): Experiment folder
+    output_dir (str): Folder to write '<experiment>.<format>' into
+    freq (str): Spacing of the common time grid
+    tolerance (str): Largest clock difference allowed when aligning the streams
+    cpu_stats (tuple): Reductions over all cores for the CPU columns, see build_dataset
+    formats (tuple): Output formats, any of DATASET_FORMATS
+    store_root (str): TelemetryStore to also write the dataset into, as a series named after the experiment
+    tz (str): Host zone for captures with an unrecognised timezone abbreviation, see build_dataset
+    top_fields (bool): Whether to add the other `top` fields of text captures, see build_dataset
+
+    Returns:
+    Tuple[str, int, int, float]: Experiment name, rows written, raw input bytes and seconds taken
+    """
+    start = time.perf_counter()
+    name = os.path.basename(os.path.normpath(folder))
+    input_bytes = sum(os.path.getsize(file_name) for file_name in set(_capture_files(folder)))
+
+    joined_df = build_dataset(folder, freq, tolerance, verbose=False, cpu_stats=cpu_stats, tz=tz,
+                              top_fields=top_fields)
+    metadata = dataset_metadata(folder, freq=freq, tolerance=tolerance, cpu_stats=list(cpu_stats))
+    for output_format in formats:
+        write_dataset(joined_df, os.path.join(output_dir, f"{name}{DATASET_FORMATS[output_format]}"), metadata)
+
+    # Every experiment is its own series, so workers never write to the same one; a rebuild replaces it
+    if store_root is not None:
+        store = TelemetryStore(store_root)
+        store.remove(name)
+        store.append(name, joined_df)
+
+    return name, len(joined_df), input_bytes, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dataset of every experiment folder in parallel.")
+    parser.add_argument("root", nargs="?", default="diagnostic_data",
+                        help="folder holding one sub-folder per experiment")
+    parser.add_argument("--output-dir", default=None, help="where to write the datasets (defaults to root)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--freq", default="1s", help="spacing of the common time grid")
+    parser.add_argument("--tolerance", default="1s", help="largest clock difference allowed when aligning streams")
+    parser.add_argument("--cpu-stats", nargs="+", default=["mean"], choices=list(STAT_LABELS),
+                        help="reductions over all cores for the CPU columns, e.g. 'mean max p95 spread'")
+    parser.add_argument("--format", nargs="+", default=["csv"], choices=list(DATASET_FORMATS), dest="formats",
+                        help="output formats; parquet and feather need pyarrow and fall back to npz without it")
+    parser.add_argument("--store", default=None,
+                        help="telemetry store folder to also append each experiment to, for time-range queries")
+    parser.add_argument("--tz", default=None,
+                        help="host zone, e.g. 'Asia/Kolkata', for captures with an unrecognised timezone abbreviation")
+    parser.add_argument("--top-fields", action="store_true",
+                        help="add the other time shares, load averages and task counts of `top` captures")
+    args = parser.parse_args()
+
+    folders = find_experiment_folders(args.root) if os.path.isdir(args.root) else []
+    if not folders:
+        required = ', '.join(' or '.join(names) for names in REQUIRED_FILES)
+        print(f"No experiment folders with {required} found under {args.root}")
+        return 1
+
+    output_dir = args.output_dir or args.root
+    os.makedirs(output_dir, exist_ok=True)
+
+    # One experiment per worker; results are reported as they finish
+    start = time.perf_counter()
+    total_rows = 0
+    total_bytes = 0
+    failures = 0
+    with ProcessPoolExecutor(max_workers=min(args.workers, len(folders))) as pool:
+        futures = {pool.submit(process_experiment, folder, output_dir, args.freq, args.tolerance,
+                               tuple(args.cpu_stats), tuple(args.formats), args.store, args.tz,
+                               args.top_fields): folder
+                   for folder in folders}
+        for future in as_completed(futures):
+            try:
+                name, rows, input_bytes, seconds = future.result()
+            except Exception as error:
+                failures += 1
+                print(f"{os.path.basename(futures[future]):<30} FAILED: {error}")
+                continue
+            total_rows += rows
+            total_bytes += input_bytes
+            print(f"{name:<30}{rows:>10} rows{input_bytes / 1e6:>10.1f} MB{seconds:>8.2f} s")
+
+    elapsed = time.perf_counter() - start
+    print(f"\nProcessed {len(folders) - failures}/{len(folders)} experiments in {elapsed:.2f} s: "
+          f"{total_rows / elapsed:,.0f} rows/s, {total_bytes / 1e6 / elapsed:.1f} MB/s of raw logs")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
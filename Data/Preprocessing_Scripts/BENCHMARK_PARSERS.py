@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from diagnostic_parsers import clean_cpu_util_data, clean_top_data, thread_column_names
+
+
+def legacy_clean_cpu_util_data(filename):
+    """
+    Reference copy of the original cell-by-cell CPU utilization cleaner, kept only as the 'before' baseline.
+
+    Parameters:
+    filename (str): The name of the file containing CPU utilization data
+
+    Returns:
+    pd.DataFrame: DataFrame containing cleaned CPU utilization data as object-dtype strings
+    """
+    with open(filename, "r") as f:
+        text_file = f.read()
+
+    df = pd.DataFrame(columns=thread_column_names())
+
+    cpu_util_pattern = r"(\d{1,3}\.\d{1,2}) us"
+
+    thread_counter = 0
+    outer_index = 0
+    core_name = 0
+    core_counter = 0
+    cpu_num = 1
+    has_data = False
+
+    for line in text_file.split('\n'):
+        for reading in re.findall(cpu_util_pattern, line):
+            has_data = True
+            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}_Thread_{thread_counter}'] = reading
+            thread_counter += 1
+
+        thread_counter = 0
+
+        if has_data:
+            core_name += 1
+
+            if core_counter < 9:
+                cpu_num = 1
+            elif core_counter == 9:
+                core_name = 0
+                cpu_num = 2
+
+            core_counter += 1
+
+            if core_counter == 20:
+                cpu_num = 1
+                core_name = 0
+                core_counter = 0
+                outer_index += 1
+
+        has_data = False
+
+    return df
+
+
+def write_synthetic_cpu_util(filename, samples, seed=0):
+    """
+    Function to write a synthetic `top -1 -b` capture for the default 2 x 10 x 2 topology.
+
+    Parameters:
+    filename (str): Path of the file to write
+    samples (int): Number of top frames to generate
+    seed (int): Seed for the random utilization values
+    """
+    rng = random.Random(seed)
+    lines = ["Mon Jul 17 01:00:00 PM PDT 2023"]
+    for sample in range(samples):
+        lines.append(f"top - 13:{sample // 60 % 60:02d}:{sample % 60:02d} up 12 days,  3:04,  2 users,  "
+                     f"load average: 0.52, 0.58, 0.59")
+        lines.append("Tasks: 412 total,   1 running, 411 sleeping,   0 stopped,   0 zombie")
+        for cpu in range(0, 40, 2):
+            lines.append(" ".join(f"%Cpu{cpu + thread:<3}: {rng.uniform(0, 100):5.1f} us,  1.0 sy,  0.0 ni, "
+                                  f"50.0 id,  0.0 wa,  0.0 hi,  0.0 si,  0.0 st" for thread in range(2)))
+    with open(filename, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def time_parser(parser, filename, repeats):
+    """
+    Function to time a parser and return the best wall time over several runs together with its output.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parser(filename)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cpu_util.txt parser before and after the rewrite.")
+    parser.add_argument("--samples", type=int, default=500, help="number of top frames to synthesize")
+    parser.add_argument("--repeats", type=int, default=3, help="timing runs per parser (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = os.path.join(tmp_dir, "cpu_util.txt")
+        write_synthetic_cpu_util(filename, args.samples)
+
+        legacy_time, legacy_df = time_parser(legacy_clean_cpu_util_data, filename, 1)
+        new_time, new_df = time_parser(clean_cpu_util_data, filename, args.repeats)
+        # Every time share, load average and task count comes out of the same pass over the capture as user time,
+        # as build_dataset(..., top_fields=True) parses it
+        top_time, top_df = time_parser(partial(clean_top_data, thread_field="user"), filename, args.repeats)
+
+    # The rewrite must be a drop-in replacement: same columns and the same values (plus the frame timestamps)
+    new_df = new_df.drop(columns="timestamp")
+    assert list(legacy_df.columns) == list(new_df.columns)
+    assert np.allclose(legacy_df.astype(float).to_numpy(), new_df.to_numpy(), equal_nan=True)
+
+    print(f"{'parser':<10}{'seconds':>10}{'rows/sec':>14}")
+    print(f"{'before':<10}{legacy_time:>10.3f}{len(legacy_df) / legacy_time:>14,.0f}")
+    print(f"{'after':<10}{new_time:>10.3f}{len(new_df) / new_time:>14,.0f}")
+    print(f"{'all fields':<10}{top_time:>10.3f}{len(top_df) / top_time:>14,.0f}")
+    print(f"speedup: {legacy_time / new_time:.1f}x on {len(new_df)} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from PREPROCESS_SCRIPT import assemble_dataset
+from chunked_io import complete_records_end
+from cpu_reductions import STAT_LABELS
+from dataset_io import load_frame, replace_file, save_frame
+from diagnostic_parsers import (capture_timezone, cpu_temp_capture, cpu_util_capture, cpufreq_capture, disk_capture,
+                                drive_temp_capture, events_capture, gpu_status_capture, process_capture, rapl_capture)
+from telemetry_store import TelemetryStore
+
+# Folder, next to the raw logs, that holds the follower's checkpoint
+FOLLOW_DIR_NAME = ".follow"
+
+# Checkpoint of the byte offset parsed up to in every capture and of the last grid time written to the store
+STATE_FILE = "state.json"
+
+# Seconds the captures must go unchanged after events.jsonl records the 'end' phase before the last rows are written,
+# so the collector has flushed its buffered records
+FINAL_QUIET_SECONDS = 5.0
+
+
+class ExperimentFollower:
+    """
+    Incremental preprocessing of an experiment whose JSON-lines captures are still being written.
+
+    Every poll parses only the complete records appended to each capture since the last poll and appends the
+    dataset rows they complete to a TelemetryStore series. A grid time is complete once every stream has a sample
+    more than 'tolerance' after it, since no later sample can change its as-of match; rows within the tolerance of
+    the last written grid time are kept as parser state for the next poll. The byte offsets, the last written grid
+    time and the kept rows are checkpointed in '.follow/' next to the captures, so a restarted follower resumes
+    where it stopped, and the rows it writes are the same as build_dataset would give for the finished experiment.
+    """
+
+    def __init__(self, directory, store, series=None, freq="1s", tolerance="1s", cpu_stats=("mean",)):
+        self.directory = directory
+        self.store = store if isinstance(store, TelemetryStore) else TelemetryStore(store)
+        self.series = series or os.path.basename(os.path.normpath(directory))
+        self.freq = freq
+        self.tolerance = pd.Timedelta(tolerance)
+        self.cpu_stats = tuple(cpu_stats)
+        self.state_dir = os.path.join(directory, FOLLOW_DIR_NAME)
+        self.captures = None
+        self.tz = None
+
+        state = {}
+        if os.path.exists(os.path.join(self.state_dir, STATE_FILE)):
+            with open(os.path.join(self.state_dir, STATE_FILE)) as f:
+                state = json.load(f)
+        self.offsets = state.get("offsets", {})
+        self.pending = {name: load_frame(os.path.join(self.state_dir, f"{name}.npz"))
+                        for name in state.get("streams", [])}
+
+        # Rows may have reached the store after the last checkpoint was written
+        emitted = [value for value in (state.get("emitted"), self.store.series(self.series).last_timestamp())
+                   if value is not None]
+        self.emitted = max(emitted) if emitted else None
+        self.labelled = state.get("labelled")
+
+    def _find_captures(self):
+        """
+        Function to find each stream's capture and parser once the collector has written its header.
+        """
+        try:
+            captures = {"cpu_util": cpu_util_capture(self.directory), "cpu_temp": cpu_temp_capture(self.directory),
+                        "gpu_status": gpu_status_capture(self.directory)}
+        except ValueError:
+            # The lookups read the collector's header, which is still being written
+            return None
+        if not all(os.path.exists(path) and complete_records_end(path) for path, _ in captures.values()):
+            return None
+
+        for name, capture in (("cpufreq", cpufreq_capture(self.directory)), ("disk", disk_capture(self.directory)),
+                              ("drive_temp", drive_temp_capture(self.directory)),
+                              ("process", process_capture(self.directory)), ("rapl", rapl_capture(self.directory))):
+            if capture is not None:
+                captures[name] = capture
+
+        # Text captures and compressed logs are cut on records only when read whole
+        unfollowed = sorted({os.path.basename(path) for path, _ in captures.values() if not path.endswith(".jsonl")})
+        if unfollowed:
+            raise ValueError(f"{', '.join(unfollowed)} in {self.directory} can only be preprocessed once the "
+                             "experiment ends; follow mode needs the JSON-lines captures of the Python collectors")
+        return captures
+
+    def _events(self):
+        """
+        Function to read the phase changes recorded so far, or None for an experiment without events.jsonl.
+        """
+        events = events_capture(self.directory)
+        if events is None:
+            return None
+        try:
+            return events[1](events[0], tz=self.tz)
+        except json.JSONDecodeError:
+            # A phase change is being written; it is picked up by the next poll
+            return None
+
+    def finished(self):
+        """
+        Function to tell whether run_experiment.py has recorded the 'end' phase of the experiment and the collector
+        has stopped writing.
+        """
+        if self.captures is None:
+            return False
+        events_df = self._events()
+        if events_df is None or not events_df["phase"].eq("end").any():
+            return False
+        modified = max(os.path.getmtime(path) for path, _ in self.captures.values())
+        return time.time() - modified >= FINAL_QUIET_SECONDS
+
+    def poll(self, final=False):
+        """
+        Function to parse the records appended since the last poll and write the dataset rows they complete.
+
+        Parameters:
+        final (bool): Whether the captures are complete, so the rows after the last grid time every stream covers
+        are written too
+
+        Returns:
+        int: Number of rows appended to the series
+        """
+        if self.captures is None:
+            self.captures = self._find_captures()
+            if self.captures is None:
+                return 0
+            self.tz = capture_timezone(self.captures["cpu_temp"][0])
+
+        # Parse each capture's new complete lines once per stream it holds
+        ends = {path: complete_records_end(path, self.offsets.get(path, 0)) for path, _ in self.captures.values()}
+        for name, (path, parser) in self.captures.items():
+            new = parser(path, tz=self.tz, span=(self.offsets.get(path, 0), ends[path]))
+            pending = self.pending.get(name)
+            if pending is None:
+                self.pending[name] = new.reset_index(drop=True)
+                continue
+            # Rows parsed again after a checkpoint that was cut short are already pending
+            if len(pending):
+                new = new[new["timestamp"] > pending["timestamp"].iloc[-1]]
+            self.pending[name] = pd.concat([pending, new], ignore_index=True)
+        self.offsets.update(ends)
+
+        appended = self._emit(final)
+        self._checkpoint()
+        return appended
+
+    def _emit(self, final):
+        """
+        Function to assemble the pending rows and append the grid times that no later record can change.
+        """
+        lasts = [df["timestamp"].iloc[-1] for df in self.pending.values() if len(df)]
+        if len(lasts) < len(self.pending):
+            return 0
+        watermark = None if final else min(lasts) - self.tolerance
+
+        events_df = self._events()
+        if self.labelled is None:
+            self.labelled = events_df is not None or "phase" in self.store.series(self.series).columns
+        if self.labelled and events_df is None:
+            events_df = pd.DataFrame({"timestamp": pd.DatetimeIndex([], tz="UTC"), "phase": pd.Series([], dtype=str),
+                                      "benchmark": pd.Series([], dtype=str), "iteration": np.empty(0, np.int64)})
+        elif not self.labelled:
+            events_df = None
+
+        streams = {name: df for name, df in self.pending.items()
+                   if name not in ("cpu_util", "cpu_temp", "gpu_status")}
+        joined_df = assemble_dataset(self.pending["cpu_util"], self.pending["cpu_temp"], self.pending["gpu_status"],
+                                     streams, events_df, self.freq, str(self.tolerance), False, self.cpu_stats)
+
+        times = joined_df.index.asi8
+        keep = np.ones(len(times), dtype=bool)
+        if self.emitted is not None:
+            keep &= times > self.emitted
+        if watermark is not None:
+            keep &= times <= watermark.value
+        rows = joined_df[keep]
+        if len(rows):
+            self.store.append(self.series, rows)
+            self.emitted = int(rows.index.asi8[-1])
+
+        # Only samples within the tolerance of grid times still to come can be matched again, and one earlier
+        # sample keeps each stream's first time before them so the next grid starts no later than it would have
+        if self.emitted is not None:
+            cut = self.emitted - self.tolerance.value
+            for name, df in self.pending.items():
+                first = max(int(np.searchsorted(pd.DatetimeIndex(df["timestamp"]).asi8, cut, "left")) - 1, 0)
+                self.pending[name] = df.iloc[first:].reset_index(drop=True)
+        return len(rows)
+
+    def _checkpoint(self):
+        """
+        Function to write the pending rows and then, atomically, the offsets and last written grid time.
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        for name, df in self.pending.items():
+            save_frame(df, os.path.join(self.state_dir, f"{name}.npz"))
+
+        state = {"offsets": self.offsets, "emitted": self.emitted, "labelled": self.labelled,
+                 "streams": list(self.pending)}
+        replace_file(os.path.join(self.state_dir, STATE_FILE), lambda f: json.dump(state, f, indent=1), "w")
+
+
+def follow(follower, poll_interval=5.0, once=False):
+    """
+    Function to poll an experiment until run_experiment.py records its end and the collector stops writing, then
+    write the last rows.
+
+    Parameters:
+    follower (ExperimentFollower): Experiment to follow
+    poll_interval (float): Seconds between polls
+    once (bool): Whether to poll once and return; the last rows are only written if the experiment has finished
+
+    Returns:
+    int: Number of rows appended to the series
+    """
+    appended = 0
+    while True:
+        final = follower.finished()
+        appended += follower.poll(final)
+        if final or once:
+            return appended
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess an experiment while it runs, appending new rows to a "
+                                                 "telemetry store.")
+    parser.add_argument("directory", help="experiment folder holding telemetry.jsonl or the single-source .jsonl files")
+    parser.add_argument("--store", default="telemetry_store", help="telemetry store folder to append the rows to")
+    parser.add_argument("--series", default=None, help="series name (defaults to the experiment folder name)")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="seconds between polls")
+    parser.add_argument("--freq", default="1s", help="spacing of the common time grid")
+    parser.add_argument("--tolerance", default="1s", help="largest clock difference allowed when aligning streams")
+    parser.add_argument("--cpu-stats", nargs="+", default=["mean"], choices=list(STAT_LABELS),
+                        help="reductions over all cores for the CPU columns, e.g. 'mean max p95 spread'")
+    parser.add_argument("--once", action="store_true",
+                        help="poll once and exit instead of following the experiment until it ends")
+    args = parser.parse_args()
+
+    follower = ExperimentFollower(args.directory, args.store, args.series, args.freq, args.tolerance,
+                                  tuple(args.cpu_stats))
+    start = time.perf_counter()
+    try:
+        appended = follow(follower, args.poll_interval, args.once)
+    except ValueError as error:
+        print(error)
+        return 1
+    except KeyboardInterrupt:
+        print(f"Stopped; rerun to resume from the checkpoint in {follower.state_dir}")
+        return 0
+
+    print(f"Appended {appended} rows to '{follower.series}' in {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
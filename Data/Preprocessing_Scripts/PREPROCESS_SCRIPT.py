@@ -1,407 +1,252 @@
+import argparse
+import os
+
 import pandas as pd
-import re
+
+from cpu_reductions import CPU_COLUMN_PATTERN, reduce_cpu_columns
+from dataset_io import DATASET_FORMATS, dataset_metadata, write_dataset
+from diagnostic_parsers import (capture_timezone, cpu_temp_capture, cpu_util_capture, cpufreq_capture, disk_capture,
+                                drive_temp_capture, events_capture, gpu_status_capture, process_capture, rapl_capture,
+                                top_capture)
+from parse_cache import cached_parse
+from stream_alignment import align_streams
 
 
-def clean_cpu_util_data(filename):
+def compute_core_util_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
     """
-    Function to clean the CPU utilization data from a text file and convert it into a DataFrame.
+    Function to reduce the per-thread utilization to one value per core, e.g. 'CPU_1_Core_0_Avg_Util'.
 
     Parameters:
-    filename (str): The name of the file containing CPU utilization data
+    df (pd.DataFrame): DataFrame from clean_cpu_util_data
+    stats (tuple): Reductions over the threads of each core: 'mean', 'max', 'p95' and/or 'spread'
 
     Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU utilization data
+    pd.DataFrame: One column per reduction and core in socket, core order, followed by 'timestamp'
     """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Define the pattern for CPU utilization
-    cpu_util_pattern = r"(\d{1,3}\.\d{1,2}) us"
-
-    # initialize the variables used to parse the data correctly
-    thread_counter = 0
-    outer_index = 0
-    core_name = 0
-    core_counter = 0
-    cpu_num = 1
-    has_data = False
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all CPU utilizations
-        for reading in re.findall(cpu_util_pattern, line):
-            has_data = True  # Flag to indicate that data is found
-
-            # Add the utilization to the DataFrame
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}_Thread_{thread_counter}'] = reading
-
-            # Since there are only 2 threads, increment the thread counter
-            thread_counter += 1
-
-        # We reset the thread count after finding both readings
-        thread_counter = 0
-
-        if has_data:
-            # Update core name if data has been processed
-            core_name += 1
-
-            # Determine which CPU, Core, and timestamp the reading belongs to
-            if core_counter < 9:
-                cpu_num = 1
-
-            elif core_counter == 9:
-                # Reset core name and update CPU number
-                core_name = 0
-                cpu_num = 2
-
-            # Increment core counter
-            core_counter += 1
-
-            # Reset counters if all cores and threads have been processed
-            if core_counter == 20:
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1  # Increment index to move to the next row
-
-        # Reset the flag for the next iteration
-        has_data = False
-
-    return df
-
-
-def compute_core_util_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Convert all data to floats to avoid type errors
-    df = df.astype(float)
-
-    # Assuming df is your DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Remove thread information from column names
-    group_names = [re.sub("_Thread_[0-9]$", "", col) for col in col_names]
-
-    # Dictionary to store results
-    results = {}
-
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group + "_Avg_Util"] = df[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
-
-    return df_result
-
-
-def compute_cpu_util_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Convert all data to floats to avoid type errors
-    df = df.astype(float)
-
-    # Assuming df is your DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Remove core and thread information from column names
-    group_names = [re.sub("_Core_[0-9]_Thread_[0-9]$", "", col) for col in col_names]
-
-    # Dictionary to store results
-    results = {}
+    return reduce_cpu_columns(df, "core", "Util", stats)
 
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group + "_Avg_Util"] = df[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
-
-    return df_result
 
-
-def clean_cpu_temp_data(filename):
+def compute_cpu_util_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
     """
-    Function to clean the CPU temperature data from a text file and convert it into a DataFrame.
+    Function to reduce the per-thread utilization to one value per socket, e.g. 'CPU_1_Avg_Util'.
 
     Parameters:
-    filename (str): The name of the file containing CPU temperature data
+    df (pd.DataFrame): DataFrame from clean_cpu_util_data
+    stats (tuple): Reductions over the threads of each socket: 'mean', 'max', 'p95' and/or 'spread'
 
     Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU temperature data
+    pd.DataFrame: One column per reduction and socket in socket order, followed by 'timestamp'
     """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['timestamp', 'CPU_1_Core_0', 'CPU_1_Core_1', 'CPU_1_Core_2', 'CPU_1_Core_3', 'CPU_1_Core_4',
-                 'CPU_1_Core_5', 'CPU_1_Core_6', 'CPU_1_Core_7', 'CPU_1_Core_8', 'CPU_1_Core_9', 'CPU_2_Core_0',
-                 'CPU_2_Core_1', 'CPU_2_Core_2', 'CPU_2_Core_3', 'CPU_2_Core_4', 'CPU_2_Core_5', 'CPU_2_Core_6',
-                 'CPU_2_Core_7', 'CPU_2_Core_8', 'CPU_2_Core_9']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Remove all occurrences of "Â°" from the text file
-    text_file = re.sub("Â°", "", text_file)
-
-    # Define the pattern for date and timezone
-    date_pattern = r"\D\D\D \D\D\D \d\d \d\d\:\d\d\:\d\d \D\D \D\D\D \d\d\d\d"
-    timezone = "PDT "
-
-    # Extract and parse timestamp data
-    for idx, temp_reading in enumerate(re.findall(date_pattern, text_file)):
-        # Remove timezone and convert the remaining string to datetime
-        temp_reading = re.sub(timezone, "", temp_reading)
-        dt = pd.to_datetime(temp_reading)
-        # Add the datetime to the DataFrame
-        df.at[idx, 'timestamp'] = dt
-
-    # Define the pattern for temperature readings
-    core_temps_separate_cpu_pattern = r"\D{4} \d{1,2}:\s{7,8}\+\d{2}.\d"
-    temp_pattern = r"(\d{2}.\d)"
-
-    # Initialize counting variables necessary for parsing the data to the correct location
-    core_counter = 0
-    outer_index = 0
-    core_name = 0
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all temperature readings
-        for temp_reading in re.findall(core_temps_separate_cpu_pattern, line):
-            # Determine which CPU the reading belongs to
-            if core_counter < 10:
-                cpu_num = 1
-            elif core_counter == 10:
-                # When moving to CPU 2, reset core_name
-                cpu_num = 2
-                core_name = 0
-            elif core_counter == 20:
-                # Reset counters when moving to a new set of readings
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1
-
-            # Extract just the temperature from the reading
-            temp = re.search(temp_pattern, temp_reading).group(1)
-
-           # Add the temperature to the DataFrame, constructing the column name based on cpu_num and core_name
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}'] = temp
-
-            # Increment the core_counter and core_name for the next iteration
-            core_counter += 1
-            core_name += 1
-
-    return df
-
-
-def compute_cpu_temp_averages(df: pd.DataFrame) -> pd.DataFrame:
-    # Save timestamp column to add it back later
-    timestamp = df['timestamp']
-
-    # Remove the 'timestamp' column for the conversion
-    df_temp = df.drop('timestamp', axis=1)
-
-    # Convert all data to floats to avoid type errors
-    df_temp = df_temp.astype(float)
-
-    col_names = ['CPU_1_Core_0', 'CPU_1_Core_1', 'CPU_1_Core_2', 'CPU_1_Core_3', 'CPU_1_Core_4', 'CPU_1_Core_5',
-                 'CPU_1_Core_6', 'CPU_1_Core_7', 'CPU_1_Core_8', 'CPU_1_Core_9', 'CPU_2_Core_0', 'CPU_2_Core_1',
-                 'CPU_2_Core_2', 'CPU_2_Core_3', 'CPU_2_Core_4', 'CPU_2_Core_5', 'CPU_2_Core_6', 'CPU_2_Core_7',
-                 'CPU_2_Core_8', 'CPU_2_Core_9']
-
-    # Remove core information from column names
-    group_names = [re.sub("_Core_[0-9]$", "", col) for col in col_names]
-
-    # Dictionary to store results
-    results = {}
-
-    # Iterate through unique groups and calculate average
-    for group in set(group_names):
-        matching_cols = [col for col, group_name in zip(col_names, group_names) if group_name == group]
-        results[group+"_Avg_Temp"] = df_temp[matching_cols].mean(axis=1)
-
-    # Convert results to a DataFrame
-    df_result = pd.DataFrame(results)
-
-    # Add back the timestamp
-    df_result['timestamp'] = timestamp
-
-    return df_result
+    return reduce_cpu_columns(df, "socket", "Util", stats)
 
 
-def clean_gpu_status_data(filename):
+def compute_cpu_temp_averages(df: pd.DataFrame, stats=("mean",)) -> pd.DataFrame:
     """
-    Function to clean the GPU status data from a text file and convert it into a DataFrame.
+    Function to reduce the per-core temperatures to one value per socket, e.g. 'CPU_1_Avg_Temp'.
 
     Parameters:
-    filename (str): The name of the file containing GPU status data
+    df (pd.DataFrame): DataFrame from clean_cpu_temp_data
+    stats (tuple): Reductions over the cores of each socket: 'mean', 'max' (hotspot), 'p95' and/or 'spread'
 
     Returns:
-    pd.DataFrame: DataFrame containing cleaned GPU status data
+    pd.DataFrame: One column per reduction and socket in socket order, followed by 'timestamp'
     """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
+    return reduce_cpu_columns(df, "socket", "Temp", stats)
 
-    # Define column names for a DataFrame
-    col_names = ["gpu_temp", "gpu_power", "gpu_GRAM", "gpu_util"]
 
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
+def clean_shape_of_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df, freq="1s", tolerance="1s", verbose=True,
+                                   extra_streams=None):
+    """
+    Function to align the dataframes on a common time grid so that their rows match by timestamp.
 
-    # Define the pattern for GPU temperature, power, GRAM, and utilization
-    gpu_temp_pattern = r"(\d{1,3})C"
-    gpu_power_pattern = r"(\d{1,2})W /"
-    gpu_GRAM_pattern = r"(\d{1,4})MiB /"
-    gpu_util_pattern = r"(\d{1,3})%"
+    Parameters:
+    cpu_temp_df (pd.DataFrame): DataFrame with CPU temperature data
+    cpu_util_df (pd.DataFrame): DataFrame with CPU utilization data
+    gpu_status_df (pd.DataFrame): DataFrame with GPU status data
+    freq (str): Spacing of the common time grid
+    tolerance (str): Largest clock difference allowed between a grid time and the sample used for it
+    verbose (bool): Whether to print the alignment report
+    extra_streams (dict): Further streams to align by name, e.g. the disk activity of newer captures
 
-    # Parse the text file for each GPU parameter
+    Returns:
+    Tuple[pd.DataFrame]: Three dataframes indexed by the same timestamps, followed by one per extra stream
+    """
+    streams = {"cpu_temp": cpu_temp_df, "cpu_util": cpu_util_df, "gpu_status": gpu_status_df, **(extra_streams or {})}
 
-    # Find all GPU temperatures in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_temp_pattern, text_file)):
-        df.at[idx, "gpu_temp"] = reading
+    # As-of join every stream onto one grid instead of cutting them to the shortest length
+    aligned_df, report = align_streams(streams, freq, tolerance)
 
-    # Find all GPU power readings in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_power_pattern, text_file)):
-        df.at[idx, "gpu_power"] = reading
+    # Report how many samples were matched, repeated to fill a gap, missing, or dropped
+    if verbose:
+        print(report.to_string())
 
-    # Find all GPU GRAM readings in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_GRAM_pattern, text_file)):
-        df.at[idx, "gpu_GRAM"] = reading
+    # Split the aligned columns back into one dataframe per stream
+    return tuple(aligned_df[[col for col in df.columns if col != 'timestamp']] for df in streams.values())
 
-    # Find all GPU utilizations in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_util_pattern, text_file)):
-        df.at[idx, "gpu_util"] = reading
 
-    return df
+def merge_diagnostic_data(cpu_df, gpu_status_df):
+    """
+    Function to merge the CPU and GPU dataframes into a single one.
+
+    Parameters:
+    cpu_df (pd.DataFrame): DataFrame with CPU data, aligned by clean_shape_of_diagnostic_data
+    gpu_status_df (pd.DataFrame): DataFrame with GPU status data, aligned by clean_shape_of_diagnostic_data
 
+    Returns:
+    pd.DataFrame: Merged dataframe of all the input dataframes
+    """
 
+    # Join the resultant CPU dataframe with GPU dataframe on their shared 'timestamp' index
+    all_joined_df = cpu_df.join(gpu_status_df)
 
-def clean_shape_of_diagnostic_data(cpu_df, gpu_status_df):
+    return all_joined_df
+
+
+def label_phases(df, events_df):
     """
-    Function to trim the length of dataframes to match the smallest one.
+    Function to label every row with the phase, benchmark and iteration in effect at its timestamp.
 
     Parameters:
-    cpu_temp_df (pd.DataFrame): DataFrame with CPU temperature data
-    cpu_util_df (pd.DataFrame): DataFrame with CPU utilization data
-    gpu_status_df (pd.DataFrame): DataFrame with GPU status data
+    df (pd.DataFrame): Dataset indexed by timestamp
+    events_df (pd.DataFrame): Phase changes from clean_events_data
 
     Returns:
-    Tuple[pd.DataFrame]: Three dataframes with synchronized lengths
+    pd.DataFrame: Copy of df with 'phase', 'benchmark' and 'iteration' columns; rows before the first recorded
+    phase are 'idle' with benchmark '' and iteration -1
     """
-    # Get the shapes of all dataframes
-    shapes = [cpu_df.shape[0], gpu_status_df.shape[0]]
+    events_df = events_df.astype({"timestamp": df.index.dtype}).sort_values("timestamp")
+    labels = pd.merge_asof(pd.DataFrame({"timestamp": df.index}), events_df, on="timestamp", direction="backward")
 
-    # Find the smallest length
-    smallest = min(shapes)
+    labelled_df = df.copy()
+    labelled_df["phase"] = labels["phase"].fillna("idle").to_numpy()
+    labelled_df["benchmark"] = labels["benchmark"].fillna("").to_numpy()
+    labelled_df["iteration"] = labels["iteration"].fillna(-1).astype("int64").to_numpy()
 
-    # Return new dataframes of the smallest length
-    return cpu_df[:smallest], gpu_status_df[:smallest]
+    return labelled_df
 
 
-def merge_diagnostic_data(cpu_df, gpu_status_df):
+def assemble_dataset(df_thread_util, df_cpu_core_temp, gpu_status_df, extra_streams=None, events_df=None, freq="1s",
+                     tolerance="1s", verbose=True, cpu_stats=("mean",)):
     """
-    Function to merge the CPU and GPU dataframes into a single one.
+    Function to turn the parsed captures of one experiment, or of the part of it recorded so far, into the model
+    dataset.
 
     Parameters:
-    cpu_temp_df (pd.DataFrame): DataFrame with CPU temperature data
-    cpu_util_df (pd.DataFrame): DataFrame with CPU utilization data
-    gpu_status_df (pd.DataFrame): DataFrame with GPU status data
+    df_thread_util (pd.DataFrame): Per-thread utilization from clean_cpu_util_data or clean_proc_stat_data
+    df_cpu_core_temp (pd.DataFrame): Per-core temperatures from clean_cpu_temp_data or clean_hwmon_data
+    gpu_status_df (pd.DataFrame): GPU readings from clean_gpu_status_data or clean_nvidia_smi_data
+    extra_streams (dict): Further parsed streams by name, e.g. 'cpufreq', 'disk' or 'rapl'
+    events_df (pd.DataFrame): Phase changes from clean_events_data, or None when the experiment recorded none
+    freq (str): Spacing of the common time grid
+    tolerance (str): Largest clock difference allowed between a grid time and the sample used for it
+    verbose (bool): Whether to print the alignment report
+    cpu_stats (tuple): Reductions over all cores for the CPU columns
 
     Returns:
-    pd.DataFrame: Merged dataframe of all the input dataframes
+    pd.DataFrame: Dataset indexed by timestamp, as returned by build_dataset
     """
+    # Reduce over every core of every socket in one pass, whatever the topology of the capture
+    df_cpu_avg_util = reduce_cpu_columns(df_thread_util, "package", "Util", cpu_stats)
+    df_cpu_avg_temp = reduce_cpu_columns(df_cpu_core_temp, "package", "Temp", cpu_stats)
 
+    # Align all dataframes by timestamp
+    df_cpu_avg_temp, df_cpu_avg_util, gpu_status_df, *extra_dfs = clean_shape_of_diagnostic_data(
+        df_cpu_avg_temp, df_cpu_avg_util, gpu_status_df, freq, tolerance, verbose, extra_streams)
 
-    # Join the resultant CPU dataframe with GPU dataframe
-    # Set 'timestamp' as the index of the final dataframe
-    all_joined_df = cpu_df.join(gpu_status_df).set_index('timestamp')
+    combined_df = df_cpu_avg_temp.join(df_cpu_avg_util)
 
-    return all_joined_df
+    # Merge all the dataframes
+    joined_df = merge_diagnostic_data(gpu_status_df, combined_df)
+    for extra_df in extra_dfs:
+        joined_df = joined_df.join(extra_df)
 
+    # get GRAM column in format it will be in on Cloudsim+, using the total memory reported in each frame
+    joined_df['gpu_GRAM'] = joined_df['gpu_GRAM'] / joined_df['gpu_GRAM_total'] * 100
+    joined_df.drop(columns='gpu_GRAM_total', inplace=True)
 
-def main():
-    df_thread_util = clean_cpu_util_data("cpu_util.txt")
-    df_core_avg_util = compute_core_util_averages(df_thread_util)
-    df_cpu_avg_util = compute_cpu_util_averages(df_thread_util)
-    df_cpu_core_temp = clean_cpu_temp_data("cpu_temp.txt")
-    df_cpu_avg_temp = compute_cpu_temp_averages(df_cpu_core_temp)
+    # Tell warm-up, steady-state and cooldown rows apart
+    if events_df is not None:
+        joined_df = label_phases(joined_df, events_df)
 
+    return joined_df
 
-    combined_df = df_cpu_avg_temp.join(df_cpu_avg_util)
 
-    # ensure timestamp column is the first column
-    combined_df = combined_df[['timestamp'] + [col for col in combined_df.columns if col != 'timestamp']]
+def build_dataset(directory=".", freq="1s", tolerance="1s", verbose=True, cpu_stats=("mean",), workers=1, tz=None,
+                  top_fields=False):
+    """
+    Function to build the model dataset from the diagnostic text files of one experiment.
 
-    # List of original column names
-    temp_cols = ["CPU_1_Avg_Temp", "CPU_2_Avg_Temp"]
-    util_cols = ["CPU_1_Avg_Util", "CPU_2_Avg_Util"]
+    Parameters:
+    directory (str): Folder holding telemetry.jsonl, or the separate CPU utilization, CPU temperature and GPU captures
+    freq (str): Spacing of the common time grid
+    tolerance (str): Largest clock difference allowed between a grid time and the sample used for it
+    verbose (bool): Whether to print the alignment report
+    cpu_stats (tuple): Reductions over all cores for the CPU columns; 'mean' gives CPU_Avg_Temp and CPU_Avg_Util,
+    'max', 'p95' and 'spread' add hotspot features such as CPU_Max_Temp
+    workers (int): Number of processes parsing chunks of each raw log in parallel
+    tz (str or tzinfo): Host zone, e.g. 'Asia/Kolkata', for captures whose `date` lines use an abbreviation missing
+    from TZ_ABBREVIATION_OFFSETS; by default the offset recorded with the temperatures
+    top_fields (bool): Whether to add the other time shares, load averages and task counts of `top` captures (see
+    clean_top_data); off by default so `top` experiments keep the columns of those from the Python collectors
 
-    # New column names
-    new_temp_col = "CPU_Avg_Temp"
-    new_util_col = "CPU_Avg_Util"
+    Returns:
+    pd.DataFrame: Dataset indexed by timestamp with the GPU and reduced CPU columns, followed by the CPU frequency,
+    disk, benchmark process and CPU power columns (see clean_cpufreq_data, clean_diskstats_data,
+    clean_drive_temp_data, clean_process_data and clean_rapl_data) when the experiment recorded them, by the
+    clean_top_data columns of `top` captures with 'top_fields', and by the 'phase', 'benchmark' and 'iteration' labels
+    of experiments run by run_experiment.py
+    """
+    cpu_util_file, cpu_util_parser = cpu_util_capture(directory)
+    cpu_temp_file, cpu_temp_parser = cpu_temp_capture(directory)
+    gpu_status_file, gpu_status_parser = gpu_status_capture(directory)
+
+    # nvidia-smi headers carry no timezone, so localize them with the zone recorded with the temperatures
+    if tz is None:
+        tz = capture_timezone(cpu_temp_file)
+
+    # One parse of a `top` capture gives both the per-thread user time and what `top` records besides it
+    top = top_capture(directory) if top_fields else None
+    if top is not None:
+        df_top = cached_parse(top[1], top[0], tz=tz, workers=workers, thread_field="user")
+        thread_columns = [column for column in df_top.columns if CPU_COLUMN_PATTERN.match(column)]
+        df_thread_util = df_top[["timestamp", *thread_columns]]
+    else:
+        df_thread_util = cached_parse(cpu_util_parser, cpu_util_file, tz=tz, workers=workers)
+    df_cpu_core_temp = cached_parse(cpu_temp_parser, cpu_temp_file, tz=tz, workers=workers)
+    gpu_status_df = cached_parse(gpu_status_parser, gpu_status_file, tz=tz, workers=workers)
+
+    # Frequencies and throttling, disk activity, drive temperatures, the benchmark's own usage and CPU power exist only
+    # in captures from the Python collectors; load averages, task counts and the other time shares only in `top` text
+    extra_streams = {}
+    for name, capture in (("cpufreq", cpufreq_capture(directory)), ("disk", disk_capture(directory)),
+                          ("drive_temp", drive_temp_capture(directory)), ("process", process_capture(directory)),
+                          ("rapl", rapl_capture(directory))):
+        if capture is not None:
+            extra_streams[name] = cached_parse(capture[1], capture[0], tz=tz, workers=workers)
+    if top is not None:
+        extra_streams["top"] = df_top.drop(columns=thread_columns)
+
+    events = events_capture(directory)
+    events_df = events[1](events[0], tz=tz) if events is not None else None
+
+    return assemble_dataset(df_thread_util, df_cpu_core_temp, gpu_status_df, extra_streams, events_df, freq, tolerance,
+                            verbose, cpu_stats)
 
-    combined_df[new_temp_col] = combined_df[temp_cols].mean(axis=1)  # Add new column with average temperature
-    combined_df[new_util_col] = combined_df[util_cols].mean(axis=1)  # Add new column with average utilization
-    combined_df.drop(columns=temp_cols + util_cols, inplace=True)  # Drop original columns
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the dataset of the experiment in the current folder.")
+    parser.add_argument("--tz", default=None,
+                        help="host zone, e.g. 'Asia/Kolkata', when the captures use a timezone abbreviation that is "
+                             "not recognised")
+    parser.add_argument("--top-fields", action="store_true",
+                        help="add the other time shares, load averages and task counts of `top` captures")
+    args = parser.parse_args()
 
     # Set pandas display option for column width
     pd.set_option('display.max_colwidth', None)
-    gpu_status_df = clean_gpu_status_data("gpu_status.txt")
-
-    # Clean shapes of all dataframes
-    combined_df, gpu_status_df = clean_shape_of_diagnostic_data(combined_df, gpu_status_df)
-
-    # Merge all the dataframes
-    joined_df = merge_diagnostic_data(gpu_status_df, combined_df)
 
-    # get GRAM column in format it will be in on Cloudsim+
-    joined_df['gpu_GRAM'] = joined_df['gpu_GRAM'].astype('float32') / 7611 * 100
+    # Build the dataset from the diagnostic files in the current folder, parsing large logs on every core
+    joined_df = build_dataset(".", workers=os.cpu_count(), tz=args.tz, top_fields=args.top_fields)
 
     # Get filename from user input
     filename = input("Provide a name for the dataset csv file: ")
@@ -409,6 +254,12 @@ def main():
     # Save the joined dataframe to a csv file
     joined_df.to_csv(f"{filename}.csv", index=False)
 
+    # Optionally also save a typed, compressed copy that loads without parsing text
+    extra_format = input(f"Also save as ({'/'.join(list(DATASET_FORMATS)[1:])}, blank for csv only): ").strip().lower()
+    if extra_format in DATASET_FORMATS and extra_format != "csv":
+        written = write_dataset(joined_df, f"{filename}{DATASET_FORMATS[extra_format]}", dataset_metadata("."))
+        print(f"Saved {written}")
 
-main()
 
+if __name__ == "__main__":
+    main()
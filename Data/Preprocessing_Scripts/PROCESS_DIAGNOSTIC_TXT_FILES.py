@@ -1,239 +1,36 @@
-import re
-import pandas as pd
-
-
-def clean_cpu_temp_data(filename):
-    """
-    Function to clean the CPU temperature data from a text file and convert it into a DataFrame.
-
-    Parameters:
-    filename (str): The name of the file containing CPU temperature data
-
-    Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU temperature data
-    """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['timestamp', 'CPU_1_Core_0', 'CPU_1_Core_1', 'CPU_1_Core_2', 'CPU_1_Core_3', 'CPU_1_Core_4',
-                 'CPU_1_Core_5', 'CPU_1_Core_6', 'CPU_1_Core_7', 'CPU_1_Core_8', 'CPU_1_Core_9', 'CPU_2_Core_0',
-                 'CPU_2_Core_1', 'CPU_2_Core_2', 'CPU_2_Core_3', 'CPU_2_Core_4', 'CPU_2_Core_5', 'CPU_2_Core_6',
-                 'CPU_2_Core_7', 'CPU_2_Core_8', 'CPU_2_Core_9']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Remove all occurrences of "Â°" from the text file
-    text_file = re.sub("Â°", "", text_file)
-
-    # Define the pattern for date and timezone
-    date_pattern = r"\D\D\D \D\D\D \d\d \d\d\:\d\d\:\d\d \D\D \D\D\D \d\d\d\d"
-    timezone = "PDT "
-
-    # Extract and parse timestamp data
-    for idx, temp_reading in enumerate(re.findall(date_pattern, text_file)):
-        # Remove timezone and convert the remaining string to datetime
-        temp_reading = re.sub(timezone, "", temp_reading)
-        dt = pd.to_datetime(temp_reading)
-        # Add the datetime to the DataFrame
-        df.at[idx, 'timestamp'] = dt
-
-    # Define the pattern for temperature readings
-    core_temps_separate_cpu_pattern = r"\D{4} \d{1,2}:\s{7,8}\+\d{2}.\d"
-    temp_pattern = r"(\d{2}.\d)"
-
-    # Initialize counting variables necessary for parsing the data to the correct location
-    core_counter = 0
-    outer_index = 0
-    core_name = 0
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all temperature readings
-        for temp_reading in re.findall(core_temps_separate_cpu_pattern, line):
-            # Determine which CPU the reading belongs to
-            if core_counter < 10:
-                cpu_num = 1
-            elif core_counter == 10:
-                # When moving to CPU 2, reset core_name
-                cpu_num = 2
-                core_name = 0
-            elif core_counter == 20:
-                # Reset counters when moving to a new set of readings
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1
-
-            # Extract just the temperature from the reading
-            temp = re.search(temp_pattern, temp_reading).group(1)
-
-            # Add the temperature to the DataFrame, constructing the column name based on cpu_num and core_name
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}'] = temp
-
-            # Increment the core_counter and core_name for the next iteration
-            core_counter += 1
-            core_name += 1
-
-    return df
-
-
-def clean_gpu_status_data(filename):
-    """
-    Function to clean the GPU status data from a text file and convert it into a DataFrame.
-
-    Parameters:
-    filename (str): The name of the file containing GPU status data
-
-    Returns:
-    pd.DataFrame: DataFrame containing cleaned GPU status data
-    """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ["gpu_temp", "gpu_power", "gpu_GRAM", "gpu_util"]
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
+import os
 
-    # Define the pattern for GPU temperature, power, GRAM, and utilization
-    gpu_temp_pattern = r"(\d{1,3})C"
-    gpu_power_pattern = r"(\d{1,2})W /"
-    gpu_GRAM_pattern = r"(\d{1,4})MiB /"
-    gpu_util_pattern = r"(\d{1,3})%"
-
-    # Parse the text file for each GPU parameter
-
-    # Find all GPU temperatures in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_temp_pattern, text_file)):
-        df.at[idx, "gpu_temp"] = reading
-
-    # Find all GPU power readings in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_power_pattern, text_file)):
-        df.at[idx, "gpu_power"] = reading
-
-    # Find all GPU GRAM readings in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_GRAM_pattern, text_file)):
-        df.at[idx, "gpu_GRAM"] = reading
-
-    # Find all GPU utilizations in text file and add to DataFrame
-    for idx, reading in enumerate(re.findall(gpu_util_pattern, text_file)):
-        df.at[idx, "gpu_util"] = reading
-
-    return df
-
-
-def clean_cpu_util_data(filename):
-    """
-    Function to clean the CPU utilization data from a text file and convert it into a DataFrame.
-
-    Parameters:
-    filename (str): The name of the file containing CPU utilization data
-
-    Returns:
-    pd.DataFrame: DataFrame containing cleaned CPU utilization data
-    """
-    # Open file and read its contents into 'text_file'
-    with open(filename, "r") as f:
-        text_file = f.read()
-
-    # Define column names for a DataFrame
-    col_names = ['CPU_1_Core_0_Thread_0', 'CPU_1_Core_0_Thread_1', 'CPU_1_Core_1_Thread_0', 'CPU_1_Core_1_Thread_1',
-                 'CPU_1_Core_2_Thread_0', 'CPU_1_Core_2_Thread_1',
-                 'CPU_1_Core_3_Thread_0', 'CPU_1_Core_3_Thread_1', 'CPU_1_Core_4_Thread_0', 'CPU_1_Core_4_Thread_1',
-                 'CPU_1_Core_5_Thread_0', 'CPU_1_Core_5_Thread_1',
-                 'CPU_1_Core_6_Thread_0', 'CPU_1_Core_6_Thread_1', 'CPU_1_Core_7_Thread_0', 'CPU_1_Core_7_Thread_1',
-                 'CPU_1_Core_8_Thread_0', 'CPU_1_Core_8_Thread_1',
-                 'CPU_1_Core_9_Thread_0', 'CPU_1_Core_9_Thread_1', 'CPU_2_Core_0_Thread_0', 'CPU_2_Core_0_Thread_1',
-                 'CPU_2_Core_1_Thread_0', 'CPU_2_Core_1_Thread_1',
-                 'CPU_2_Core_2_Thread_0', 'CPU_2_Core_2_Thread_1', 'CPU_2_Core_3_Thread_0', 'CPU_2_Core_3_Thread_1',
-                 'CPU_2_Core_4_Thread_0', 'CPU_2_Core_4_Thread_1',
-                 'CPU_2_Core_5_Thread_0', 'CPU_2_Core_5_Thread_1', 'CPU_2_Core_6_Thread_0', 'CPU_2_Core_6_Thread_1',
-                 'CPU_2_Core_7_Thread_0', 'CPU_2_Core_7_Thread_1',
-                 'CPU_2_Core_8_Thread_0', 'CPU_2_Core_8_Thread_1', 'CPU_2_Core_9_Thread_0', 'CPU_2_Core_9_Thread_1']
-
-    # Initialize DataFrame with defined column names
-    df = pd.DataFrame(columns=col_names)
-
-    # Define the pattern for CPU utilization
-    cpu_util_pattern = r"(\d{1,3}\.\d{1,2}) us"
-
-    # initialize the variables used to parse the data correctly
-    thread_counter = 0
-    outer_index = 0
-    core_name = 0
-    core_counter = 0
-    cpu_num = 1
-    has_data = False
-
-    # Parse each line of the file separately
-    for line in text_file.split('\n'):
-        # For each line, find all CPU utilizations
-        for reading in re.findall(cpu_util_pattern, line):
-            has_data = True  # Flag to indicate that data is found
-
-            # Add the utilization to the DataFrame
-            df.at[outer_index, f'CPU_{cpu_num}_Core_{core_name}_Thread_{thread_counter}'] = reading
-
-            # Since there are only 2 threads, increment the thread counter
-            thread_counter += 1
-
-        # We reset the thread count after finding both readings
-        thread_counter = 0
-
-        if has_data:
-            # Update core name if data has been processed
-            core_name += 1
-
-            # Determine which CPU, Core, and timestamp the reading belongs to
-            if core_counter < 9:
-                cpu_num = 1
-
-            elif core_counter == 9:
-                # Reset core name and update CPU number
-                core_name = 0
-                cpu_num = 2
-
-            # Increment core counter
-            core_counter += 1
-
-            # Reset counters if all cores and threads have been processed
-            if core_counter == 20:
-                cpu_num = 1
-                core_name = 0
-                core_counter = 0
-                outer_index += 1  # Increment index to move to the next row
-
-        # Reset the flag for the next iteration
-        has_data = False
+import pandas as pd
 
-    return df
+from diagnostic_parsers import capture_timezone, cpu_temp_capture, cpu_util_capture, gpu_status_capture
+from parse_cache import cached_parse
+from stream_alignment import align_streams
 
 
-def clean_shape_of_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df):
+def clean_shape_of_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df, freq="1s", tolerance="1s"):
     """
-    Function to trim the length of dataframes to match the smallest one.
+    Function to align the dataframes on a common time grid so that their rows match by timestamp.
 
     Parameters:
     cpu_temp_df (pd.DataFrame): DataFrame with CPU temperature data
     cpu_util_df (pd.DataFrame): DataFrame with CPU utilization data
     gpu_status_df (pd.DataFrame): DataFrame with GPU status data
+    freq (str): Spacing of the common time grid
+    tolerance (str): Largest clock difference allowed between a grid time and the sample used for it
 
     Returns:
-    Tuple[pd.DataFrame]: Three dataframes with synchronized lengths
+    Tuple[pd.DataFrame]: Three dataframes indexed by the same timestamps
     """
-    # Get the shapes of all dataframes
-    shapes = [cpu_temp_df.shape[0], cpu_util_df.shape[0], gpu_status_df.shape[0]]
+    streams = {"cpu_temp": cpu_temp_df, "cpu_util": cpu_util_df, "gpu_status": gpu_status_df}
+
+    # As-of join every stream onto one grid instead of cutting them to the shortest length
+    aligned_df, report = align_streams(streams, freq, tolerance)
 
-    # Find the smallest length
-    smallest = min(shapes)
+    # Report how many samples were matched, repeated to fill a gap, missing, or dropped
+    print(report.to_string())
 
-    # Return new dataframes of the smallest length
-    return cpu_temp_df[:smallest], cpu_util_df[:smallest], gpu_status_df[:smallest]
+    # Split the aligned columns back into one dataframe per stream
+    return tuple(aligned_df[[col for col in df.columns if col != 'timestamp']] for df in streams.values())
 
 
 def merge_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df):
@@ -248,12 +45,11 @@ def merge_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df):
     Returns:
     pd.DataFrame: Merged dataframe of all the input dataframes
     """
-    # Join CPU dataframes on index
+    # Join CPU dataframes on their shared 'timestamp' index
     cpu_joined_df = cpu_temp_df.join(cpu_util_df)
 
     # Join the resultant CPU dataframe with GPU dataframe
-    # Set 'timestamp' as the index of the final dataframe
-    all_joined_df = cpu_joined_df.join(gpu_status_df).set_index('timestamp')
+    all_joined_df = cpu_joined_df.join(gpu_status_df)
 
     return all_joined_df
 
@@ -265,12 +61,18 @@ def main():
     # Set pandas display option for column width
     pd.set_option('display.max_colwidth', None)
 
+    # nvidia-smi headers carry no timezone, so localize them with the zone recorded with the temperatures
+    cpu_temp_file, cpu_temp_parser = cpu_temp_capture()
+    tz = capture_timezone(cpu_temp_file)
+
     # Call cleaning functions for each dataset
-    cpu_temp_df = clean_cpu_temp_data("cpu_temp.txt")
-    cpu_util_df = clean_cpu_util_data("cpu_util.txt")
-    gpu_status_df = clean_gpu_status_data("gpu_status.txt")
+    cpu_temp_df = cached_parse(cpu_temp_parser, cpu_temp_file, tz=tz, workers=os.cpu_count())
+    cpu_util_file, cpu_util_parser = cpu_util_capture()
+    cpu_util_df = cached_parse(cpu_util_parser, cpu_util_file, tz=tz, workers=os.cpu_count())
+    gpu_status_file, gpu_status_parser = gpu_status_capture()
+    gpu_status_df = cached_parse(gpu_status_parser, gpu_status_file, tz=tz, workers=os.cpu_count())
 
-    # Clean shapes of all dataframes
+    # Align all dataframes by timestamp
     cpu_temp_df, cpu_util_df, gpu_status_df = clean_shape_of_diagnostic_data(cpu_temp_df, cpu_util_df, gpu_status_df)
 
     # Merge all the dataframes
@@ -284,4 +86,5 @@ def main():
 
 
 # Execute main function
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
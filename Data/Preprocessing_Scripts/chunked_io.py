@@ -0,0 +1,342 @@
+import io
+import lzma
+import mmap
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Bytes of raw log handed to a parser at a time; peak memory scales with this rather than with the file size
+DEFAULT_CHUNK_SIZE = 64 << 20
+
+# Suffixes of the compressed copies of a raw log, tried in this order when looking for a capture
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".zst")
+
+# Leading bytes of each compressed format, which is recognised from them rather than from the file name
+COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"\xfd7zXZ\x00": "xz", b"\x28\xb5\x2f\xfd": "zstd"}
+
+# Compressed bytes fed to the decompressor at a time
+COMPRESSED_READ_SIZE = 1 << 20
+
+
+def _zstandard():
+    """
+    Function to import zstandard, which .zst logs need, returning None when it is not installed.
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def log_path(directory, file_name):
+    """
+    Function to find a raw log in an experiment folder, or its compressed copy when only that exists.
+
+    Parameters:
+    directory (str): Experiment folder
+    file_name (str): Name of the uncompressed log, e.g. cpu_util.txt
+
+    Returns:
+    str: Path of the log, of the first of its COMPRESSED_SUFFIXES copies that exists, or of the (missing) log
+    """
+    path = os.path.join(directory, file_name)
+    if os.path.exists(path):
+        return path
+    return next((path + suffix for suffix in COMPRESSED_SUFFIXES if os.path.exists(path + suffix)), path)
+
+
+def compression_of(filename):
+    """
+    Function to tell which format a raw log is compressed with from its leading bytes.
+
+    Parameters:
+    filename (str): Raw log
+
+    Returns:
+    str: 'gzip', 'xz' or 'zstd', or None for an uncompressed file
+    """
+    with open(filename, "rb") as f:
+        head = f.read(6)
+    return next((name for magic, name in COMPRESSION_MAGIC.items() if head.startswith(magic)), None)
+
+
+def _decompressor(compression, filename):
+    """
+    Function to create the decompressor of one gzip member, xz stream or zstd frame.
+    """
+    if compression == "gzip":
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if compression == "xz":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+
+    zstandard = _zstandard()
+    if zstandard is None:
+        raise ImportError(f"Reading {filename} needs zstandard")
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Stream of the decompressed contents of a gzip, xz or zstd log, read without a temporary file.
+
+    The collectors flush a complete block every second and append a new member (or stream, or frame) each time they
+    reopen a file, so every member is read in turn. A log that ends mid-member, as one left by a killed collector
+    does, ends at the last complete block instead of raising an error.
+    """
+
+    def __init__(self, filename, compression):
+        self.filename = filename
+        self.compression = compression
+        self.file = open(filename, "rb")
+        self.decompressor = _decompressor(compression, filename)
+        self.pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            data = b""
+            if self.decompressor.eof:
+                # The rest of the input belongs to the next member
+                data = self.decompressor.unused_data
+                self.decompressor = _decompressor(self.compression, self.filename)
+            data = data or self.file.read(COMPRESSED_READ_SIZE)
+            if not data:
+                return 0
+            self.pending = memoryview(self.decompressor.decompress(data))
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def open_log(filename):
+    """
+    Function to open a raw log for reading as bytes, decompressing it as a stream when it is compressed.
+
+    Parameters:
+    filename (str): Raw log, compressed or not
+
+    Returns:
+    io.BufferedReader: Binary stream of the uncompressed contents
+    """
+    compression = compression_of(filename)
+    if compression is None:
+        return open(filename, "rb")
+    return io.BufferedReader(DecompressingReader(filename, compression), buffer_size=COMPRESSED_READ_SIZE)
+
+
+def open_text_log(filename):
+    """
+    Function to open a raw log, compressed or not, as text; undecodable bytes are replaced.
+    """
+    return io.TextIOWrapper(open_log(filename), encoding="utf-8", errors="replace")
+
+
+def record_spans(filename, record_pattern, chunk_size=DEFAULT_CHUNK_SIZE, span=None):
+    """
+    Function to cut a raw log into byte ranges of about 'chunk_size' that each start on a record boundary.
+
+    The file is memory-mapped and only searched near each cut point, so finding the boundaries never reads the
+    whole file into memory.
+
+    Parameters:
+    filename (str): Raw log to cut
+    record_pattern (re.Pattern): Bytes pattern matching the first line of a record, e.g. rb'^top - ' with re.M
+    chunk_size (int): Target size of each range in bytes
+    span (tuple): (start, end) byte offsets to cut instead of the whole file; 'start' must be a record boundary
+
+    Returns:
+    list: (start, end) byte offsets covering the whole file (or 'span') in order; empty when there is nothing
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    with open(filename, "rb") as f:
+        start, size = span if span is not None else (0, os.fstat(f.fileno()).st_size)
+        if size <= start:
+            return []
+
+        bounds = [start]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            position = start + chunk_size
+            while position < size:
+                # Cut before the first record that starts at or after the target offset
+                match = record_pattern.search(mapped, position, size)
+                if match is None:
+                    break
+                bounds.append(match.start())
+                position = match.start() + chunk_size
+
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_span(filename, span):
+    """
+    Function to read one byte range of a raw log as text through a memory map.
+
+    Parameters:
+    filename (str): Raw log
+    span (tuple): (start, end) byte offsets from record_spans
+
+    Returns:
+    str: The decoded range; undecodable bytes (e.g. a degree sign in another encoding) are replaced
+    """
+    start, end = span
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped[start:end].decode("utf-8", errors="replace")
+
+
+def _parse_span(parser, filename, args, span):
+    """
+    Function to read one range and parse it; module-level so worker processes can unpickle it.
+    """
+    return parser(read_span(filename, span), *args)
+
+
+def map_spans(parser, filename, spans, args=(), workers=1):
+    """
+    Function to parse every byte range of a raw log, in worker processes when asked, returning results in file order.
+
+    Parameters:
+    parser (callable): Module-level function taking the range's text followed by 'args'
+    filename (str): Raw log
+    spans (list): Byte ranges from record_spans
+    args (tuple): Extra positional arguments for the parser
+    workers (int): Number of worker processes; 1 parses the ranges one after another in this process
+
+    Returns:
+    list: The parser's result for each range, in the order of 'spans'
+    """
+    task = partial(_parse_span, parser, filename, args)
+    if workers > 1 and len(spans) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(spans))) as pool:
+            return list(pool.map(task, spans))
+
+    return [task(span) for span in spans]
+
+
+def stream_chunks(filename, record_pattern, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function to read a raw log front to back in pieces of about 'chunk_size' that each start on a record boundary,
+    the way record_spans cuts a file that can be memory-mapped.
+
+    Compressed logs cannot be seeked into, so this decompresses them as a stream; at most two pieces of
+    uncompressed text are held at a time.
+
+    Parameters:
+    filename (str): Raw log, compressed or not
+    record_pattern (re.Pattern): Bytes pattern matching the first line of a record
+    chunk_size (int): Target size of each piece in bytes
+
+    Returns:
+    Iterator[str]: The decoded pieces in file order
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    with open_log(filename) as stream:
+        pending = b""
+        for block in iter(lambda: stream.read(chunk_size), b""):
+            pending += block
+            # Cut before the first record that starts at or after the target size; the rest waits for more input
+            match = record_pattern.search(pending, chunk_size)
+            if match is not None:
+                yield pending[:match.start()].decode("utf-8", errors="replace")
+                pending = pending[match.start():]
+        if pending:
+            yield pending.decode("utf-8", errors="replace")
+
+
+def first_chunk(filename, record_pattern, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Function to read only the first piece of a raw log that map_records would parse, or '' for an empty log.
+    """
+    if compression_of(filename) is None:
+        spans = record_spans(filename, record_pattern, chunk_size)
+        return read_span(filename, spans[0]) if spans else ""
+
+    chunks = stream_chunks(filename, record_pattern, chunk_size)
+    try:
+        return next(chunks, "")
+    finally:
+        chunks.close()
+
+
+def map_records(parser, filename, record_pattern, args=(), chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to parse a raw log in pieces cut on record boundaries, compressed or not, returning results in file
+    order.
+
+    Uncompressed logs are memory-mapped and cut with record_spans. Compressed logs are decompressed as a stream in
+    this process; with 'workers > 1' the pieces are parsed in worker processes while the next ones are decompressed,
+    with at most two pieces per worker waiting.
+
+    Parameters:
+    parser (callable): Module-level function taking a piece's text followed by 'args'
+    filename (str): Raw log
+    record_pattern (re.Pattern): Bytes pattern matching the first line of a record
+    args (tuple): Extra positional arguments for the parser
+    chunk_size (int): Target size of each piece in bytes
+    workers (int): Number of worker processes
+    span (tuple): (start, end) byte offsets of an uncompressed log to parse instead of the whole file, e.g. the
+    records appended since the last call (see complete_records_end)
+
+    Returns:
+    list: The parser's result for each piece, in file order
+    """
+    if compression_of(filename) is None:
+        return map_spans(parser, filename, record_spans(filename, record_pattern, chunk_size, span), args, workers)
+    if span is not None:
+        raise ValueError(f"{filename} is compressed, so it can only be parsed whole")
+
+    chunks = stream_chunks(filename, record_pattern, chunk_size)
+    if workers <= 1:
+        return [parser(text, *args) for text in chunks]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        waiting = deque()
+        for text in chunks:
+            waiting.append(pool.submit(parser, text, *args))
+            if len(waiting) >= 2 * workers:
+                results.append(waiting.popleft().result())
+        results.extend(future.result() for future in waiting)
+    return results
+
+
+def complete_records_end(filename, start=0, block_size=1 << 16):
+    """
+    Function to find where the complete lines of a growing log end, so a record a collector is still writing is
+    left for the next call.
+
+    Only the end of the file is read, backwards from its current size until a newline is found.
+
+    Parameters:
+    filename (str): Uncompressed log that is being appended to
+    start (int): Byte offset already parsed; the result is never before it
+    block_size (int): Bytes read per step backwards
+
+    Returns:
+    int: Byte offset just past the last newline at or after 'start', or 'start' when there is none
+    """
+    with open(filename, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        while end > start:
+            block_start = max(end - block_size, start)
+            f.seek(block_start)
+            newline = f.read(end - block_start).rfind(b"\n")
+            if newline >= 0:
+                return block_start + newline + 1
+            end = block_start
+    return start
@@ -0,0 +1,143 @@
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Per-core or per-thread column written by the parsers: 'CPU_{socket}_Core_{core}' or 'CPU_{socket}_Core_{core}_Thread_{thread}'
+CPU_COLUMN_PATTERN = re.compile(r"CPU_(\d+)_Core_(\d+)(?:_Thread_(\d+))?$")
+
+# Supported reductions and the label each one gets in the output column names
+STAT_LABELS = {"mean": "Avg", "max": "Max", "p95": "P95", "spread": "Spread"}
+
+# Axes of the (time, socket, core, thread) tensor folded together at each reduction level
+LEVEL_AXES = {"core": (3,), "socket": (2, 3), "package": (1, 2, 3)}
+
+
+def cpu_tensor(df):
+    """
+    Function to view the per-core or per-thread columns of a parsed frame as a (time, socket, core, thread) array.
+
+    Sockets, cores and threads are read from the column names rather than assumed. When the columns are already
+    in socket, core, thread order (as the parsers write them) the array is a reshape of the frame's values;
+    otherwise they are scattered into place and missing combinations are NaN. Temperature frames have no thread
+    level and get a thread axis of length one.
+
+    Parameters:
+    df (pd.DataFrame): Frame from clean_cpu_util_data or clean_cpu_temp_data; other columns are ignored
+
+    Returns:
+    Tuple[np.ndarray, list, list]: The float array, the socket numbers and the core numbers along its axes
+    """
+    columns = []
+    labels = []
+    for column in df.columns:
+        match = CPU_COLUMN_PATTERN.match(str(column))
+        if match:
+            columns.append(column)
+            labels.append((int(match.group(1)), int(match.group(2)), int(match.group(3) or 0)))
+    if not columns:
+        raise ValueError("No 'CPU_{socket}_Core_{core}[_Thread_{thread}]' columns to reduce")
+
+    sockets, socket_index = np.unique([label[0] for label in labels], return_inverse=True)
+    cores, core_index = np.unique([label[1] for label in labels], return_inverse=True)
+    threads, thread_index = np.unique([label[2] for label in labels], return_inverse=True)
+    shape = (len(df), len(sockets), len(cores), len(threads))
+
+    values = df[columns].to_numpy()
+    flat_index = np.ravel_multi_index((socket_index, core_index, thread_index), shape[1:])
+    if len(columns) == np.prod(shape[1:]) and np.array_equal(flat_index, np.arange(len(columns))):
+        tensor = values.reshape(shape)
+    else:
+        tensor = np.full((len(df), np.prod(shape[1:])), np.nan, dtype=values.dtype)
+        tensor[:, flat_index] = values
+        tensor = tensor.reshape(shape)
+
+    return tensor, sockets.tolist(), cores.tolist()
+
+
+def reduce_cpu_tensor(tensor, axes, stats=("mean",)):
+    """
+    Function to compute several reductions over the same axes of a CPU tensor in one pass over the data.
+
+    Parameters:
+    tensor (np.ndarray): Array of shape (time, socket, core, thread)
+    axes (tuple): Trailing axes to reduce, e.g. (3,) for per core or (2, 3) for per socket
+    stats (tuple): Any of 'mean', 'max', 'p95' (95th percentile) and 'spread' (max minus min)
+
+    Returns:
+    dict: Reduction name to float64 array holding the remaining leading axes
+    """
+    unknown = [stat for stat in stats if stat not in STAT_LABELS]
+    if unknown:
+        raise ValueError(f"Unknown reductions {unknown}, expected any of {list(STAT_LABELS)}")
+
+    # Fold the reduced axes into one so every reduction runs along the last axis of a single view
+    kept_shape = tensor.shape[:tensor.ndim - len(axes)]
+    folded = int(np.prod(tensor.shape[len(kept_shape):]))
+    members = tensor.reshape(kept_shape + (folded,)).astype(np.float64, copy=False)
+
+    # NaN-aware reductions are several times slower, so only use them when a reading is actually missing
+    has_missing = bool(np.isnan(members).any())
+    with warnings.catch_warnings():
+        # All-NaN slices (no reading at that time) reduce to NaN without a warning per call
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean, maximum, minimum, percentile = ((np.nanmean, np.nanmax, np.nanmin, np.nanpercentile) if has_missing
+                                              else (np.mean, np.max, np.min, np.percentile))
+        results = {}
+        if "mean" in stats:
+            results["mean"] = mean(members, axis=-1)
+        if "max" in stats or "spread" in stats:
+            highest = maximum(members, axis=-1)
+            if "max" in stats:
+                results["max"] = highest
+            if "spread" in stats:
+                results["spread"] = highest - minimum(members, axis=-1)
+        if "p95" in stats:
+            results["p95"] = percentile(members, 95, axis=-1)
+
+    return {stat: results[stat] for stat in stats}
+
+
+def reduce_cpu_columns(df, level, metric, stats=("mean",)):
+    """
+    Function to reduce the per-core or per-thread columns of a parsed frame per core, per socket or per package.
+
+    Columns come out in a stable order: grouped by reduction in the order given, then by socket and core.
+
+    Parameters:
+    df (pd.DataFrame): Frame from clean_cpu_util_data or clean_cpu_temp_data, optionally with a 'timestamp' column
+    level (str): 'core' (over threads), 'socket' (over cores and threads) or 'package' (over everything)
+    metric (str): Suffix of the output names, e.g. 'Util' or 'Temp'
+    stats (tuple): Reductions to compute, see reduce_cpu_tensor
+
+    Returns:
+    pd.DataFrame: One column per reduction and location ('CPU_1_Core_0_Avg_Util', 'CPU_2_Max_Temp',
+    'CPU_P95_Temp', ...), followed by the 'timestamp' column when the input has one
+    """
+    if level not in LEVEL_AXES:
+        raise ValueError(f"Unknown level '{level}', expected any of {list(LEVEL_AXES)}")
+
+    tensor, sockets, cores = cpu_tensor(df)
+    reduced = reduce_cpu_tensor(tensor, LEVEL_AXES[level], stats)
+
+    if level == "core":
+        locations = [f"CPU_{socket}_Core_{core}_" for socket in sockets for core in cores]
+    elif level == "socket":
+        locations = [f"CPU_{socket}_" for socket in sockets]
+    else:
+        locations = ["CPU_"]
+
+    results = {}
+    for stat, values in reduced.items():
+        values = values.reshape(len(df), len(locations))
+        for position, location in enumerate(locations):
+            results[f"{location}{STAT_LABELS[stat]}_{metric}"] = values[:, position]
+
+    df_result = pd.DataFrame(results, index=df.index)
+
+    # Add back the timestamp
+    if "timestamp" in df.columns:
+        df_result["timestamp"] = df["timestamp"]
+
+    return df_result
@@ -0,0 +1,276 @@
+import datetime
+import json
+import os
+import re
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# File extension of every supported dataset format; everything but CSV keeps column types
+DATASET_FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather", "npz": ".npz"}
+
+# Key the experiment metadata is stored under in Parquet/Feather schemas and .npz files
+METADATA_KEY = "thermal_energy_dataset"
+
+
+def _pyarrow():
+    """
+    Function to import pyarrow, which Parquet and Feather need, returning None when it is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def _tz_to_json(tz):
+    """
+    Function to describe a timezone so it can be rebuilt after loading: a fixed offset or a named zone.
+    """
+    if isinstance(tz, datetime.timezone):
+        return {"offset": tz.utcoffset(None).total_seconds() / 60, "name": tz.tzname(None)}
+    return {"zone": str(tz)}
+
+
+def _tz_from_json(description):
+    """
+    Function to rebuild a timezone written by _tz_to_json.
+    """
+    if "offset" in description:
+        return datetime.timezone(datetime.timedelta(minutes=description["offset"]), description["name"])
+    return description["zone"]
+
+
+def replace_file(path, write, mode="wb"):
+    """
+    Function to write a file next to its destination and rename it into place, so a crash never leaves a
+    half-written file behind.
+
+    The file gets the permissions a plain open() would give it under the current umask, and the temporary file is
+    removed if writing fails.
+
+    Parameters:
+    path (str): Destination file
+    write (callable): Function writing the contents to the open temporary file
+    mode (str): 'wb' for binary contents, 'w' for text
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    with tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path) or ".", suffix=os.path.splitext(path)[1],
+                                     delete=False) as tmp:
+        try:
+            write(tmp)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    try:
+        os.chmod(tmp.name, 0o666 & ~umask)
+        os.replace(tmp.name, path)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+
+
+def save_frame(df, path, metadata=None, compressed=False):
+    """
+    Function to store a DataFrame as typed column arrays in an .npz file, written atomically.
+
+    Parameters:
+    df (pd.DataFrame): Frame with numeric, datetime and string columns
+    path (str): Destination .npz file
+    metadata (dict): JSON-serializable values stored alongside the columns
+    compressed (bool): Whether to deflate the arrays (smaller files, slower to write and load)
+    """
+    arrays = {}
+    columns = []
+    for position, (name, column) in enumerate(df.items()):
+        key = f"column_{position}"
+        if isinstance(column.dtype, pd.DatetimeTZDtype):
+            arrays[key] = column.array.asi8
+            columns.append({"name": name, "kind": "datetime", "tz": _tz_to_json(column.dt.tz)})
+        elif pd.api.types.is_datetime64_dtype(column.dtype):
+            arrays[key] = column.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            columns.append({"name": name, "kind": "datetime"})
+        elif pd.api.types.is_string_dtype(column.dtype):
+            # Fixed-width unicode, since object arrays could only be loaded back with pickle
+            arrays[key] = column.to_numpy(dtype=str)
+            columns.append({"name": name, "kind": "array"})
+        else:
+            arrays[key] = column.to_numpy()
+            columns.append({"name": name, "kind": "array"})
+    arrays["meta"] = np.array(json.dumps({"columns": columns, METADATA_KEY: metadata or {}}))
+
+    replace_file(path, lambda f: (np.savez_compressed if compressed else np.savez)(f, **arrays))
+
+
+def load_frame(path, columns=None):
+    """
+    Function to load a DataFrame written by save_frame, reading only the requested columns.
+
+    Parameters:
+    path (str): .npz file
+    columns (list): Columns to load; all when omitted
+
+    Returns:
+    pd.DataFrame: The stored frame with its original dtypes and its metadata in df.attrs['metadata']
+    """
+    with np.load(path, allow_pickle=False) as stored:
+        meta = json.loads(str(stored["meta"]))
+        positions = {column["name"]: position for position, column in enumerate(meta["columns"])}
+        missing = [name for name in (columns or []) if name not in positions]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in {path}")
+
+        data = {}
+        for name in (columns if columns is not None else list(positions)):
+            column = meta["columns"][positions[name]]
+            values = stored[f"column_{positions[name]}"]
+            if column["kind"] == "datetime":
+                values = pd.DatetimeIndex(values.view("datetime64[ns]"))
+                if "tz" in column:
+                    values = values.tz_localize("UTC").tz_convert(_tz_from_json(column["tz"]))
+            data[name] = values
+
+    df = pd.DataFrame(data)
+    df.attrs["metadata"] = meta.get(METADATA_KEY, {})
+    return df
+
+
+def typed_columns(df):
+    """
+    Function to narrow the float64 columns of a dataset to float32; sensor readings carry far less precision.
+
+    Parameters:
+    df (pd.DataFrame): Dataset to narrow
+
+    Returns:
+    pd.DataFrame: Copy with float32 in place of float64
+    """
+    return df.astype({name: np.float32 for name, dtype in df.dtypes.items() if dtype == np.float64})
+
+
+def dataset_metadata(folder, **settings):
+    """
+    Function to describe where a processed dataset came from, to store alongside it.
+
+    The benchmark is read from the experiment folder name by dropping an '_exp_<n>' suffix, the naming used for
+    every experiment so far ('blackscholes_exp_2' ran 'blackscholes'). The per-run energy totals energy_meter.py
+    appends to energy.jsonl are included when the folder has them.
+
+    Parameters:
+    folder (str): Experiment folder the dataset was built from
+    **settings: Processing settings worth recording, e.g. freq and tolerance
+
+    Returns:
+    dict: 'experiment', 'benchmark', 'created', 'runs' when energy was measured, and the settings
+    """
+    experiment = os.path.basename(os.path.normpath(os.path.abspath(folder)))
+    metadata = {"experiment": experiment, "benchmark": re.sub(r"_exp_?\d+$", "", experiment),
+                "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")}
+
+    energy_file = os.path.join(folder, "energy.jsonl")
+    if os.path.exists(energy_file):
+        with open(energy_file) as f:
+            metadata["runs"] = [json.loads(line) for line in f if line.strip()]
+
+    return {**metadata, **settings}
+
+
+def write_dataset(df, path, metadata=None):
+    """
+    Function to write a processed dataset in the format given by the file extension.
+
+    Parquet and Feather are zstd-compressed and need pyarrow; without it the dataset is written as a compressed
+    .npz instead. Every format but CSV stores float32 columns and the metadata.
+
+    Parameters:
+    df (pd.DataFrame): Dataset to write
+    path (str): Destination ending in .csv, .parquet, .feather or .npz
+    metadata (dict): JSON-serializable description of the dataset, see dataset_metadata
+
+    Returns:
+    str: Path actually written
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DATASET_FORMATS.values():
+        raise ValueError(f"Unknown dataset format '{extension}', expected one of {list(DATASET_FORMATS.values())}")
+
+    if extension == ".csv":
+        df.to_csv(path, index=False)
+        return path
+
+    df = typed_columns(df)
+    pyarrow = _pyarrow() if extension in (".parquet", ".feather") else None
+    if extension in (".parquet", ".feather") and pyarrow is None:
+        path = os.path.splitext(path)[0] + ".npz"
+        warnings.warn(f"pyarrow is not installed, writing {path} instead")
+        extension = ".npz"
+
+    if extension == ".npz":
+        save_frame(df, path, metadata, compressed=True)
+        return path
+
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           METADATA_KEY.encode(): json.dumps(metadata or {}).encode()})
+    if extension == ".parquet":
+        pyarrow.parquet.write_table(table, path, compression="zstd")
+    else:
+        pyarrow.feather.write_feather(table, path, compression="zstd")
+    return path
+
+
+def read_dataset(path, columns=None):
+    """
+    Function to read a dataset written by write_dataset, loading only the requested columns.
+
+    Parameters:
+    path (str): .csv, .parquet, .feather or .npz file
+    columns (list): Columns to load; all when omitted
+
+    Returns:
+    pd.DataFrame: The dataset, with its metadata in df.attrs['metadata'] (empty for CSV)
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        df = pd.read_csv(path, usecols=columns)
+        df.attrs["metadata"] = {}
+        return df[columns] if columns is not None else df
+    if extension == ".npz":
+        return load_frame(path, columns)
+
+    pyarrow = _pyarrow()
+    if pyarrow is None:
+        raise ImportError(f"Reading {path} needs pyarrow")
+    if extension == ".parquet":
+        table = pyarrow.parquet.read_table(path, columns=columns)
+    elif extension == ".feather":
+        table = pyarrow.feather.read_table(path, columns=columns, memory_map=True)
+    else:
+        raise ValueError(f"Unknown dataset format '{extension}', expected one of {list(DATASET_FORMATS.values())}")
+
+    df = table.to_pandas()
+    df.attrs["metadata"] = json.loads((table.schema.metadata or {}).get(METADATA_KEY.encode(), b"{}"))
+    return df
+
+
+def find_dataset(stem):
+    """
+    Function to find the stored copy of a dataset, preferring typed formats over CSV.
+
+    Parameters:
+    stem (str): Path without extension, e.g. 'blackscholes_exp_2'
+
+    Returns:
+    str: The first of '<stem>.parquet', '.feather', '.npz' and '.csv' that exists
+    """
+    for extension in (".parquet", ".feather", ".npz", ".csv"):
+        if os.path.exists(stem + extension):
+            return stem + extension
+    raise FileNotFoundError(f"No dataset named {stem} with any of {list(DATASET_FORMATS.values())}")
@@ -0,0 +1,1413 @@
+import datetime
+import itertools
+import json
+import os
+import re
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from chunked_io import DEFAULT_CHUNK_SIZE, first_chunk, log_path, map_records, open_text_log
+
+# Default topology of the collection server: 2 sockets x 10 cores x 2 hardware threads
+DEFAULT_SOCKETS = 2
+DEFAULT_CORES = 10
+DEFAULT_THREADS = 2
+
+# Version of the parsed output below; bump it whenever a parser changes what it returns so cached parses are redone
+PARSER_VERSION = 2
+
+# Time shares `top -1` prints for every logical CPU ("%Cpu0  :  1.0 us,  0.3 sy,  0.0 ni, 98.7 id, ..."), in its
+# order and named like the /proc/stat fields of the Python collectors
+TOP_FIELDS = ("user", "system", "nice", "idle", "iowait", "irq", "softirq", "steal")
+
+# Per-frame values of the `top -` and `Tasks:` header lines, in record order
+TOP_FRAME_FIELDS = ("load_1m", "load_5m", "load_15m", "tasks_total", "tasks_running", "tasks_sleeping",
+                    "tasks_stopped", "tasks_zombie")
+
+# Precompiled pattern for the lines holding per-CPU readings; one or more CPUs are printed per line. Finding whole
+# lines is several times faster than matching every field, so the fields are decoded from them with numpy.
+CPU_LINE_PATTERN = re.compile(r"^%Cpu.*$", re.M)
+
+# Precompiled pattern for one CPU's eight time shares, used only for lines the vectorized decoder rejects
+CPU_FIELDS_PATTERN = re.compile(r"%Cpu\S* *: *" + ", *".join(rf"(\d{{1,3}}\.\d{{1,2}}) {name}"
+                                                          for name in ("us", "sy", "ni", "id", "wa", "hi", "si", "st")))
+
+# Precompiled pattern for `sensors` output. Each match is either the coretemp adapter header opening a socket's
+# block (group 1) or a per-core reading inside it ("Core 12:       +45.0°C  (high = ...)", groups 2 and 3),
+# returned in file order so one findall recovers which block every reading belongs to.
+SENSORS_LINE_PATTERN = re.compile(r"^(?:coretemp-isa-(\w+)|Core (\d+): +\+?(-?\d+\.?\d*))", re.M)
+
+# Precompiled pattern for `date` output in either locale form ("Tue Jul  4 01:02:03 PM PDT 2023" or
+# "Tue Jul  4 13:02:03 PDT 2023"): month, day, hour, minute, second, AM/PM, timezone, year.
+# The timezone is optional so the same pattern also reads nvidia-smi frame headers.
+DATE_LINE_PATTERN = re.compile(r"^[A-Z][a-z]{2} ([A-Z][a-z]{2}) +(\d{1,2}) (\d{1,2}):(\d{2}):(\d{2})(?: ([AP]M))?"
+                               r"(?: ([A-Z]{1,5}|[+-]\d{2}(?::?\d{2})?))? (\d{4})[ \t]*$", re.M)
+
+# Precompiled pattern for the wall-clock time at the start of every `top` frame ("top - 13:02:03 up ...").
+# Left unanchored so the literal prefix is searched for directly rather than tried at every line start.
+TOP_TIME_PATTERN = re.compile(r"top - (\d{2}):(\d{2}):(\d{2})")
+
+# Precompiled pattern for a whole `top` frame header: the clock time and load averages of the "top - " line and the
+# task counts of the "Tasks:" line below it, either of which may be missing from damaged captures
+TOP_FRAME_PATTERN = re.compile(r"top - (\d{2}):(\d{2}):(\d{2})(?:.*load average: ([\d.]+), ([\d.]+), ([\d.]+))?"
+                               r"(?:\s*Tasks: *(\d+) total, *(\d+) running, *(\d+) sleeping, *(\d+) stopped,"
+                               r" *(\d+) zombie)?")
+
+# Precompiled pattern for one pass over `nvidia-smi -l 1` output. Each match is one of, in file order:
+#   the frame header date line (group 1),
+#   a device line "|   0  Tesla P4   Off  | 00000000:3B:00.0 Off |" carrying the GPU index (group 2), or
+#   its stats line "| N/A   30C  P8   6W /  75W |   0MiB /  7611MiB |   0%   Default |" carrying fan, temperature,
+#   power draw, power cap, memory used, memory total and utilization (groups 3-9).
+# The bus id check keeps rows of the "Processes" table from being taken as device lines.
+NVIDIA_SMI_LINE_PATTERN = re.compile(
+    r"^(?:([A-Z][a-z]{2} [A-Z][a-z]{2} +\d{1,2} \d{1,2}:\d{2}:\d{2}(?: [AP]M)?(?: [A-Z]{1,5})? \d{4})"
+    r"|\|\s+(\d+)\s+[^|]*\|\s*[0-9A-Fa-f]+:[0-9A-Fa-f]{2}:[0-9A-Fa-f]{2}\.\d"
+    r"|\|\s*(\d+|N/A)%?\s+(\d+)C\s+\S+\s+([\d.]+|N/A)W\s*/\s*([\d.]+|N/A)W\s*\|"
+    r"\s*(\d+)MiB\s*/\s*(\d+)MiB\s*\|\s*(\d+|N/A)%)", re.M)
+
+# Precompiled bytes patterns for the first line of one record, used to cut large captures into chunks without
+# splitting a record: a `top` frame in cpu_util.txt, and the `date` line opening each sample of cpu_temp.txt and each
+# frame of gpu_status.txt.
+TOP_RECORD_PATTERN = re.compile(rb"^top - ", re.M)
+DATE_RECORD_PATTERN = re.compile(rb"^[A-Z][a-z]{2} [A-Z][a-z]{2} +\d{1,2} \d{1,2}:\d{2}:\d{2}", re.M)
+
+# Precompiled bytes pattern for the start of a sample record in the JSON-lines output of the Python collectors
+# (Data_Collection_Scripts); the header line that opens each file describes the columns instead.
+JSON_RECORD_PATTERN = re.compile(rb'^\{"time"', re.M)
+
+# Drive sensors among the hwmon columns: NVMe controllers and SATA/SAS drives through the drivetemp driver
+DRIVE_SENSOR_PATTERN = re.compile(r"(nvme|drivetemp)_")
+
+# RAPL zones of whole CPU packages and of their DRAM, as named by rapl_sampler.py
+RAPL_PACKAGE_PATTERN = re.compile(r"package_\d+$")
+RAPL_DRAM_PATTERN = re.compile(r"package_\d+_dram$")
+
+# Columns of the per-device GPU records, in the order of NVIDIA_SMI_LINE_PATTERN's stats groups
+GPU_STATUS_COLUMNS = ["gpu_fan", "gpu_temp", "gpu_power", "gpu_power_cap", "gpu_GRAM", "gpu_GRAM_total", "gpu_util"]
+
+# UTC offsets in minutes of the timezone abbreviations `date` prints; numeric zones ("+03", "-0530") are
+# decoded directly. Each abbreviation names the offset in force, so captures spanning a DST change decode exactly.
+# Abbreviations are ambiguous (IST is India, Ireland or Israel), so any other one is resolved with an explicit 'tz'.
+TZ_ABBREVIATION_OFFSETS = {
+    "UTC": 0, "GMT": 0, "Z": 0,
+    "PST": -480, "PDT": -420, "MST": -420, "MDT": -360, "CST": -360, "CDT": -300,
+    "EST": -300, "EDT": -240, "AKST": -540, "AKDT": -480, "HST": -600,
+    "BST": 60, "WET": 0, "WEST": 60, "CET": 60, "CEST": 120, "EET": 120, "EEST": 180,
+    "JST": 540, "KST": 540, "AEST": 600, "AEDT": 660,
+}
+
+# Hardware layout of a `sensors` capture: the adapter id of each socket and the core ids reported under it
+SensorsTopology = namedtuple("SensorsTopology", ["adapters", "core_ids"])
+
+
+def thread_column_names(sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS):
+    """
+    Function to build the per-thread utilization column names in socket, core, thread order.
+
+    Parameters:
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+
+    Returns:
+    list: Column names of the form 'CPU_{socket}_Core_{core}_Thread_{thread}'
+    """
+    return [f'CPU_{cpu_num}_Core_{core}_Thread_{thread}'
+            for cpu_num in range(1, sockets + 1)
+            for core in range(cores)
+            for thread in range(threads)]
+
+
+def parse_cpu_util_text(text_file, sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS):
+    """
+    Function to parse `top -1` output into a typed utilization array in a single pass.
+
+    Every line holding at least one utilization reading is one core slot; the readings on that line are
+    its threads. Slots are filled in file order, so a sample is 'sockets * cores' consecutive slots.
+
+    Parameters:
+    text_file (str): Contents of a cpu_util.txt capture
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+
+    Returns:
+    np.ndarray: float32 array of shape (samples, sockets, cores, threads), NaN where no reading was found
+    """
+    return parse_top_text(text_file, sockets, cores, threads)[0][..., TOP_FIELDS.index("user")]
+
+
+def parse_top_text(text_file, sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS):
+    """
+    Function to parse every field of `top -1` output: all time shares of every logical CPU, and the load averages
+    and task counts of every frame.
+
+    Parameters:
+    text_file (str): Contents of a cpu_util.txt capture
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: float32 array of shape (samples, sockets, cores, threads, len(TOP_FIELDS)) in
+    percent, and float32 array of shape (frames, len(TOP_FRAME_FIELDS)); NaN where no reading was found
+    """
+    return _cpu_util_samples(_cpu_util_slots(text_file, threads), sockets, cores, threads), _top_frames(text_file)[1]
+
+
+def _decode_decimals(characters):
+    """
+    Function to decode every 'ddd.d' or 'ddd.dd' number of a uint8 character array at once, in order, from the
+    digits around each decimal point. A point without a digit on both sides decodes to NaN.
+    """
+    # Pad so the digits looked up around a point at either end stay inside the array
+    padded = np.concatenate([np.full(3, ord(" "), dtype=np.uint8), characters, np.full(2, ord(" "), dtype=np.uint8)])
+    points = np.flatnonzero(characters == ord(".")) + 3
+
+    def digit(offset):
+        # Non-digits wrap around to values above 9 in uint8
+        values = padded[points + offset] - np.uint8(ord("0"))
+        return values, values <= 9
+
+    (ones, has_ones), (tens, has_tens), (hundreds, has_hundreds) = digit(-1), digit(-2), digit(-3)
+    (tenths, has_tenths), (hundredths, has_hundredths) = digit(1), digit(2)
+    values = (np.where(has_tens & has_hundreds, hundreds * np.float32(100), 0)
+              + np.where(has_tens, tens * np.float32(10), 0)
+              + ones + tenths / np.float32(10) + np.where(has_hundredths, hundredths / np.float32(100), 0))
+    return np.where(has_ones & has_tenths, values, np.nan).astype(np.float32)
+
+
+def _cpu_util_slots(text_file, threads):
+    """
+    Function to convert the readings of every line that has any into a (slots, threads, len(TOP_FIELDS)) float32
+    array.
+    """
+    lines = CPU_LINE_PATTERN.findall(text_file)
+    buffer = np.full((len(lines), threads, len(TOP_FIELDS)), np.nan, dtype=np.float32)
+    if not lines:
+        return buffer
+
+    # Common case: every CPU on every line has its eight readings, so all lines are decoded in one vectorized pass
+    characters = np.frombuffer("\n".join(lines).encode(), dtype=np.uint8)
+    values = _decode_decimals(characters)
+    line_ends = np.flatnonzero(characters == ord("\n"))
+    values_per_line = np.diff(np.searchsorted(np.flatnonzero(characters == ord(".")), line_ends),
+                              prepend=0, append=len(values))
+    # Every reading starts with the '%' of '%Cpu'
+    readings_per_line = np.diff(np.searchsorted(np.flatnonzero(characters == ord("%")), line_ends),
+                                prepend=0, append=np.count_nonzero(characters == ord("%")))
+
+    if not np.isnan(values).any() and np.array_equal(values_per_line, readings_per_line * len(TOP_FIELDS)):
+        readings = values.reshape(-1, len(TOP_FIELDS))
+        line_of_reading = np.repeat(np.arange(len(lines)), readings_per_line)
+        position = np.arange(len(readings)) - np.repeat(np.cumsum(readings_per_line) - readings_per_line,
+                                                        readings_per_line)
+        kept = position < threads
+        buffer[line_of_reading[kept], position[kept]] = readings[kept]
+    else:
+        # Damaged lines: match each CPU on its own, leaving one whose fields are cut short or garbled NaN
+        for slot, line in enumerate(lines):
+            for position, reading in enumerate(line.split("%Cpu")[1:threads + 1]):
+                fields = CPU_FIELDS_PATTERN.match("%Cpu" + reading)
+                if fields:
+                    buffer[slot, position] = np.array(fields.groups(), dtype=np.float32)
+
+    # A line without a single complete reading is not a core slot
+    return buffer[~np.isnan(buffer).all(axis=(1, 2))]
+
+
+def _cpu_util_samples(slots, sockets, cores, threads):
+    """
+    Function to group consecutive core slots into samples, NaN-padding a trailing partial sample.
+    """
+    slots_per_sample = sockets * cores
+    samples = -(-len(slots) // slots_per_sample)
+    buffer = np.full((samples * slots_per_sample,) + slots.shape[1:], np.nan, dtype=np.float32)
+    buffer[:len(slots)] = slots
+
+    return buffer.reshape((samples, sockets, cores, threads) + slots.shape[2:])
+
+
+def _top_frames(text_file):
+    """
+    Function to read the header of every `top` frame: its clock time in seconds since midnight, and its load
+    averages and task counts as a (frames, len(TOP_FRAME_FIELDS)) float32 array, NaN where a line was missing.
+    """
+    headers = TOP_FRAME_PATTERN.findall(text_file)
+    seconds = np.array([header[:3] for header in headers], dtype=np.int64).reshape(-1, 3) @ np.array([3600, 60, 1])
+    frames = np.array([[value or "nan" for value in header[3:]] for header in headers],
+                      dtype=np.float32).reshape(-1, len(TOP_FRAME_FIELDS))
+    return seconds, frames
+
+
+def _cpu_util_chunk(text_file, threads):
+    """
+    Function to parse one chunk of a `top` capture into its core slots, its frame clock times in seconds since
+    midnight, its frame load averages and task counts, and the fields of its first `date` line (None if it has none).
+    """
+    anchor = DATE_LINE_PATTERN.search(text_file)
+    seconds, frames = _top_frames(text_file)
+    return _cpu_util_slots(text_file, threads), seconds, frames, anchor.groups() if anchor else None
+
+
+def cpu_util_frame(util, sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS):
+    """
+    Function to build the per-thread utilization DataFrame from a parsed utilization array.
+
+    Parameters:
+    util (np.ndarray): Array of shape (samples, sockets, cores, threads)
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+
+    Returns:
+    pd.DataFrame: DataFrame with one float32 column per hardware thread
+    """
+    return pd.DataFrame(util.reshape(util.shape[0], sockets * cores * threads),
+                        columns=thread_column_names(sockets, cores, threads))
+
+
+def _parse_top_capture(filename, sockets, cores, threads, tz, chunk_size, workers):
+    """
+    Function to parse a whole `top` capture in chunks cut between frames, returning the per-CPU readings of shape
+    (samples, sockets, cores, threads, len(TOP_FIELDS)), the frame values and the frame timestamps.
+    """
+    chunks = map_records(_cpu_util_chunk, filename, TOP_RECORD_PATTERN, (threads,), chunk_size, workers)
+
+    slots = (np.concatenate([chunk[0] for chunk in chunks]) if chunks
+             else np.empty((0, threads, len(TOP_FIELDS)), dtype=np.float32))
+    frames = (np.concatenate([chunk[2] for chunk in chunks]) if chunks
+              else np.empty((0, len(TOP_FRAME_FIELDS)), dtype=np.float32))
+
+    # The first `date` line anchors the frame times of the whole capture, so decode them after stitching
+    seconds = np.concatenate([chunk[1] for chunk in chunks]) if chunks else np.empty(0, dtype=np.int64)
+    anchor = next((chunk[3] for chunk in chunks if chunk[3] is not None), None)
+
+    return _cpu_util_samples(slots, sockets, cores, threads), frames, _top_seconds_to_timestamps(anchor, seconds, tz)
+
+
+def _with_frame_times(df, timestamps):
+    """
+    Function to put the frame times in front of per-frame rows, padding whichever side is shorter.
+    """
+    rows = max(len(df), len(timestamps))
+    df = df.reindex(range(rows))
+    df.insert(0, 'timestamp', pd.Series(timestamps).reindex(range(rows)))
+    return df
+
+
+def clean_cpu_util_data(filename, sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS, tz=None,
+                        chunk_size=DEFAULT_CHUNK_SIZE, workers=1, field="user"):
+    """
+    Function to clean the CPU utilization data from a text file and convert it into a DataFrame.
+
+    The file is memory-mapped, or decompressed as a stream when it is a gzip, xz or zstd copy, and parsed in chunks
+    cut between `top` frames, so peak memory is bounded by the chunk size rather than the file size. The chunks are
+    stitched back together in file order.
+
+    Parameters:
+    filename (str): The name of the file containing CPU utilization data
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+    tz (str or tzinfo): Host zone for the frame times (see decode_top_timestamps); UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    field (str): Which time share to return, one of TOP_FIELDS; the default 'user' is what `top` prints as 'us'
+
+    Returns:
+    pd.DataFrame: DataFrame containing cleaned CPU utilization data with the time of each top frame
+    """
+    if field not in TOP_FIELDS:
+        raise ValueError(f"Unknown field '{field}', expected one of {list(TOP_FIELDS)}")
+
+    util, _, timestamps = _parse_top_capture(filename, sockets, cores, threads, tz, chunk_size, workers)
+    df = cpu_util_frame(util[..., TOP_FIELDS.index(field)], sockets, cores, threads)
+
+    return _with_frame_times(df, timestamps)
+
+
+def clean_top_data(filename, sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES, threads=DEFAULT_THREADS, tz=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, workers=1, thread_field=None):
+    """
+    Function to clean what `top` recorded besides user time: the other time shares averaged over all CPUs, and
+    the load averages and task counts of every frame.
+
+    With 'thread_field' the columns of clean_cpu_util_data(..., field=thread_field) come first, so a single parse
+    of the capture gives both.
+
+    Parameters:
+    filename (str): The name of the file containing CPU utilization data
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+    threads (int): Number of hardware threads per core
+    tz (str or tzinfo): Host zone for the frame times (see decode_top_timestamps); UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    thread_field (str): Time share, one of TOP_FIELDS, to also return per hardware thread; none when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp', then with 'thread_field' one float32 column per hardware thread, then the float32
+    'CPU_Avg_System', 'CPU_Avg_Nice', 'CPU_Avg_Idle', 'CPU_Avg_IOWait', 'CPU_Avg_IRQ', 'CPU_Avg_SoftIRQ' and
+    'CPU_Avg_Steal' in percent, then TOP_FRAME_FIELDS
+    """
+    if thread_field is not None and thread_field not in TOP_FIELDS:
+        raise ValueError(f"Unknown field '{thread_field}', expected one of {list(TOP_FIELDS)}")
+
+    util, frames, timestamps = _parse_top_capture(filename, sockets, cores, threads, tz, chunk_size, workers)
+
+    with warnings.catch_warnings():
+        # Samples cut short at the end of a capture are all NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        shares = np.nanmean(util.reshape(len(util), -1, len(TOP_FIELDS)), axis=1)
+    labels = {"system": "System", "nice": "Nice", "idle": "Idle", "iowait": "IOWait", "irq": "IRQ",
+              "softirq": "SoftIRQ", "steal": "Steal"}
+    df = pd.DataFrame({f"CPU_Avg_{label}": shares[:, TOP_FIELDS.index(field)].astype(np.float32)
+                       for field, label in labels.items()})
+    if thread_field is not None:
+        df = cpu_util_frame(util[..., TOP_FIELDS.index(thread_field)], sockets, cores, threads).join(df)
+
+    # Frames and samples line up one to one, as for the frame times
+    rows = max(len(df), len(frames))
+    df = df.reindex(range(rows))
+    for position, column in enumerate(TOP_FRAME_FIELDS):
+        df[column] = pd.Series(frames[:, position]).reindex(range(rows)).to_numpy()
+
+    return _with_frame_times(df, timestamps)
+
+
+def read_collector_header(filename):
+    """
+    Function to read the header record that opens the output of a Python collector.
+
+    Parameters:
+    filename (str): JSON-lines capture, e.g. cpu_util.jsonl from proc_stat_sampler.py
+
+    Returns:
+    dict: The header, with at least the 'source' that wrote the file
+    """
+    with open_text_log(filename) as f:
+        line = f.readline()
+    header = json.loads(line) if line.strip() else {}
+    if "source" not in header:
+        raise ValueError(f"{filename} does not start with a collector header record")
+    return header
+
+
+def collector_description(filename, source):
+    """
+    Function to read how one source's values are laid out in a collector's output.
+
+    Both the single-source samplers and telemetry_collector.py, which writes every source into one record per
+    tick, are accepted.
+
+    Parameters:
+    filename (str): JSON-lines capture
+    source (str): Source to read, e.g. 'proc_stat', 'hwmon' or 'nvidia_smi'
+
+    Returns:
+    Tuple[dict, str]: The source's description (its 'columns' and any 'fields'), and the key of its readings in
+    each record's 'sources', or None when the file holds that source alone
+    """
+    header = read_collector_header(filename)
+    if header["source"] == "telemetry":
+        if source not in header.get("sources", {}):
+            raise ValueError(f"{filename} holds no {source} readings, only {list(header.get('sources', {}))}")
+        return header["sources"][source], source
+    if header["source"] != source:
+        raise ValueError(f"{filename} was written by the {header['source']} collector, not {source}")
+    return header, None
+
+
+def _collector_chunk(text_file, shape, take=None, source=None):
+    """
+    Function to parse one chunk of a collector's JSON-lines output into its epoch times and values.
+
+    'take' is an (axis, index) pair keeping one entry of a record's axis, e.g. one field or one GPU. Ticks where a
+    telemetry source has no reading become NaN.
+    """
+    missing = np.full(shape, np.nan, dtype=np.float32)
+    times = []
+    values = []
+    for line in text_file.splitlines():
+        if line.startswith('{"time"'):
+            record = json.loads(line)
+            reading = record["values"] if source is None else record["sources"].get(source)
+            times.append(record["time"])
+            values.append(missing if reading is None else reading)
+
+    values = np.array(values, dtype=np.float32).reshape((len(times),) + shape)
+    return np.array(times, dtype=np.float64), values if take is None else values.take(take[1], axis=take[0] + 1)
+
+
+def _collector_values(filename, shape, take=None, source=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to parse every record of a collector's output, or of one byte range of it, in chunks and stitch the
+    times and values back together.
+    """
+    chunks = map_records(_collector_chunk, filename, JSON_RECORD_PATTERN, (shape, take, source), chunk_size, workers,
+                         span)
+
+    width = shape if take is None else shape[:take[0]] + shape[take[0] + 1:]
+    times = np.concatenate([chunk[0] for chunk in chunks]) if chunks else np.empty(0)
+    values = np.concatenate([chunk[1] for chunk in chunks]) if chunks else np.empty((0,) + width, np.float32)
+    return times, values
+
+
+def _epoch_timestamps(times, tz):
+    """
+    Function to convert a collector's epoch seconds into a timestamp column in 'tz', or UTC when it is omitted.
+    """
+    timestamps = pd.to_datetime(times, unit="s", utc=True)
+    return timestamps.tz_convert(tz) if tz is not None else timestamps
+
+
+def clean_proc_stat_data(filename, field="user", tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the /proc/stat readings of proc_stat_sampler.py or telemetry_collector.py into the same
+    layout as clean_cpu_util_data.
+
+    The default 'user' field is what `top` reports as 'us', so the two captures are interchangeable downstream.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    field (str): Which time share to return: 'user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq' or 'steal'
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by one float32 column per hardware thread in socket, core, thread order
+    """
+    description, source = collector_description(filename, "proc_stat")
+    if field not in description["fields"]:
+        raise ValueError(f"Unknown field '{field}', expected one of {description['fields']}")
+
+    times, values = _collector_values(filename, (len(description["columns"]), len(description["fields"])),
+                                      (1, description["fields"].index(field)), source, chunk_size, workers, span)
+    df = pd.DataFrame(values, columns=description["columns"])
+
+    # Order the threads as the `top` parser does, by socket, core and thread number
+    df = df[sorted(df.columns, key=lambda name: [int(number) for number in re.findall(r"\d+", name)])]
+
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def core_column_names(sockets=DEFAULT_SOCKETS, cores=DEFAULT_CORES):
+    """
+    Function to build the per-core temperature column names in socket, core order.
+
+    Parameters:
+    sockets (int): Number of CPU sockets
+    cores (int): Number of cores per socket
+
+    Returns:
+    list: Column names of the form 'CPU_{socket}_Core_{core}'
+    """
+    return [f'CPU_{cpu_num}_Core_{core}' for cpu_num in range(1, sockets + 1) for core in range(cores)]
+
+
+def discover_sensors_topology(text_file):
+    """
+    Function to detect the coretemp adapters and their core ids from the first sample of a `sensors` capture.
+
+    The first sample ends where the first adapter is seen again, so no core or socket count is assumed.
+
+    Parameters:
+    text_file (str): Contents of a cpu_temp.txt capture
+
+    Returns:
+    SensorsTopology: Adapter id per socket and the tuple of core ids reported under each adapter
+    """
+    adapters = []
+    core_ids = []
+    for line in SENSORS_LINE_PATTERN.finditer(text_file):
+        adapter, core_id, _ = line.groups()
+        if adapter:
+            # A repeated adapter means the second sample has started
+            if adapter in adapters:
+                break
+            adapters.append(adapter)
+            core_ids.append([])
+        elif adapters:
+            core_ids[-1].append(int(core_id))
+
+    return SensorsTopology(tuple(adapters), tuple(tuple(ids) for ids in core_ids))
+
+
+def parse_cpu_temp_text(text_file, topology=None):
+    """
+    Function to parse a `sensors` capture into a typed per-core temperature array.
+
+    Each reading is placed by the adapter block it appears in and by its core id, so hosts with any number
+    of sockets, cores, or non-contiguous core ids parse correctly and a missing reading leaves a NaN instead of
+    shifting every following column.
+
+    Parameters:
+    text_file (str): Contents of a cpu_temp.txt capture
+    topology (SensorsTopology): Known topology; discovered from the first sample when omitted
+
+    Returns:
+    Tuple[np.ndarray, SensorsTopology]: float32 array of shape (samples, sockets, cores) and the topology used
+    """
+    if topology is None:
+        topology = discover_sensors_topology(text_file)
+
+    sockets = len(topology.adapters)
+    cores = max((len(ids) for ids in topology.core_ids), default=0)
+
+    # Pull every adapter header and core reading out of the text in a single pass
+    lines = SENSORS_LINE_PATTERN.findall(text_file)
+    if not lines or not sockets:
+        return np.full((0, sockets, cores), np.nan, dtype=np.float32), topology
+
+    # Number the adapter blocks; every core reading belongs to the most recent block above it
+    is_adapter = np.fromiter((bool(line[0]) for line in lines), dtype=bool, count=len(lines))
+    block = (np.cumsum(is_adapter) - 1)[~is_adapter]
+
+    # Resolve each block to its socket, and start a new sample whenever the first socket's block appears
+    socket_of_adapter = {adapter: socket_num for socket_num, adapter in enumerate(topology.adapters)}
+    block_socket = np.array([socket_of_adapter.get(line[0], -1) for line in lines if line[0]], dtype=np.int64)
+    block_sample = np.cumsum(block_socket == 0) - 1
+    samples = int(block_sample[-1]) + 1 if len(block_sample) else 0
+
+    # Convert the core ids and temperatures with numpy's text parser rather than per-value Python calls
+    readings = [line for line in lines if not line[0]]
+    core_ids = np.fromstring(" ".join([line[1] for line in readings]), dtype=np.int64, sep=" ")
+    temps = np.fromstring(" ".join([line[2] for line in readings]), dtype=np.float32, sep=" ")
+
+    # Drop readings that appear before the first adapter block
+    inside = block >= 0
+    block = block[inside]
+    core_ids = core_ids[inside]
+    temps = temps[inside]
+    socket = block_socket[block]
+    sample = block_sample[block]
+
+    # Map hardware core ids to column positions through a (socket, core id) lookup table
+    slot_lookup = np.full((sockets, int(core_ids.max(initial=0)) + 1), -1, dtype=np.int64)
+    for socket_num, ids in enumerate(topology.core_ids):
+        for slot_num, core_id in enumerate(ids):
+            if core_id < slot_lookup.shape[1]:
+                slot_lookup[socket_num, core_id] = slot_num
+    slot = np.where(socket >= 0, slot_lookup[np.maximum(socket, 0), core_ids], -1)
+
+    # Scatter all valid readings into the preallocated buffer at once
+    buffer = np.full((samples, sockets, cores), np.nan, dtype=np.float32)
+    valid = (socket >= 0) & (slot >= 0) & (sample >= 0)
+    buffer[sample[valid], socket[valid], slot[valid]] = temps[valid]
+
+    return buffer, topology
+
+
+def _timezone_offset_minutes(zone):
+    """
+    Function to convert a `date` timezone field to its UTC offset in minutes, or None if it is unknown or absent.
+    """
+    if not zone:
+        return None
+    if zone[0] in "+-":
+        digits = zone[1:].replace(":", "")
+        minutes = int(digits[:2]) * 60 + int(digits[2:] or 0)
+        return -minutes if zone[0] == "-" else minutes
+    return TZ_ABBREVIATION_OFFSETS.get(zone)
+
+
+def _localize(local_times, offsets, tz):
+    """
+    Function to turn naive local wall times into a UTC DatetimeIndex.
+
+    Rows with a known offset are shifted by it; rows without one are localized in 'tz', letting pandas resolve
+    DST transitions. The result is converted to 'tz' when given and left in UTC otherwise.
+    """
+    known = ~np.isnan(offsets)
+    utc = local_times - pd.to_timedelta(np.where(known, offsets, 0), unit="m")
+
+    if not known.all():
+        if tz is None:
+            raise ValueError("Timestamps without a recognised timezone need an explicit 'tz' to be decoded; pass the "
+                             "host zone, e.g. --tz Asia/Kolkata")
+        try:
+            zoned = local_times[~known].tz_localize(tz, ambiguous="infer", nonexistent="shift_forward")
+        except ValueError:
+            # A lone repeated hour cannot be inferred from ordering; leave it missing rather than guessing
+            zoned = local_times[~known].tz_localize(tz, ambiguous="NaT", nonexistent="shift_forward")
+        utc = utc.to_numpy(copy=True)
+        utc[~known] = zoned.tz_convert("UTC").tz_localize(None).to_numpy()
+        utc = pd.DatetimeIndex(utc)
+
+    utc = utc.tz_localize("UTC")
+    return utc.tz_convert(tz) if tz is not None else utc
+
+
+def _date_fields_to_local(fields):
+    """
+    Function to convert DATE_LINE_PATTERN matches into naive local wall times with one explicit-format
+    pd.to_datetime call per clock style.
+    """
+    # Rebuild each line in a fixed layout so a single explicit format parses the whole column
+    stamps = np.array([f"{year} {month} {day} {hour}:{minute}:{second} {meridiem}".rstrip()
+                       for month, day, hour, minute, second, meridiem, _, year in fields])
+    twelve_hour = np.array([bool(field[5]) for field in fields], dtype=bool)
+
+    local_times = np.empty(len(fields), dtype="datetime64[ns]")
+    if twelve_hour.any():
+        local_times[twelve_hour] = pd.to_datetime(stamps[twelve_hour], format="%Y %b %d %I:%M:%S %p").to_numpy()
+    if not twelve_hour.all():
+        local_times[~twelve_hour] = pd.to_datetime(stamps[~twelve_hour], format="%Y %b %d %H:%M:%S").to_numpy()
+
+    return pd.DatetimeIndex(local_times)
+
+
+def decode_date_timestamps(text_file, tz=None):
+    """
+    Function to decode every `date` line of a capture into a timezone-aware DatetimeIndex.
+
+    All lines are extracted with one regex pass and converted with vectorized explicit-format parsing instead
+    of a dateutil guess per row.
+
+    Parameters:
+    text_file (str): Contents of a capture with `date` lines (cpu_temp.txt, cpu_util.txt, gpu_status.txt)
+    tz (str or tzinfo): Zone used for lines without a recognised timezone and for the returned index
+
+    Returns:
+    pd.DatetimeIndex: One tz-aware timestamp per `date` line, in UTC unless 'tz' is given
+    """
+    fields = DATE_LINE_PATTERN.findall(text_file)
+    if not fields:
+        return pd.DatetimeIndex([], dtype="datetime64[ns, UTC]").tz_convert(tz or "UTC")
+
+    return _localize(*_date_fields_to_local_and_offsets(fields), tz)
+
+
+def _date_fields_to_local_and_offsets(fields):
+    """
+    Function to convert DATE_LINE_PATTERN matches into naive local wall times and their UTC offsets in minutes
+    (NaN where the timezone is absent or unknown).
+    """
+    # Resolve each distinct timezone field once and broadcast its offset to every row
+    zones = pd.Series([field[6] for field in fields], dtype=object)
+    offsets = zones.map({zone: _timezone_offset_minutes(zone) for zone in zones.unique()}).to_numpy(dtype=float)
+
+    return _date_fields_to_local(fields) if fields else pd.DatetimeIndex([], dtype="datetime64[ns]"), offsets
+
+
+def decode_top_timestamps(text_file, tz=None):
+    """
+    Function to decode the per-frame times of a `top` capture into a timezone-aware DatetimeIndex.
+
+    `top` only prints HH:MM:SS, so the date comes from the `date` line cpu_util.sh writes first and the day is
+    advanced wherever the clock wraps past midnight. With only the leading abbreviation to go on, a DST change
+    inside the capture is resolved only when 'tz' names the host's zone (e.g. 'America/Los_Angeles').
+
+    Parameters:
+    text_file (str): Contents of a cpu_util.txt capture
+    tz (str or tzinfo): Host zone used to localize the frame times and for the returned index
+
+    Returns:
+    pd.DatetimeIndex: One tz-aware timestamp per `top` frame, in UTC unless 'tz' is given
+    """
+    anchor = DATE_LINE_PATTERN.search(text_file)
+    return _top_seconds_to_timestamps(anchor.groups() if anchor else None, _top_clock_seconds(text_file), tz)
+
+
+def _top_clock_seconds(text_file):
+    """
+    Function to read the HH:MM:SS of every `top` frame as seconds since midnight.
+    """
+    times = TOP_TIME_PATTERN.findall(text_file)
+    return np.array(times, dtype=np.int64).reshape(-1, 3) @ np.array([3600, 60, 1])
+
+
+def _top_seconds_to_timestamps(anchor, seconds, tz):
+    """
+    Function to date the `top` frame clock times of a whole capture from the fields of its anchoring `date` line.
+    """
+    if anchor is None or not len(seconds):
+        return pd.DatetimeIndex([], dtype="datetime64[ns, UTC]").tz_convert(tz or "UTC")
+
+    # Local midnight and time of day of the anchoring `date` line
+    anchor_local = _date_fields_to_local([anchor])[0]
+    midnight = anchor_local.normalize()
+    anchor_seconds = (anchor_local - midnight).total_seconds()
+
+    # Add a day to every frame each time the clock runs backwards past noon
+    wraps = np.diff(seconds, prepend=anchor_seconds) < -43200
+    local_times = midnight + pd.to_timedelta(seconds + 86400 * np.cumsum(wraps), unit="s")
+
+    # Use the host zone when known so DST changes resolve; otherwise hold the anchor's offset for the capture
+    anchor_offset = _timezone_offset_minutes(anchor[6])
+    fixed_offset = np.nan if tz is not None or anchor_offset is None else float(anchor_offset)
+    return _localize(local_times, np.full(len(local_times), fixed_offset), tz)
+
+
+def capture_timezone(filename):
+    """
+    Function to read the UTC offset of a capture from the first `date` line that names its timezone, or from the
+    header of a collector's JSON-lines output.
+
+    nvidia-smi frame headers carry no timezone, so this lets them be localized with the zone the other
+    collectors on the same host recorded.
+
+    Parameters:
+    filename (str): A capture with zoned `date` lines or a collector header, normally cpu_temp.txt or cpu_temp.jsonl
+
+    Returns:
+    datetime.timezone: Fixed-offset zone of the first recognised timestamp, or None if there is none
+    """
+    with open_text_log(filename) as f:
+        first_line = f.readline()
+        if first_line.startswith("{"):
+            header = json.loads(first_line)
+            if header.get("utc_offset") is None:
+                return None
+            return datetime.timezone(datetime.timedelta(minutes=header["utc_offset"]), header.get("zone"))
+
+        for line in itertools.chain([first_line], f):
+            match = DATE_LINE_PATTERN.match(line)
+            offset = _timezone_offset_minutes(match.group(7)) if match else None
+            if offset is not None:
+                return datetime.timezone(datetime.timedelta(minutes=offset), match.group(7))
+
+    return None
+
+
+def _cpu_temp_chunk(text_file, topology):
+    """
+    Function to parse one chunk of a `sensors` capture into its temperatures and the naive local times and UTC
+    offsets of its `date` lines.
+    """
+    temps, _ = parse_cpu_temp_text(text_file, topology)
+    local_times, offsets = _date_fields_to_local_and_offsets(DATE_LINE_PATTERN.findall(text_file))
+    return temps, local_times.to_numpy(), offsets
+
+
+def clean_cpu_temp_data(filename, topology=None, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Function to clean the CPU temperature data from a text file and convert it into a DataFrame.
+
+    The file is memory-mapped, or decompressed as a stream when it is a gzip, xz or zstd copy, and parsed in chunks
+    cut before `date` lines, so peak memory is bounded by the chunk size rather than the file size. The chunks are
+    stitched back together in file order.
+
+    Parameters:
+    filename (str): The name of the file containing CPU temperature data
+    topology (SensorsTopology): Known topology; discovered from the first sample when omitted
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+
+    Returns:
+    pd.DataFrame: DataFrame containing cleaned CPU temperature data
+    """
+    # Every chunk is placed with the same topology, read from the first sample of the capture
+    if topology is None:
+        topology = discover_sensors_topology(first_chunk(filename, DATE_RECORD_PATTERN, chunk_size))
+    chunks = map_records(_cpu_temp_chunk, filename, DATE_RECORD_PATTERN, (topology,), chunk_size, workers)
+
+    sockets = len(topology.adapters)
+    cores = max((len(ids) for ids in topology.core_ids), default=0)
+    temps = np.concatenate([chunk[0] for chunk in chunks]) if chunks else np.empty((0, sockets, cores), np.float32)
+
+    df = pd.DataFrame(temps.reshape(temps.shape[0], sockets * cores), columns=core_column_names(sockets, cores))
+
+    # Localize the `date` lines of all chunks together, so DST transitions are resolved over the whole capture
+    if chunks and sum(len(chunk[1]) for chunk in chunks):
+        timestamps = _localize(pd.DatetimeIndex(np.concatenate([chunk[1] for chunk in chunks])),
+                               np.concatenate([chunk[2] for chunk in chunks]), tz)
+    else:
+        timestamps = pd.DatetimeIndex([], dtype="datetime64[ns, UTC]").tz_convert(tz or "UTC")
+
+    # Line the timestamps up with the samples, padding whichever side is shorter
+    rows = max(len(df), len(timestamps))
+    df = df.reindex(range(rows))
+    df.insert(0, 'timestamp', pd.Series(timestamps).reindex(range(rows)))
+
+    return df
+
+
+def clean_hwmon_data(filename, all_sensors=False, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the temperatures of hwmon_sampler.py or telemetry_collector.py into the same layout as
+    clean_cpu_temp_data.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    all_sensors (bool): Whether to keep the package, drive and thermal zone temperatures after the core columns
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by one float32 'CPU_{socket}_Core_{core}' column per core, in degrees Celsius
+    """
+    description, source = collector_description(filename, "hwmon")
+    times, values = _collector_values(filename, (len(description["columns"]),), None, source, chunk_size, workers, span)
+    df = pd.DataFrame(values, columns=description["columns"])
+
+    if not all_sensors:
+        df = df[[name for name in df.columns if re.fullmatch(r"CPU_\d+_Core_\d+", name)]]
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def clean_diskstats_data(filename, per_device=False, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the /proc/diskstats rates of diskstats_sampler.py or telemetry_collector.py.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    per_device (bool): Whether to return every disk's rates instead of totals over all disks
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by the float32 'disk_read_MBps', 'disk_write_MBps', 'disk_read_iops' and
+    'disk_write_iops' summed over all disks and 'disk_util' of the busiest disk, or with per_device one
+    'disk_{device}_{field}' column per disk and field
+    """
+    description, source = collector_description(filename, "diskstats")
+    devices, fields = description["columns"], description["fields"]
+    times, values = _collector_values(filename, (len(devices), len(fields)), None, source, chunk_size, workers, span)
+
+    if per_device:
+        df = pd.DataFrame(values.reshape(len(times), -1),
+                          columns=[f"disk_{device}_{field}" for device in devices for field in fields])
+    else:
+        # Throughput and IOPS add up over disks; utilization is that of the busiest disk
+        reductions = {field: np.max if field == "util" else np.sum for field in fields}
+        df = pd.DataFrame({f"disk_{field}": reductions[field](values[:, :, position], axis=1)
+                           for position, field in enumerate(fields)})
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def clean_drive_temp_data(filename, per_device=False, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the drive temperatures recorded alongside the CPU temperatures by hwmon_sampler.py or
+    telemetry_collector.py.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    per_device (bool): Whether to return every drive sensor instead of the hottest one
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by 'disk_temp', the hottest drive sensor in degrees Celsius, or with
+    per_device one column per drive sensor
+    """
+    df = clean_hwmon_data(filename, all_sensors=True, tz=tz, chunk_size=chunk_size, workers=workers, span=span)
+    drives = df[[name for name in df.columns if DRIVE_SENSOR_PATTERN.match(name)]]
+
+    if not per_device:
+        drives = pd.DataFrame({"disk_temp": drives.max(axis=1).astype(np.float32)})
+    drives.insert(0, 'timestamp', df['timestamp'])
+
+    return drives
+
+
+def clean_process_data(filename, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the benchmark process tree readings of process_sampler.py or telemetry_collector.py.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by the float32 'proc_cpu' (percent of one CPU), 'proc_rss_MB',
+    'proc_read_MBps', 'proc_write_MBps', 'proc_count' and 'proc_threads' totals of the benchmark and its children
+    """
+    description, source = collector_description(filename, "process")
+    times, values = _collector_values(filename, (len(description["columns"]),), None, source, chunk_size, workers, span)
+    df = pd.DataFrame(values, columns=description["columns"])
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def clean_cpufreq_data(filename, per_cpu=False, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the frequency and throttling readings of cpufreq_sampler.py or telemetry_collector.py.
+
+    The kernel's throttle counters are per core and per package, so sibling threads repeat them; throttling is
+    therefore reported as the share of logical CPUs that saw a new event rather than as a count.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    per_cpu (bool): Whether to return every hardware thread's frequency instead of the summary columns
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by the float32 'CPU_Avg_Freq' and 'CPU_Min_Freq' in MHz and
+    'CPU_Throttled', the percent of logical CPUs throttled during the tick; or with per_cpu one frequency column
+    per hardware thread in the layout of clean_proc_stat_data, which reduce_cpu_columns accepts
+    """
+    description, source = collector_description(filename, "cpufreq")
+    columns, fields = description["columns"], description["fields"]
+    times, values = _collector_values(filename, (len(columns), len(fields)), None, source, chunk_size, workers, span)
+    frequencies = values[:, :, fields.index("freq_MHz")]
+
+    if per_cpu:
+        df = pd.DataFrame(frequencies, columns=columns)
+        df = df[sorted(df.columns, key=lambda name: [int(number) for number in re.findall(r"\d+", name)])]
+    else:
+        throttled = (np.nan_to_num(values[:, :, [fields.index("core_throttles"), fields.index("package_throttles")]])
+                     > 0).any(axis=2)
+        with warnings.catch_warnings():
+            # Hosts without cpufreq record only NaN frequencies
+            warnings.simplefilter("ignore", RuntimeWarning)
+            df = pd.DataFrame({"CPU_Avg_Freq": np.nanmean(frequencies, axis=1),
+                               "CPU_Min_Freq": np.nanmin(frequencies, axis=1),
+                               "CPU_Throttled": throttled.mean(axis=1) * 100}).astype(np.float32)
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def clean_rapl_data(filename, per_zone=False, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the RAPL power readings of rapl_sampler.py or telemetry_collector.py.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    per_zone (bool): Whether to return every RAPL zone instead of the package and DRAM totals
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' followed by the float32 'cpu_power' and 'dram_power' in watts, summed over sockets
+    ('dram_power' only when the CPUs report it), or with per_zone one 'rapl_{zone}' column per zone
+    """
+    description, source = collector_description(filename, "rapl")
+    zones = description["columns"]
+    times, values = _collector_values(filename, (len(zones),), None, source, chunk_size, workers, span)
+
+    if per_zone:
+        df = pd.DataFrame(values, columns=[f"rapl_{zone}" for zone in zones])
+    else:
+        df = pd.DataFrame()
+        for column, pattern in (("cpu_power", RAPL_PACKAGE_PATTERN), ("dram_power", RAPL_DRAM_PATTERN)):
+            positions = [position for position, zone in enumerate(zones) if pattern.match(zone)]
+            if positions:
+                df[column] = values[:, positions].sum(axis=1)
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df
+
+
+def clean_events_data(filename, tz=None):
+    """
+    Function to read the phase changes run_experiment.py records in events.jsonl.
+
+    Parameters:
+    filename (str): The name of the events file
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+
+    Returns:
+    pd.DataFrame: 'timestamp' of every phase change followed by 'phase', 'benchmark' ('' outside runs) and
+    'iteration' (-1 outside runs)
+    """
+    with open(filename) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+
+    df = pd.DataFrame({"phase": [event["phase"] for event in events],
+                       "benchmark": [event["benchmark"] or "" for event in events],
+                       "iteration": np.array([-1 if event["iteration"] is None else event["iteration"]
+                                              for event in events], dtype=np.int64)})
+    df.insert(0, 'timestamp', _epoch_timestamps(np.array([event["time"] for event in events], dtype=np.float64), tz))
+
+    return df
+
+
+def _has_collector_source(filename, source):
+    """
+    Function to tell whether a collector's output holds readings of 'source', either alone or in telemetry.
+    """
+    if not os.path.exists(filename):
+        return False
+    header = read_collector_header(filename)
+    return header["source"] == source or source in header.get("sources", {})
+
+
+def _find_capture(directory, captures, source):
+    """
+    Function to return the first (path, parser) of 'captures' whose file, or a compressed copy of it, exists in
+    'directory', or the last one. A collector's JSON-lines output is only used when it recorded 'source', since
+    telemetry_collector.py skips sources the host cannot read (e.g. nvidia_smi without a GPU driver).
+    """
+    for file_name, parser in captures:
+        path = log_path(directory, file_name)
+        if os.path.exists(path) and (".jsonl" not in file_name or _has_collector_source(path, source)):
+            return path, parser
+    return path, parser
+
+
+def cpu_util_capture(directory="."):
+    """
+    Function to find the CPU utilization capture of an experiment and the parser for it.
+
+    The shared-clock telemetry.jsonl of telemetry_collector.py is preferred when it recorded /proc/stat, then
+    cpu_util.jsonl from proc_stat_sampler.py, then `top` text (cpu_util.txt).
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of the capture and the clean_* function that reads it
+    """
+    return _find_capture(directory, (("telemetry.jsonl", clean_proc_stat_data),
+                                     ("cpu_util.jsonl", clean_proc_stat_data), ("cpu_util.txt", clean_cpu_util_data)),
+                         "proc_stat")
+
+
+def top_capture(directory="."):
+    """
+    Function to find the `top` capture of an experiment for what it records besides user time.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of cpu_util.txt and clean_top_data, or None when the CPU utilization comes from the
+    Python collectors, whose /proc/stat readings have no counterpart to load averages and task counts
+    """
+    path, parser = cpu_util_capture(directory)
+    if parser is not clean_cpu_util_data or not os.path.exists(path):
+        return None
+    return path, clean_top_data
+
+
+def cpu_temp_capture(directory="."):
+    """
+    Function to find the CPU temperature capture of an experiment and the parser for it.
+
+    The shared-clock telemetry.jsonl of telemetry_collector.py is preferred when it recorded hwmon, then
+    cpu_temp.jsonl from hwmon_sampler.py, then `sensors` text (cpu_temp.txt).
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of the capture and the clean_* function that reads it
+    """
+    return _find_capture(directory, (("telemetry.jsonl", clean_hwmon_data), ("cpu_temp.jsonl", clean_hwmon_data),
+                                     ("cpu_temp.txt", clean_cpu_temp_data)), "hwmon")
+
+
+def gpu_status_capture(directory="."):
+    """
+    Function to find the GPU status capture of an experiment and the parser for it.
+
+    The shared-clock telemetry.jsonl of telemetry_collector.py is preferred when it recorded the GPU, then
+    nvidia-smi text (gpu_status.txt).
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of the capture and the clean_* function that reads it
+    """
+    return _find_capture(directory, (("telemetry.jsonl", clean_nvidia_smi_data),
+                                     ("gpu_status.txt", clean_gpu_status_data)), "nvidia_smi")
+
+
+def disk_capture(directory="."):
+    """
+    Function to find the disk activity capture of an experiment and the parser for it.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of telemetry.jsonl or disk_util.jsonl and clean_diskstats_data, or None for
+    experiments recorded before disks were collected
+    """
+    for file_name in ("telemetry.jsonl", "disk_util.jsonl"):
+        path = log_path(directory, file_name)
+        if _has_collector_source(path, "diskstats"):
+            return path, clean_diskstats_data
+    return None
+
+
+def process_capture(directory="."):
+    """
+    Function to find the benchmark process tree capture of an experiment and the parser for it.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of telemetry.jsonl or process.jsonl and clean_process_data, or None for experiments
+    recorded without a PID file
+    """
+    for file_name in ("telemetry.jsonl", "process.jsonl"):
+        path = log_path(directory, file_name)
+        if _has_collector_source(path, "process"):
+            return path, clean_process_data
+    return None
+
+
+def cpufreq_capture(directory="."):
+    """
+    Function to find the CPU frequency and throttling capture of an experiment and the parser for it.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of telemetry.jsonl or cpufreq.jsonl and clean_cpufreq_data, or None for
+    experiments recorded before frequencies were collected
+    """
+    for file_name in ("telemetry.jsonl", "cpufreq.jsonl"):
+        path = log_path(directory, file_name)
+        if _has_collector_source(path, "cpufreq"):
+            return path, clean_cpufreq_data
+    return None
+
+
+def rapl_capture(directory="."):
+    """
+    Function to find the CPU and DRAM power capture of an experiment and the parser for it.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of telemetry.jsonl or rapl.jsonl and clean_rapl_data, or None for experiments
+    recorded without readable RAPL counters
+    """
+    for file_name in ("telemetry.jsonl", "rapl.jsonl"):
+        path = log_path(directory, file_name)
+        if _has_collector_source(path, "rapl"):
+            return path, clean_rapl_data
+    return None
+
+
+def events_capture(directory="."):
+    """
+    Function to find the phase changes of an experiment and the parser for them.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of events.jsonl and clean_events_data, or None for experiments recorded by metric.sh
+    before run_experiment.py replaced it
+    """
+    path = os.path.join(directory, "events.jsonl")
+    if os.path.exists(path):
+        return path, clean_events_data
+    return None
+
+
+def drive_temp_capture(directory="."):
+    """
+    Function to find the drive temperature capture of an experiment and the parser for it.
+
+    Parameters:
+    directory (str): Experiment folder
+
+    Returns:
+    Tuple[str, callable]: Path of telemetry.jsonl or cpu_temp.jsonl and clean_drive_temp_data, or None when no
+    drive sensor was recorded
+    """
+    for file_name in ("telemetry.jsonl", "cpu_temp.jsonl"):
+        path = log_path(directory, file_name)
+        if _has_collector_source(path, "hwmon"):
+            columns = collector_description(path, "hwmon")[0]["columns"]
+            if any(DRIVE_SENSOR_PATTERN.match(name) for name in columns):
+                return path, clean_drive_temp_data
+            return None
+    return None
+
+
+def _float32_column(values):
+    """
+    Function to convert a list of numeric strings, where 'N/A' marks a missing value, into a float32 array
+    using numpy's text parser.
+    """
+    return np.fromstring(" ".join(values).replace("N/A", "nan"), dtype=np.float32, sep=" ")
+
+
+def parse_gpu_status_text(text_file, tz=None):
+    """
+    Function to parse `nvidia-smi -l 1` output into one typed record per (frame, GPU) in a single pass.
+
+    Each stats line is attributed to the device line directly above it and to the frame header above that, so
+    several GPUs never interleave and a fan-speed percentage is never mistaken for utilization. Total memory is
+    read from every frame rather than assumed.
+
+    Parameters:
+    text_file (str): Contents of a gpu_status.txt capture
+    tz (str or tzinfo): Host zone of the frame headers, which carry no timezone; naive local times when omitted
+
+    Returns:
+    pd.DataFrame: Columns 'timestamp', 'gpu_index' and GPU_STATUS_COLUMNS, one row per GPU per frame
+    """
+    return _gpu_status_records([_gpu_status_chunk(text_file)], tz)
+
+
+def _gpu_status_chunk(text_file):
+    """
+    Function to parse one chunk of an nvidia-smi capture into its records, the frame number of each record within
+    the chunk, and the naive local times and UTC offsets of the chunk's frame headers.
+    """
+    lines = NVIDIA_SMI_LINE_PATTERN.findall(text_file)
+
+    # Classify every matched line and remember the latest header and device line seen at each position
+    line_numbers = np.arange(len(lines))
+    is_header = np.fromiter((bool(line[0]) for line in lines), dtype=bool, count=len(lines))
+    is_device = np.fromiter((bool(line[1]) for line in lines), dtype=bool, count=len(lines))
+    is_stats = ~(is_header | is_device)
+    last_header = np.maximum.accumulate(np.where(is_header, line_numbers, -1)) if len(lines) else line_numbers
+    last_device = np.maximum.accumulate(np.where(is_device, line_numbers, -1)) if len(lines) else line_numbers
+
+    # Keep stats lines that sit inside a frame
+    is_stats &= last_header >= 0
+    frame = (np.cumsum(is_header) - 1)[is_stats]
+    headers = [line[0] for line in lines if line[0]]
+
+    # GPU index from the device line in the same frame, else the position of the stats line within its frame
+    device_ids = np.full(len(lines), -1, dtype=np.int64)
+    device_ids[is_device] = np.fromstring(" ".join([line[1] for line in lines if line[1]]), dtype=np.int64, sep=" ")
+    device_line = last_device[is_stats]
+    ordinal = line_numbers[is_stats] - np.searchsorted(line_numbers[is_stats], last_header[is_stats])
+    gpu_index = np.where(device_line > last_header[is_stats], device_ids[device_line], ordinal)
+
+    # Convert each stats column with one vectorized call
+    stats = [line for line, keep in zip(lines, is_stats) if keep]
+    records = pd.DataFrame({column: _float32_column([line[group] for line in stats])
+                            for group, column in enumerate(GPU_STATUS_COLUMNS, start=2)})
+
+    records.insert(0, "gpu_index", gpu_index.astype(np.int16))
+
+    # Decode the frame headers once; they are broadcast to the frame's devices after stitching
+    local_times, offsets = _date_fields_to_local_and_offsets(DATE_LINE_PATTERN.findall("\n".join(headers)))
+    return records, frame, local_times.to_numpy(), offsets
+
+
+def _gpu_status_records(chunks, tz):
+    """
+    Function to stitch parsed chunks of an nvidia-smi capture into one set of records, in file order.
+    """
+    records = pd.concat([chunk[0] for chunk in chunks], ignore_index=True)
+
+    # Number the frames across chunks so every record points at its own header
+    frames_before = np.cumsum([0] + [len(chunk[2]) for chunk in chunks[:-1]])
+    frame = np.concatenate([chunk[1] + start for chunk, start in zip(chunks, frames_before)])
+    local_times = pd.DatetimeIndex(np.concatenate([chunk[2] for chunk in chunks]))
+
+    # Localize all headers together so DST transitions are resolved over the whole capture
+    if tz is not None:
+        frame_times = _localize(local_times, np.concatenate([chunk[3] for chunk in chunks]), tz) if len(local_times) \
+            else pd.DatetimeIndex([], dtype="datetime64[ns, UTC]").tz_convert(tz)
+    else:
+        frame_times = local_times
+    records.insert(0, "timestamp", frame_times[frame] if len(frame) else frame_times[:0])
+
+    return records
+
+
+def clean_gpu_status_records(filename, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Function to clean the GPU status data from a text file into per-device records.
+
+    The file is memory-mapped, or decompressed as a stream when it is a gzip, xz or zstd copy, and parsed in chunks
+    cut before frame headers, so peak memory is bounded by the chunk size rather than the file size. The chunks are
+    stitched back together in file order.
+
+    Parameters:
+    filename (str): The name of the file containing GPU status data
+    tz (str or tzinfo): Host zone of the frame headers; naive local times when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+
+    Returns:
+    pd.DataFrame: One row per GPU per nvidia-smi frame (see parse_gpu_status_text)
+    """
+    chunks = map_records(_gpu_status_chunk, filename, DATE_RECORD_PATTERN, (), chunk_size, workers)
+
+    return _gpu_status_records(chunks or [_gpu_status_chunk("")], tz)
+
+
+def clean_gpu_status_data(filename, gpu_index=0, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1):
+    """
+    Function to clean the GPU status data from a text file and convert it into a DataFrame.
+
+    Parameters:
+    filename (str): The name of the file containing GPU status data
+    gpu_index (int): Which GPU to return when the host has several
+    tz (str or tzinfo): Host zone of the frame headers (see capture_timezone); naive local times when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+
+    Returns:
+    pd.DataFrame: DataFrame with one row per frame and the 'timestamp', 'gpu_temp', 'gpu_power', 'gpu_GRAM',
+    'gpu_util' and 'gpu_GRAM_total' columns of the selected GPU
+    """
+    records = clean_gpu_status_records(filename, tz, chunk_size, workers)
+    device = records[records["gpu_index"] == gpu_index]
+
+    columns = ["timestamp", "gpu_temp", "gpu_power", "gpu_GRAM", "gpu_util", "gpu_GRAM_total"]
+
+    return device[columns].reset_index(drop=True)
+
+
+def clean_nvidia_smi_data(filename, gpu_index=0, tz=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, span=None):
+    """
+    Function to clean the GPU readings of telemetry_collector.py into the same layout as clean_gpu_status_data.
+
+    Parameters:
+    filename (str): The name of the file containing the JSON-lines records
+    gpu_index (int): Which GPU to return when the host has several
+    tz (str or tzinfo): Zone for the timestamp column; UTC when omitted
+    chunk_size (int): Bytes of the file parsed at a time
+    workers (int): Number of processes parsing chunks in parallel
+    span (tuple): (start, end) byte range of the capture to parse, e.g. the records appended since the last call;
+    the whole file when omitted
+
+    Returns:
+    pd.DataFrame: DataFrame with one row per tick and the 'timestamp', 'gpu_temp', 'gpu_power', 'gpu_GRAM',
+    'gpu_util' and 'gpu_GRAM_total' columns of the selected GPU
+    """
+    description, source = collector_description(filename, "nvidia_smi")
+    if gpu_index not in description["devices"]:
+        raise ValueError(f"No GPU {gpu_index} in {filename}, expected one of {description['devices']}")
+
+    shape = (len(description["devices"]), len(description["columns"]))
+    times, values = _collector_values(filename, shape, (0, description["devices"].index(gpu_index)), source,
+                                      chunk_size, workers, span)
+    df = pd.DataFrame(values, columns=description["columns"])
+    df.insert(0, 'timestamp', _epoch_timestamps(times, tz))
+
+    return df[["timestamp", "gpu_temp", "gpu_power", "gpu_GRAM", "gpu_util", "gpu_GRAM_total"]]
@@ -0,0 +1,88 @@
+import glob
+import hashlib
+import os
+
+from dataset_io import load_frame, save_frame
+from diagnostic_parsers import PARSER_VERSION
+
+# Folder, next to the raw logs, that holds the cached parses of an experiment
+CACHE_DIR_NAME = ".parse_cache"
+
+# Parser arguments that only change how a log is read, not what is parsed, so they are left out of the cache key
+EXECUTION_KWARGS = ("chunk_size", "workers")
+
+
+def file_digest(filename, chunk_size=1 << 20):
+    """
+    Function to hash the contents of a raw log without loading it into memory at once.
+
+    Parameters:
+    filename (str): File to hash
+    chunk_size (int): Bytes read per step
+
+    Returns:
+    str: Hex BLAKE2b digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(filename, parser, kwargs):
+    """
+    Function to build the cache entry name of one parse of one raw file.
+
+    The key covers the file contents, the parser and its arguments (apart from EXECUTION_KWARGS), and
+    PARSER_VERSION, so changing any of them misses the cache instead of returning stale data.
+
+    Parameters:
+    filename (str): Raw log
+    parser (callable): Parser applied to it
+    kwargs (dict): Keyword arguments passed to the parser
+
+    Returns:
+    str: Entry file name of the form '<log>.<parser>.<hash>.npz'
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(file_digest(filename).encode())
+    digest.update(f"{parser.__module__}.{parser.__name__}|{PARSER_VERSION}|".encode())
+    digest.update(repr(sorted(item for item in kwargs.items() if item[0] not in EXECUTION_KWARGS)).encode())
+    return f"{os.path.basename(filename)}.{parser.__name__}.{digest.hexdigest()}.npz"
+
+
+def cached_parse(parser, filename, cache_dir=None, **kwargs):
+    """
+    Function to run a clean_* parser on a raw log, reusing the stored result when the log is unchanged.
+
+    Parameters:
+    parser (callable): Function taking the file name first and returning a DataFrame
+    filename (str): Raw log to parse
+    cache_dir (str): Folder for cache entries; '.parse_cache' next to the log when omitted
+    **kwargs: Keyword arguments for the parser
+
+    Returns:
+    pd.DataFrame: The parsed frame
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(filename) or ".", CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = cache_key(filename, parser, kwargs)
+    path = os.path.join(cache_dir, key)
+    if os.path.exists(path):
+        try:
+            return load_frame(path)
+        except (OSError, ValueError, KeyError):
+            # An unreadable entry is treated as a miss and rewritten below
+            pass
+
+    df = parser(filename, **kwargs)
+
+    # Drop older parses of this log by this parser before storing the new one
+    for stale in glob.glob(os.path.join(cache_dir, f"{glob.escape(os.path.basename(filename))}.{parser.__name__}.*.npz")):
+        os.remove(stale)
+    save_frame(df, path, {"parser_version": PARSER_VERSION})
+
+    return df
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+
+def asof_positions(source_times, grid_times, tolerance, direction="nearest"):
+    """
+    Function to find, for every grid time, the source sample to take in a vectorized sort-merge.
+
+    Parameters:
+    source_times (np.ndarray): Sorted int64 source timestamps in nanoseconds
+    grid_times (np.ndarray): Sorted int64 grid timestamps in nanoseconds
+    tolerance (int): Largest allowed distance in nanoseconds between a grid time and its source sample
+    direction (str): 'backward' (latest sample at or before), 'forward' (earliest at or after) or 'nearest'
+
+    Returns:
+    np.ndarray: int64 position into source_times per grid time, -1 where no sample is within tolerance
+    """
+    if len(source_times) == 0:
+        return np.full(len(grid_times), -1, dtype=np.int64)
+
+    backward = np.searchsorted(source_times, grid_times, side="right") - 1
+    forward = np.searchsorted(source_times, grid_times, side="left")
+
+    if direction == "backward":
+        positions = backward
+    elif direction == "forward":
+        positions = forward
+    elif direction == "nearest":
+        # Pick whichever neighbour is closer, preferring the earlier sample on a tie
+        never = np.iinfo(np.int64).max
+        backward_gap = np.where(backward >= 0, grid_times - source_times[np.maximum(backward, 0)], never)
+        forward_gap = np.where(forward < len(source_times),
+                               source_times[np.minimum(forward, len(source_times) - 1)] - grid_times, never)
+        positions = np.where(forward_gap < backward_gap, forward, backward)
+    else:
+        raise ValueError(f"Unknown direction '{direction}', expected 'backward', 'forward' or 'nearest'")
+
+    # Reject positions off either end of the source and samples further away than the tolerance
+    valid = (positions >= 0) & (positions < len(source_times))
+    gaps = np.abs(source_times[np.clip(positions, 0, len(source_times) - 1)] - grid_times)
+    return np.where(valid & (gaps <= tolerance), positions, -1)
+
+
+def align_streams(streams, freq="1s", tolerance=None, direction="nearest", how="inner"):
+    """
+    Function to align several timestamped streams onto one common time grid with an as-of join.
+
+    Every stream is matched to the grid independently by timestamp, so clock drift between collectors shifts
+    a sample by at most the tolerance instead of shifting every following row.
+
+    Parameters:
+    streams (dict): Stream name to DataFrame with a tz-aware 'timestamp' column; other columns must not collide
+    freq (str): Spacing of the common grid
+    tolerance (str): Largest distance between a grid time and the sample taken for it; defaults to 'freq'
+    direction (str): 'backward', 'forward' or 'nearest' (see asof_positions)
+    how (str): 'inner' spans only the time all streams overlap, 'outer' spans from the earliest to latest sample
+
+    Returns:
+    Tuple[pd.DataFrame, pd.DataFrame]: Aligned data indexed by the UTC grid ('timestamp'), and a per-stream report
+    of input samples, grid points matched, grid points filled by repeating a sample, grid points left missing,
+    and samples dropped because no grid point used them
+    """
+    freq = pd.tseries.frequencies.to_offset(freq)
+    tolerance = pd.Timedelta(tolerance if tolerance is not None else freq).value
+
+    # Sort each stream by time once and drop rows without a timestamp
+    prepared = {}
+    for name, df in streams.items():
+        times = pd.DatetimeIndex(df["timestamp"])
+        if times.tz is None:
+            raise ValueError(f"Stream '{name}' has naive timestamps; localize them before aligning")
+        present = ~times.isna()
+        times = times[present].tz_convert("UTC")
+        order = np.argsort(times.asi8, kind="stable")
+        prepared[name] = (times.asi8[order], df.loc[present].drop(columns="timestamp").iloc[order], len(df))
+
+    # Build the common grid over the overlap (inner) or the union (outer) of the streams
+    firsts = [times[0] for times, _, _ in prepared.values() if len(times)]
+    lasts = [times[-1] for times, _, _ in prepared.values() if len(times)]
+    if not firsts or (how == "inner" and len(firsts) < len(prepared)):
+        grid = pd.DatetimeIndex([], tz="UTC")
+    elif how == "inner":
+        grid = pd.date_range(pd.Timestamp(max(firsts), tz="UTC").ceil(freq),
+                             pd.Timestamp(min(lasts), tz="UTC").floor(freq), freq=freq)
+    elif how == "outer":
+        grid = pd.date_range(pd.Timestamp(min(firsts), tz="UTC").floor(freq),
+                             pd.Timestamp(max(lasts), tz="UTC").ceil(freq), freq=freq)
+    else:
+        raise ValueError(f"Unknown how '{how}', expected 'inner' or 'outer'")
+    grid.name = "timestamp"
+
+    aligned = []
+    report = {}
+    for name, (times, values, samples) in prepared.items():
+        positions = asof_positions(times, grid.asi8, tolerance, direction)
+        matched = positions >= 0
+
+        # Take every matched row in one call and blank out grid points with no sample in tolerance
+        taken = values.take(np.maximum(positions, 0)) if len(values) else values.reindex(range(len(grid)))
+        taken.index = grid
+        if not matched.all():
+            taken = taken.where(np.broadcast_to(matched[:, None], taken.shape))
+        aligned.append(taken)
+
+        # Grid and samples are both sorted, so positions never decrease and distinct samples are where they change
+        taken_positions = positions[matched]
+        used = int(np.count_nonzero(np.diff(taken_positions))) + 1 if len(taken_positions) else 0
+        report[name] = {"samples": samples, "matched": int(matched.sum()), "filled": int(matched.sum()) - used,
+                        "missing": int((~matched).sum()), "dropped": samples - used}
+
+    return pd.concat(aligned, axis=1), pd.DataFrame.from_dict(report, orient="index")
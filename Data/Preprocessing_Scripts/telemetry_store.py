@@ -0,0 +1,625 @@
+import json
+import os
+import re
+import shutil
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from dataset_io import _tz_from_json, _tz_to_json, load_frame, save_frame
+
+# Rows sealed into each chunk: an hour of 1 Hz data
+DEFAULT_CHUNK_ROWS = 3600
+
+# zlib level of the encoded column blocks; higher levels gain little on the already delta/XOR-encoded bytes
+BLOCK_COMPRESSION_LEVEL = 6
+
+# Files of one series folder: its columns, the sealed chunks, where each chunk's blocks are, and the rows not sealed
+SCHEMA_FILE = "schema.json"
+DATA_FILE = "data.bin"
+INDEX_FILE = "index.jsonl"
+TAIL_FILE = "tail.npz"
+
+# Rows of one append that are not sealed yet, named by the position of their first row in the series
+TAIL_DELTA_PATTERN = re.compile(r"^tail_(\d+)\.npz$")
+
+# Series are folders of the store, so their names must be plain file names
+SERIES_NAME_PATTERN = re.compile(r"^[\w.-]+$")
+
+# Windows of the rollups built at ingest. Windows no longer than the sampling interval of a series are not built,
+# since its own rows already have that resolution (the 1 s rollup of a 1 Hz dataset).
+DEFAULT_ROLLUPS = ("1s", "10s", "1min")
+
+# Statistics a rollup keeps of every numeric column in a window; string and boolean columns only keep 'last'
+ROLLUP_STATS = ("mean", "min", "max", "last")
+
+# File of a series folder recording which rollups it has; each rollup is a series in a 'rollup_<window>' sub-folder
+ROLLUPS_FILE = "rollups.json"
+
+
+def _shuffle_compress(values):
+    """
+    Function to compress an unsigned integer array byte plane by byte plane, so the zero high bytes that delta and
+    XOR encoding leave behind end up next to each other.
+    """
+    planes = values.view(np.uint8).reshape(-1, values.itemsize).T
+    return zlib.compress(np.ascontiguousarray(planes).tobytes(), BLOCK_COMPRESSION_LEVEL)
+
+
+def _shuffle_decompress(data, dtype, rows):
+    """
+    Function to undo _shuffle_compress.
+    """
+    planes = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(np.dtype(dtype).itemsize, rows)
+    return np.ascontiguousarray(planes.T).view(dtype).ravel()
+
+
+def _zigzag_delta(values):
+    """
+    Function to replace int64 values by their differences from the previous value, mapped to unsigned integers so
+    small negative and positive steps both have zero high bytes.
+    """
+    deltas = np.diff(values, prepend=np.int64(0))
+    return ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+
+
+def _undo_zigzag_delta(encoded):
+    """
+    Function to undo _zigzag_delta.
+    """
+    deltas = (encoded >> np.uint64(1)).view(np.int64) ^ -(encoded & np.uint64(1)).view(np.int64)
+    return np.cumsum(deltas)
+
+
+def column_kind(dtype):
+    """
+    Function to tell how a column of the given dtype is encoded: 'float', 'int', 'bool' or 'string'.
+    """
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    if pd.api.types.is_float_dtype(dtype):
+        return "float"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "int"
+    if pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(dtype):
+        return "string"
+    raise ValueError(f"Columns of dtype {dtype} cannot be stored")
+
+
+def encode_column(values, kind):
+    """
+    Function to encode one column of a chunk.
+
+    Timestamps are stored as deltas of deltas, so a steady sampling interval encodes to zeros. Floats are XORed
+    with the bits of the previous value, as in Gorilla: an unchanged reading becomes zero bits and a small change
+    leaves the sign and exponent bytes zero. Integers and booleans are stored as deltas, and strings as deltas of
+    their codes in a per-chunk dictionary. The encoded bytes are compressed with zlib one byte plane at a time,
+    which stands in for Gorilla's bit packing without a Python loop over every value.
+
+    Parameters:
+    values (np.ndarray): Values of the column in the chunk; int64 nanoseconds for timestamps
+    kind (str): 'timestamp', or a column_kind
+
+    Returns:
+    Tuple[bytes, list]: Encoded block, and the dictionary of a string column (None for other kinds)
+    """
+    if kind == "timestamp":
+        return _shuffle_compress(_zigzag_delta(np.diff(values, prepend=np.int64(0)))), None
+    if kind == "float":
+        bits = values.view(f"u{values.dtype.itemsize}")
+        return _shuffle_compress(bits ^ np.concatenate([np.zeros(1, bits.dtype), bits[:-1]])), None
+    if kind == "string":
+        categories, codes = np.unique(values.astype(str), return_inverse=True)
+        return _shuffle_compress(_zigzag_delta(codes.astype(np.int64))), categories.tolist()
+    return _shuffle_compress(_zigzag_delta(values.astype(np.int64))), None
+
+
+def decode_column(block, kind, dtype, rows, categories=None):
+    """
+    Function to decode a block written by encode_column.
+
+    Parameters:
+    block (bytes): Encoded block
+    kind (str): 'timestamp', or a column_kind
+    dtype (str): dtype of the stored column; ignored for timestamps and strings
+    rows (int): Number of values in the block
+    categories (list): Dictionary of a string column
+
+    Returns:
+    np.ndarray: The column values; int64 nanoseconds for timestamps, fixed-width unicode for strings
+    """
+    if kind == "timestamp":
+        return np.cumsum(_undo_zigzag_delta(_shuffle_decompress(block, np.uint64, rows)))
+    if kind == "float":
+        bits = np.bitwise_xor.accumulate(_shuffle_decompress(block, f"u{np.dtype(dtype).itemsize}", rows))
+        return bits.view(dtype)
+    values = _undo_zigzag_delta(_shuffle_decompress(block, np.uint64, rows))
+    if kind == "string":
+        return np.array(categories, dtype=str)[values] if rows else np.array([], dtype=str)
+    return values.astype(dtype)
+
+
+def rollup(times, columns, width):
+    """
+    Function to reduce rows to windows of 'width' nanoseconds aligned to the epoch, one vectorized reduction per
+    statistic over all windows at once.
+
+    Parameters:
+    times (np.ndarray): Sorted int64 row times in nanoseconds since the epoch
+    columns (dict): Column name to values of every row
+    width (int): Window length in nanoseconds
+
+    Returns:
+    dict: 'timestamp' (int64 start of every window holding rows), 'rows' (rows in it), then '<column>_<stat>' for
+    ROLLUP_STATS; the mean, min and max skip NaN and are left out for string and boolean columns
+    """
+    windows = times // width
+    starts = np.flatnonzero(np.diff(windows, prepend=windows[:1] - 1))
+    ends = np.append(starts[1:], len(times))[:len(starts)].astype(np.int64)
+    result = {"timestamp": windows[starts] * width, "rows": ends - starts}
+    for name, values in columns.items():
+        if values.dtype.kind in "fiu" and len(times):
+            data = values.astype(np.float64)
+            valid = ~np.isnan(data)
+            with np.errstate(invalid="ignore"):
+                mean = np.add.reduceat(np.where(valid, data, 0), starts) / np.add.reduceat(valid, starts)
+            result[f"{name}_mean"] = mean.astype(values.dtype) if values.dtype.kind == "f" else mean
+            result[f"{name}_min"] = np.fmin.reduceat(values, starts)
+            result[f"{name}_max"] = np.fmax.reduceat(values, starts)
+        elif values.dtype.kind in "fiu":
+            result.update({f"{name}_{stat}": values[:0].astype(np.float64 if stat == "mean" else values.dtype)
+                           for stat in ROLLUP_STATS[:3]})
+        result[f"{name}_last"] = values[ends - 1]
+    return result
+
+
+def _timestamps_and_columns(df):
+    """
+    Function to split a processed dataset into its timestamps (a 'timestamp' column or the index) and the rest.
+    """
+    if "timestamp" in df.columns:
+        return pd.DatetimeIndex(df["timestamp"]), df.drop(columns="timestamp").reset_index(drop=True)
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index, df.reset_index(drop=True)
+    raise ValueError("Datasets must have a 'timestamp' column or be indexed by timestamp")
+
+
+def _to_nanoseconds(timestamps):
+    """
+    Function to convert timestamps to int64 nanoseconds since the epoch in UTC; zone-less times are taken as UTC.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    if timestamps.tz is None:
+        timestamps = timestamps.tz_localize("UTC")
+    return timestamps.tz_convert("UTC").as_unit("ns").asi8
+
+
+class ColumnChunks:
+    """
+    Append-only column store of one time series in a folder.
+
+    Rows are sealed into chunks of 'chunk_rows'. Each column of a chunk is a separately encoded block in data.bin
+    (see encode_column), and index.jsonl has one line per chunk with its first and last timestamps and where its
+    blocks are. A read only opens the chunks its time range overlaps and decodes only the requested columns.
+    Rows that do not fill a chunk yet are kept in tail.npz and in one small tail_<row>.npz per append since, so an
+    append only writes its own rows; the tail is rewritten only when a chunk is sealed.
+
+    Chunks are written to data.bin before their index line, and every tail file records the position of its first
+    row in the series, so a crash at any point loses at most the rows of the append that was running.
+    """
+
+    def __init__(self, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.path = path
+        self.schema = None
+        self.chunks = []
+        self.index_size = 0
+        if os.path.exists(os.path.join(path, SCHEMA_FILE)):
+            with open(os.path.join(path, SCHEMA_FILE)) as f:
+                self.schema = json.load(f)
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            with open(os.path.join(path, INDEX_FILE), "rb") as f:
+                # A line cut short by a crash ends the index; the next chunk is written over it
+                for line in f:
+                    try:
+                        self.chunks.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+                    if not line.endswith(b"\n"):
+                        self.chunks.pop()
+                        break
+                    self.index_size += len(line)
+        self.chunk_rows = self.schema["chunk_rows"] if self.schema is not None else chunk_rows
+        self.starts = np.array([chunk["start"] for chunk in self.chunks], dtype=np.int64)
+        self.ends = np.array([chunk["end"] for chunk in self.chunks], dtype=np.int64)
+        self.tail = self._load_tail()
+
+    @property
+    def columns(self):
+        return [column["name"] for column in self.schema["columns"]] if self.schema is not None else []
+
+    @property
+    def zone(self):
+        return _tz_from_json(self.schema["zone"]) if self.schema is not None and self.schema["zone"] else None
+
+    @property
+    def sealed_rows(self):
+        return sum(chunk["rows"] for chunk in self.chunks)
+
+    def __len__(self):
+        return self.sealed_rows + len(self.tail["timestamp"])
+
+    def _empty_tail(self):
+        tail = {"timestamp": np.empty(0, dtype=np.int64)}
+        for column in (self.schema or {}).get("columns", []):
+            tail[column["name"]] = np.empty(0, dtype=str if column["kind"] == "string" else column["dtype"])
+        return tail
+
+    def _tail_files(self):
+        """
+        Function to list the tail files of the series as (position of the first row, path), in row order.
+        """
+        files = []
+        if os.path.exists(os.path.join(self.path, TAIL_FILE)):
+            files.append((None, os.path.join(self.path, TAIL_FILE)))
+        if os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                match = TAIL_DELTA_PATTERN.match(entry.name)
+                if match:
+                    files.append((int(match.group(1)), entry.path))
+        return files
+
+    def _load_tail(self):
+        tail = self._empty_tail()
+        loaded = []
+        for first_row, path in self._tail_files():
+            df = load_frame(path)
+            if first_row is None:
+                first_row = df.attrs["metadata"].get("sealed_rows", 0)
+            loaded.append((first_row, df))
+
+        # Rows sealed or compacted after a file was written are still in it; take every row from one file only
+        covered = self.sealed_rows
+        for first_row, df in sorted(loaded, key=lambda item: item[0]):
+            skip = covered - first_row
+            if skip >= len(df):
+                continue
+            values = {name: df[name].to_numpy(dtype=str if pd.api.types.is_string_dtype(df[name].dtype) else None)
+                      for name in df.columns}
+            tail = {name: np.concatenate([tail[name], values[name][max(skip, 0):]]) for name in values}
+            covered = first_row + len(df)
+        return tail
+
+    def _save_tail(self):
+        """
+        Function to rewrite tail.npz with the rows not sealed and remove the per-append files it replaces.
+        """
+        path = os.path.join(self.path, TAIL_FILE)
+        if len(self.tail["timestamp"]):
+            save_frame(pd.DataFrame(self.tail), path, {"sealed_rows": self.sealed_rows})
+        elif os.path.exists(path):
+            os.remove(path)
+        for first_row, delta in self._tail_files():
+            if first_row is not None:
+                os.remove(delta)
+
+    def _create_schema(self, timestamps, df):
+        columns = []
+        for name, dtype in df.dtypes.items():
+            kind = column_kind(dtype)
+            columns.append({"name": str(name), "kind": kind,
+                            "dtype": "str" if kind == "string" else str(np.dtype(dtype))})
+        self.schema = {"columns": columns, "zone": _tz_to_json(timestamps.tz) if timestamps.tz is not None else None,
+                       "chunk_rows": self.chunk_rows}
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, SCHEMA_FILE), "w") as f:
+            json.dump(self.schema, f, indent=1)
+        self.tail = self._empty_tail()
+
+    def append(self, df):
+        """
+        Function to append rows that start no earlier than the last stored row.
+
+        Parameters:
+        df (pd.DataFrame): Rows indexed by timestamp, or with a 'timestamp' column, and the series' columns
+        """
+        timestamps, df = _timestamps_and_columns(df)
+        if self.schema is None:
+            self._create_schema(timestamps, df)
+        if sorted(map(str, df.columns)) != sorted(self.columns):
+            raise ValueError(f"Columns {list(df.columns)} do not match the stored columns {self.columns}")
+
+        times = _to_nanoseconds(timestamps)
+        last = self.last_timestamp()
+        if len(times) and ((last is not None and times[0] < last) or np.any(np.diff(times) < 0)):
+            raise ValueError(f"Rows must be in time order and start no earlier than the last stored row of {self.path}")
+
+        new = {"timestamp": times}
+        for column in self.schema["columns"]:
+            values = df[column["name"]].to_numpy()
+            new[column["name"]] = values.astype(str) if column["kind"] == "string" else values.astype(column["dtype"])
+        first_row = len(self)
+        self.tail = {name: np.concatenate([self.tail[name], new[name]]) for name in self.tail}
+
+        if len(self.tail["timestamp"]) < self.chunk_rows:
+            if len(times):
+                save_frame(pd.DataFrame(new), os.path.join(self.path, f"tail_{first_row}.npz"))
+            return
+        while len(self.tail["timestamp"]) >= self.chunk_rows:
+            self._seal({name: values[:self.chunk_rows] for name, values in self.tail.items()})
+            self.tail = {name: values[self.chunk_rows:] for name, values in self.tail.items()}
+        self._save_tail()
+
+    def _seal(self, rows):
+        """
+        Function to write one chunk's blocks to data.bin and then its line to index.jsonl.
+        """
+        offset = self.chunks[-1]["end_offset"] if self.chunks else 0
+        kinds = {"timestamp": "timestamp", **{column["name"]: column["kind"] for column in self.schema["columns"]}}
+        blocks = {}
+        with open(os.path.join(self.path, DATA_FILE), "ab") as f:
+            # Bytes past the last indexed chunk were left by an append that crashed; write over them
+            f.truncate(offset)
+            for name, values in rows.items():
+                block, categories = encode_column(values, kinds[name])
+                f.write(block)
+                blocks[name] = [offset, len(block)] + ([categories] if categories is not None else [])
+                offset += len(block)
+            f.flush()
+            os.fsync(f.fileno())
+
+        chunk = {"start": int(rows["timestamp"][0]), "end": int(rows["timestamp"][-1]),
+                 "rows": len(rows["timestamp"]), "end_offset": offset, "blocks": blocks}
+        line = (json.dumps(chunk, separators=(",", ":")) + "\n").encode()
+        with open(os.path.join(self.path, INDEX_FILE), "ab") as f:
+            f.truncate(self.index_size)
+            f.write(line)
+        self.index_size += len(line)
+        self.chunks.append(chunk)
+        self.starts = np.append(self.starts, chunk["start"])
+        self.ends = np.append(self.ends, chunk["end"])
+
+    @staticmethod
+    def _block(f, chunk, name):
+        """
+        Function to read the encoded block of one column of a chunk from the open data.bin.
+        """
+        offset, length = chunk["blocks"][name][:2]
+        return os.pread(f.fileno(), length, offset)
+
+    def last_timestamp(self):
+        """
+        Function to return the time of the last stored row in nanoseconds since the epoch, or None when empty.
+        """
+        if len(self.tail["timestamp"]):
+            return int(self.tail["timestamp"][-1])
+        return int(self.ends[-1]) if len(self.ends) else None
+
+    def first_timestamp(self):
+        """
+        Function to return the time of the first stored row in nanoseconds since the epoch, or None when empty.
+        """
+        if len(self.starts):
+            return int(self.starts[0])
+        return int(self.tail["timestamp"][0]) if len(self.tail["timestamp"]) else None
+
+    def read(self, start=None, end=None, columns=None):
+        """
+        Function to read the rows with start <= time < end, decoding only the chunks that overlap the range.
+
+        Parameters:
+        start (int): First time in nanoseconds since the epoch; the first row when omitted
+        end (int): Time in nanoseconds since the epoch to stop before; past the last row when omitted
+        columns (list): Columns to read; all when omitted
+
+        Returns:
+        dict: 'timestamp' as datetime64[ns] in UTC, then one array per column
+        """
+        columns = self.columns if columns is None else list(columns)
+        missing = [name for name in columns if name not in self.columns]
+        if missing:
+            raise KeyError(f"Columns {missing} are not in {self.path}")
+        start = np.iinfo(np.int64).min if start is None else start
+        end = np.iinfo(np.int64).max if end is None else end
+        schema = {column["name"]: column for column in self.schema["columns"]} if self.schema is not None else {}
+
+        parts = []
+        first, last = np.searchsorted(self.ends, start, "left"), np.searchsorted(self.starts, end, "left")
+        if first < last:
+            with open(os.path.join(self.path, DATA_FILE), "rb") as f:
+                for chunk in self.chunks[first:last]:
+                    times = decode_column(self._block(f, chunk, "timestamp"), "timestamp", None, chunk["rows"])
+                    # Only the chunks at either end of the range are cut
+                    keep = (slice(None) if chunk["start"] >= start and chunk["end"] < end
+                            else (times >= start) & (times < end))
+                    part = {"timestamp": times[keep]}
+                    for name in columns:
+                        column = schema[name]
+                        categories = chunk["blocks"][name][2] if column["kind"] == "string" else None
+                        part[name] = decode_column(self._block(f, chunk, name), column["kind"], column["dtype"],
+                                                   chunk["rows"], categories)[keep]
+                    parts.append(part)
+
+        keep = (self.tail["timestamp"] >= start) & (self.tail["timestamp"] < end)
+        parts.append({name: self.tail[name][keep] for name in ["timestamp"] + columns})
+
+        result = {name: np.concatenate([part[name] for part in parts]) for name in ["timestamp"] + columns}
+        result["timestamp"] = result["timestamp"].view("datetime64[ns]")
+        return result
+
+
+class TelemetryStore:
+    """
+    Local append-only store of processed telemetry: one ColumnChunks folder per series (an experiment or a host)
+    under 'root'.
+
+    Example:
+    store = TelemetryStore("telemetry_store")
+    store.append("blackscholes_exp_2", joined_df)
+    store.query("blackscholes_exp_2", "2023-07-09 14:00", "2023-07-09 14:20", ["CPU_Avg_Temp"])
+    store.query("blackscholes_exp_2", columns=["CPU_Avg_Temp"], resolution="1min", stats=("mean", "max"))
+    """
+
+    def __init__(self, root, chunk_rows=DEFAULT_CHUNK_ROWS, rollup_windows=DEFAULT_ROLLUPS):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.rollup_windows = rollup_windows
+
+    def _series_path(self, series):
+        if not SERIES_NAME_PATTERN.match(series):
+            raise ValueError(f"Series name '{series}' must only hold letters, digits, '_', '-' and '.'")
+        return os.path.join(self.root, series)
+
+    def series(self, series):
+        """
+        Function to open one series for reading or appending.
+
+        Parameters:
+        series (str): Series name
+
+        Returns:
+        ColumnChunks: The series, empty if nothing was appended to it yet
+        """
+        return ColumnChunks(self._series_path(series), self.chunk_rows)
+
+    def series_names(self):
+        """
+        Function to list the series in the store.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry.name for entry in os.scandir(self.root)
+                      if entry.is_dir() and os.path.exists(os.path.join(entry.path, SCHEMA_FILE)))
+
+    def append(self, series, df):
+        """
+        Function to append a processed dataset, or rows of one, to a series and bring its rollups up to date.
+
+        Parameters:
+        series (str): Series name, e.g. the experiment folder name
+        df (pd.DataFrame): Rows indexed by timestamp, or with a 'timestamp' column, starting no earlier than the last
+        stored row; the first append fixes the columns of the series
+        """
+        chunks = self.series(series)
+        chunks.append(df)
+        for width, target in self._rollups(chunks).values():
+            self._update_rollup(chunks, target, width)
+
+    def _rollups(self, chunks, create=True):
+        """
+        Function to open the rollups of a series, choosing them from its sampling interval on its first append with
+        more than one row.
+
+        Returns:
+        dict: Window label to (width in nanoseconds, ColumnChunks)
+        """
+        path = os.path.join(chunks.path, ROLLUPS_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                windows = json.load(f)["windows"]
+        elif create and len(chunks) > 1:
+            times = chunks.read(columns=[])["timestamp"].view(np.int64)
+            interval = np.median(np.diff(times))
+            windows = [label for label in self.rollup_windows if pd.Timedelta(label).value > interval]
+            with open(path, "w") as f:
+                json.dump({"windows": windows}, f)
+        else:
+            windows = []
+        return {label: (pd.Timedelta(label).value, ColumnChunks(os.path.join(chunks.path, f"rollup_{label}"),
+                                                                 self.chunk_rows))
+                for label in windows}
+
+    @staticmethod
+    def _update_rollup(chunks, target, width):
+        """
+        Function to add the windows that are complete to a rollup, reading only the rows of the series after the
+        last window it holds.
+
+        The window holding the last row stays open, since the next append may add to it; queries roll it up from the
+        rows of the series instead.
+        """
+        last = target.last_timestamp()
+        rows = chunks.read(None if last is None else last + width)
+        times = rows.pop("timestamp").view(np.int64)
+        complete = times < times[-1] // width * width if len(times) else times.astype(bool)
+        if complete.any():
+            windows = rollup(times[complete], {name: values[complete] for name, values in rows.items()}, width)
+            windows["timestamp"] = windows["timestamp"].view("datetime64[ns]")
+            target.append(pd.DataFrame(windows))
+
+    def remove(self, series):
+        """
+        Function to delete a series and its rollups, e.g. before storing a rebuilt dataset of the same experiment.
+        """
+        path = self._series_path(series)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+    def query(self, series, start=None, end=None, columns=None, resolution=None, stats=("mean",)):
+        """
+        Function to read a time range of some columns of a series as NumPy arrays, at its own resolution or in
+        windows of 'resolution'.
+
+        Windowed queries are served from the rollup built for that window at ingest, with the window still open
+        rolled up from the latest rows. Any other window is rolled up from the rows of the series on the fly. Every
+        window starting in the range is returned whole.
+
+        Parameters:
+        series (str): Series name
+        start (str or pd.Timestamp): First time to return; times without a zone are in the zone of the series
+        end (str or pd.Timestamp): Time to stop before
+        columns (list): Columns to return; all when omitted
+        resolution (str): Window length such as '10s' or '1min'; the rows as stored when omitted
+        stats (tuple): Statistics of every column in each window, any of ROLLUP_STATS
+
+        Returns:
+        dict: 'timestamp' as datetime64[ns] in UTC (the start of each window), then one array per requested column,
+        named '<column>_<stat>' for windowed queries
+        """
+        chunks = self.series(series)
+        if chunks.schema is None:
+            raise KeyError(f"No series named '{series}' in {self.root}")
+        start, end = self._bound(start, chunks.zone), self._bound(end, chunks.zone)
+        if resolution is None:
+            return chunks.read(start, end, columns)
+
+        unknown = [stat for stat in stats if stat not in ROLLUP_STATS]
+        if unknown:
+            raise ValueError(f"Unknown statistics {unknown}, expected any of {list(ROLLUP_STATS)}")
+        columns = chunks.columns if columns is None else list(columns)
+        names = [f"{name}_{stat}" for name in columns for stat in stats]
+
+        # Whole windows: from the start of the one holding 'start' to the end of the one holding 'end'
+        width = pd.Timedelta(resolution).value
+        start = None if start is None else start // width * width
+        end = None if end is None else -(-end // width) * width
+
+        parts = []
+        _, target = self._rollups(chunks, create=False).get(resolution, (width, None))
+        if target is not None and target.schema is not None:
+            missing = [name for name in names if name not in target.columns]
+            if missing:
+                raise KeyError(f"{missing} are not kept for string and boolean columns, only '<column>_last'")
+            opened = target.last_timestamp() + width
+            parts.append(target.read(start, opened if end is None else min(end, opened), names))
+            start = opened if start is None else max(start, opened)
+
+        if end is None or start is None or start < end:
+            rows = chunks.read(start, end, columns)
+            windows = rollup(rows.pop("timestamp").view(np.int64), rows, width)
+            missing = [name for name in names if name not in windows]
+            if missing:
+                raise KeyError(f"{missing} are not kept for string and boolean columns, only '<column>_last'")
+            windows["timestamp"] = windows["timestamp"].view("datetime64[ns]")
+            parts.append({name: windows[name] for name in ["timestamp"] + names})
+
+        return {name: np.concatenate([part[name] for part in parts]) for name in ["timestamp"] + names}
+
+    @staticmethod
+    def _bound(time, zone):
+        if time is None:
+            return None
+        time = pd.Timestamp(time)
+        if time.tz is None:
+            time = time.tz_localize(zone or "UTC")
+        return time.as_unit("ns").value